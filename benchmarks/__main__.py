@@ -0,0 +1,80 @@
+"""
+Runs the benchmarks and compares the results with a baseline, so performance regressions show up before a release.
+
+Every bench_*.py module in this directory has a main() that prints its results and returns them as a dict of lower is
+better metrics. Benchmarks that cannot be imported, e.g. because an optional package is missing, are skipped.
+Run from the repository root:
+
+    python -m benchmarks                                  # run all benchmarks
+    python -m benchmarks geojson transform                # run a selection
+    python -m benchmarks --save baseline.json             # store the results as baseline
+    python -m benchmarks --compare baseline.json          # fail when a metric is more than 20% worse
+
+Compare results from the same machine only.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+
+DEFAULT_TOLERANCE = 0.2
+
+
+def available_benchmarks() -> List[str]:
+    return sorted(path.stem[len("bench_") :] for path in Path(__file__).parent.glob("bench_*.py"))
+
+
+def run(names: List[str]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name in names:
+        print(f"\n== {name} ==")
+        try:
+            module = importlib.import_module(f"benchmarks.bench_{name}")
+        except ImportError as error:
+            print(f"skipped: {error}")
+            continue
+        results[name] = module.main() or {}
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Returns a line for every metric that is more than `tolerance` worse than its baseline."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(name, {}).get(metric)
+            if reference and value > reference * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {value:.4g} > {reference:.4g} (+{value / reference - 1:.0%})")
+    return regressions
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Runs the benchmarks of bro.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run, from {', '.join(available_benchmarks())}")
+    parser.add_argument("--save", type=Path, help="write the results to this json file")
+    parser.add_argument("--compare", type=Path, help="compare the results with this json file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    arguments = parser.parse_args(arguments)
+    unknown = set(arguments.names) - set(available_benchmarks())
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = run(arguments.names or available_benchmarks())
+    if arguments.save is not None:
+        arguments.save.write_text(json.dumps(results, indent=2))
+    if arguments.compare is not None:
+        regressions = compare(results, json.loads(arguments.compare.read_text()), arguments.tolerance)
+        print("\n" + ("\n".join(["Regressions:"] + regressions) if regressions else "No regressions"))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Benchmark of parse_imbro_files with an increasing number of worker processes, on copies of the test fixture.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bulk_parse
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+from bro import parse_imbro_files
+
+FIXTURE = Path(__file__).parents[1] / "tests" / "response_CPT000000053405.xml"
+AMOUNT = 400
+
+
+def main() -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(AMOUNT):
+            path = Path(directory) / f"CPT{index:012d}.xml"
+            path.write_bytes(FIXTURE.read_bytes())
+            paths.append(path)
+
+        print(f"{'workers':>8} {'time [s]':>9} {'files/s':>8}")
+        results = {}
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            parse_imbro_files(paths, max_workers=workers)
+            duration = time.perf_counter() - start
+            print(f"{workers:>8} {duration:>9.2f} {AMOUNT / duration:>8.0f}")
+            results[f"{workers} workers [s]"] = duration
+            workers *= 2
+    return results
+
+
+if __name__ == "__main__":
+    main()
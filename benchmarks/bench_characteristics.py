@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of parsing a characteristics search response with 1000 documents into CPTCharacteristics, comparing
+the lxml based parse_characteristics_response with the former xmltodict based parsing.
+
+Requires xmltodict, which is not a dependency of the package anymore. Run from the repository root:
+
+    python -m benchmarks.bench_characteristics
+"""
+
+import timeit
+from typing import Dict
+
+import xmltodict
+
+from bro import CPTCharacteristics
+from bro import parse_characteristics_response
+from tests.mock_server import build_characteristics_response
+from tests.mock_server import generate_cpts
+
+AMOUNT = 1000
+REPEAT = 5
+
+
+def build_response(amount: int = AMOUNT) -> bytes:
+    return build_characteristics_response(generate_cpts(amount)).encode()
+
+
+def parse_with_xmltodict(content: bytes) -> list:
+    parsed = xmltodict.parse(content, attr_prefix="", cdata_key="value", force_list=("dispatchDocument",))
+    documents = parsed["dispatchCharacteristicsResponse"]["dispatchDocument"]
+    return [CPTCharacteristics(document["CPT_C"]) for document in documents if "CPT_C" in document]
+
+
+def parse_with_lxml(content: bytes) -> list:
+    _, documents = parse_characteristics_response(content)
+    return [CPTCharacteristics(document["CPT_C"]) for document in documents if "CPT_C" in document]
+
+
+def main() -> Dict[str, float]:
+    content = build_response()
+    print(f"Parsing a response of {len(content) / 1024**2:.1f} MB with {AMOUNT} documents")
+    results = {}
+    for name, parse in (("xmltodict", parse_with_xmltodict), ("lxml", parse_with_lxml)):
+        duration = min(
+            timeit.repeat(lambda: parse(content), number=1, repeat=REPEAT)
+        )  # pylint: disable=cell-var-from-loop
+        print(f"{name:>10}: {duration * 1000:8.1f} ms")
+        results[f"{name} [s]"] = duration
+    return results
+
+
+if __name__ == "__main__":
+    main()
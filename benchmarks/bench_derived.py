@@ -0,0 +1,58 @@
+"""
+Benchmark of deriving friction ratio, corrected cone resistance, NAP level and soil behaviour type index for many
+CPTs with CPTDataBatch, versus computing them row by row in Python.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_derived
+"""
+
+import math
+import timeit
+from typing import Dict
+
+from bro import CPTData
+from bro import CPTDataBatch
+from tests.mock_server import build_cpt_object
+
+CPTS = 100
+ROWS = 1_000
+REPEAT = 3
+
+
+def derive_row_by_row(cpts):
+    results = []
+    for cpt in cpts:
+        a = cpt.cone_surface_quotient if cpt.cone_surface_quotient is not None else 1.0
+        for depth, qc, fs, u2 in zip(cpt.depth, cpt.cone_resistance, cpt.local_friction, cpt.pore_pressure_u2):
+            qt = qc + u2 * (1 - a)
+            rf = fs / qc * 100 if qc > 0 else math.nan
+            ic = math.nan
+            if qt > 0 and fs > 0:
+                ic = math.sqrt((3.47 - math.log10(qt / 0.1)) ** 2 + (math.log10(fs / qt * 100) + 1.22) ** 2)
+            results.append((rf, qt, cpt.offset - depth, ic))
+    return results
+
+
+def derive_batch(cpts):
+    batch = CPTDataBatch(cpts)
+    return (
+        batch.friction_ratio,
+        batch.corrected_cone_resistance,
+        batch.nap_level,
+        batch.soil_behaviour_type_index,
+    )
+
+
+def main() -> Dict[str, float]:
+    cpts = [CPTData.from_imbro(build_cpt_object(f"CPT{i:012d}", rows=ROWS)) for i in range(CPTS)]
+    print(f"Deriving quantities of {CPTS} CPTs with {ROWS} rows each")
+    results = {}
+    for name, derive in {"row by row": derive_row_by_row, "CPTDataBatch": derive_batch}.items():
+        results[f"{name} [s]"] = min(timeit.repeat(lambda: derive(cpts), number=1, repeat=REPEAT))
+        print(f"{name:>12}: {results[f'{name} [s]'] * 1000:8.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    main()
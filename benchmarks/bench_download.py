@@ -0,0 +1,46 @@
+"""
+Benchmark of the bulk CPT object download, in series versus with a pool of worker threads.
+
+Runs against the local mock server from the tests, so no requests are made to the BRO. Run from the repository root:
+
+    python -m benchmarks.bench_download
+"""
+
+import time
+from typing import Dict
+from unittest import mock
+
+from bro import BROClient
+from bro import get_cpt_objects
+from tests.mock_server import MockBROServer
+from tests.mock_server import generate_cpts
+
+AMOUNTS = (10, 100, 1000)
+LATENCY = 0.02  # seconds per request, roughly the server side latency of the BRO
+MAX_WORKERS = 8
+
+
+def _time_download(bro_ids, max_workers: int) -> float:
+    start = time.perf_counter()
+    get_cpt_objects(bro_ids, max_workers=max_workers)
+    return time.perf_counter() - start
+
+
+def main() -> Dict[str, float]:
+    print(f"{'objects':>8} {'series [s]':>12} {f'{MAX_WORKERS} workers [s]':>14} {'speedup':>8}")
+    results = {}
+    for amount in AMOUNTS:
+        cpts = generate_cpts(amount)
+        with MockBROServer(cpts, latency=LATENCY) as server, BROClient(cpt_object_url=server.object_url) as client:
+            bro_ids = [cpt.bro_id for cpt in cpts]
+            with mock.patch("bro.api._default_client", client):
+                series = _time_download(bro_ids, max_workers=1)
+                concurrent = _time_download(bro_ids, max_workers=MAX_WORKERS)
+        print(f"{amount:>8} {series:>12.2f} {concurrent:>14.2f} {series / concurrent:>7.1f}x")
+        results[f"{amount} objects series [s]"] = series
+        results[f"{amount} objects {MAX_WORKERS} workers [s]"] = concurrent
+    return results
+
+
+if __name__ == "__main__":
+    main()
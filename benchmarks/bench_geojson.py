@@ -0,0 +1,39 @@
+"""
+Benchmark of exporting 10000 CPT characteristics to GeoJSON: building the FeatureCollection in memory with
+construct_geojson_from_characteristics versus streaming it with write_geojson, as a single document and as NDJSON.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_geojson
+"""
+
+import io
+import timeit
+from typing import Dict
+
+from bro import construct_geojson_from_characteristics
+from bro import write_geojson
+from tests.mock_server import generate_characteristics
+from tests.mock_server import generate_cpts
+
+AMOUNT = 10_000
+REPEAT = 3
+
+
+def main() -> Dict[str, float]:
+    characteristics = generate_characteristics(generate_cpts(AMOUNT))
+    exports = {
+        "construct": lambda: construct_geojson_from_characteristics(characteristics),
+        "write": lambda: write_geojson(characteristics, io.StringIO()),
+        "write ndjson": lambda: write_geojson(characteristics, io.StringIO(), sequence="ndjson"),
+    }
+    print(f"Exporting {AMOUNT} characteristics to GeoJSON")
+    results = {}
+    for name, export in exports.items():
+        results[f"{name} [s]"] = min(timeit.repeat(export, number=1, repeat=REPEAT))
+        print(f"{name:>14}: {results[f'{name} [s]'] * 1000:8.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark of the time `import bro` and the first import of the API take in a fresh interpreter, and of the
+dependencies that are loaded on first use, measured with `python -X importtime`.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import
+"""
+
+import statistics
+import subprocess
+import sys
+from typing import Dict
+
+from tests.test_import import DEFERRED_MODULES
+from tests.test_import import import_times
+
+REPEAT = 5
+
+
+def statement_time(statement: str) -> float:
+    """Returns the time in s the statement takes in a fresh interpreter."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout)
+
+
+def main() -> Dict[str, float]:
+    results = {}
+    for statement in ["import bro", "from bro import get_cpt_object"]:
+        results[f"{statement} [s]"] = statistics.median(statement_time(statement) for _ in range(REPEAT))
+        print(f"{statement:>30}: {results[f'{statement} [s]'] * 1000:8.1f} ms (median)")
+
+    dependencies = import_times(f"import {', '.join(DEFERRED_MODULES)}")
+    for module in DEFERRED_MODULES:
+        if module in dependencies:
+            print(f"{module:>30}: {dependencies[module] / 1000:8.1f} ms on first use")
+    return results
+
+
+if __name__ == "__main__":
+    main()
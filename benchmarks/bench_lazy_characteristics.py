@@ -0,0 +1,45 @@
+"""
+Benchmark of constructing 1000 CPTCharacteristics from parsed dispatch documents, decoding all fields up front
+versus on first access, and of filtering them on location and deregistration afterwards.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_lazy_characteristics
+"""
+
+import timeit
+from typing import Dict
+
+from bro import CPTCharacteristics
+from bro import parse_characteristics_response
+from tests.mock_server import build_characteristics_response
+from tests.mock_server import generate_cpts
+
+AMOUNT = 1000
+REPEAT = 20
+
+
+def construct_and_filter(documents: list, lazy: bool) -> list:
+    characteristics = [CPTCharacteristics(document["CPT_C"], lazy=lazy) for document in documents]
+    return [
+        characteristic
+        for characteristic in characteristics
+        if not characteristic.deregistered and characteristic.standardized_location.lat < 52.01
+    ]
+
+
+def main() -> Dict[str, float]:
+    _, documents = parse_characteristics_response(build_characteristics_response(generate_cpts(AMOUNT)).encode())
+    print(f"Constructing and filtering {AMOUNT} CPTCharacteristics")
+    results = {}
+    for name, lazy in (("eager", False), ("lazy", True)):
+        duration = min(
+            timeit.repeat(lambda: construct_and_filter(documents, lazy), number=1, repeat=REPEAT)
+        )  # pylint: disable=cell-var-from-loop
+        print(f"{name:>6}: {duration * 1000:8.2f} ms")
+        results[f"{name} [s]"] = duration
+    return results
+
+
+if __name__ == "__main__":
+    main()
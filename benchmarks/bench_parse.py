@@ -0,0 +1,71 @@
+"""
+Benchmark of IMBROFile.parse versus IMBROFile.parse_streaming, on the test fixture and on a synthetic 50 MB CPT.
+
+Every measurement runs in a fresh process, so the peak resident memory of the process (which includes the memory of
+lxml) can be compared. Run from the repository root (POSIX only):
+
+    python -m benchmarks.bench_parse
+"""
+
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+from bro import IMBROFile
+
+FIXTURE = Path(__file__).parents[1] / "tests" / "response_CPT000000053405.xml"
+SYNTHETIC_SIZE = 50 * 1024**2
+
+
+def write_synthetic_cpt(file_path: Path, size: int = SYNTHETIC_SIZE) -> None:
+    """Writes a CPT that is `size` bytes large, by repeating the measurement rows of the fixture."""
+    content = FIXTURE.read_text()
+    start = content.index("<cptcommon:values>") + len("<cptcommon:values>")
+    end = content.index("</cptcommon:values>")
+    rows = content[start:end]
+    repeats = max(1, (size - len(content)) // len(rows) + 1)
+    file_path.write_text(content[:start] + rows * repeats + content[end:])
+
+
+def _measure(method: str, file_path: str, queue: multiprocessing.Queue) -> None:
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if method == "parse":
+        IMBROFile.from_file(file_path).parse()
+    else:
+        IMBROFile.parse_streaming(file_path)
+    duration = time.perf_counter() - start
+    queue.put((duration, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024))
+
+
+def measure(method: str, file_path: Path) -> tuple:
+    """Returns the parse time in s and the growth of the peak resident memory in MB."""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure, args=(method, str(file_path), queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        synthetic = Path(directory) / "synthetic_cpt.xml"
+        write_synthetic_cpt(synthetic)
+        print(f"{'file':>12} {'size [MB]':>10} {'method':>16} {'time [s]':>9} {'peak memory [MB]':>17}")
+        results = {}
+        for name, file_path in (("fixture", FIXTURE), ("synthetic", synthetic)):
+            size = file_path.stat().st_size / 1024**2
+            for method in ("parse", "parse_streaming"):
+                duration, peak_memory = measure(method, file_path)
+                print(f"{name:>12} {size:>10.1f} {method:>16} {duration:>9.3f} {peak_memory:>17.1f}")
+                results[f"{name} {method} [s]"] = duration
+                results[f"{name} {method} peak memory [MB]"] = peak_memory
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark of parsing only qc and fs between two depths from a thick synthetic CPT with IMBROFile.parse_projection,
+versus decoding the complete measurement table with IMBROFile.parse_measurements.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_projection
+"""
+
+import timeit
+from typing import Dict
+
+from bro import IMBROFile
+from tests.mock_server import build_cpt_object
+
+ROWS = 100_000  # 2 km at 2 cm per row
+DEPTH_RANGE = (10.0, 20.0)
+REPEAT = 3
+
+
+def main() -> Dict[str, float]:
+    imbro_file = IMBROFile(build_cpt_object("CPT000000000001", rows=ROWS))
+    parsers = {
+        "parse_measurements": imbro_file.parse_measurements,
+        "projection qc, fs": lambda: imbro_file.parse_projection(["coneResistance", "localFriction"]),
+        "projection qc, fs, window": lambda: imbro_file.parse_projection(
+            ["coneResistance", "localFriction"], depth_range=DEPTH_RANGE
+        ),
+    }
+    print(f"Parsing a CPT of {len(imbro_file.file_content) / 1024**2:.1f} MB with {ROWS} rows")
+    results = {}
+    for name, parse in parsers.items():
+        results[f"{name} [s]"] = min(timeit.repeat(parse, number=1, repeat=REPEAT))
+        print(f"{name:>26}: {results[f'{name} [s]'] * 1000:8.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    main()
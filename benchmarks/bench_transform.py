@@ -0,0 +1,62 @@
+"""
+Benchmark of the per point cost of converting WGS84 coordinates to RD coordinates: building a transformer per call
+(as before), reusing the cached transformer per point, and converting all points in one batch.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_transform
+"""
+
+import time
+from typing import Dict
+
+import numpy as np
+from pyproj import Transformer
+
+from bro import Point
+from bro import wgs84_to_rd
+
+AMOUNT = 10_000
+
+
+def _per_point_us(function, points) -> float:
+    start = time.perf_counter()
+    function(points)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def uncached(points):
+    for point in points:
+        Transformer.from_crs(4326, 28992).transform(point.lat, point.lon)
+
+
+def cached(points):
+    for point in points:
+        point.from_wgs84_to_rd()
+
+
+def batched(points):
+    Point.batch_to_rd(points)
+
+
+def main() -> Dict[str, float]:
+    rng = np.random.default_rng(0)
+    points = [Point(lat, lon) for lat, lon in zip(rng.uniform(51, 53, AMOUNT), rng.uniform(4, 6, AMOUNT))]
+    lat, lon = np.array([point.lat for point in points]), np.array([point.lon for point in points])
+
+    print(f"Converting {AMOUNT} points from WGS84 to RD")
+    results = {
+        "uncached single [us/point]": _per_point_us(uncached, points[:500]),
+        "cached single [us/point]": _per_point_us(cached, points),
+        "batched points [us/point]": _per_point_us(batched, points),
+    }
+    start = time.perf_counter()
+    wgs84_to_rd(lat, lon)
+    results["batched arrays [us/point]"] = (time.perf_counter() - start) / AMOUNT * 1e6
+    for name, per_point in results.items():
+        print(f"{name.split(' [')[0]:>22}: {per_point:8.2f} us/point")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,165 @@
-from bro.api import *
-from bro.helper_functions import *
-from bro.objects import *
+import importlib
+from typing import TYPE_CHECKING
+
+# The submodules are imported on first access of one of their names, so `import bro` does not import numpy, sqlite3,
+# requests or lxml before they are needed
+_SUBMODULES = (
+    "aio",
+    "api",
+    "archive",
+    "cache",
+    "derived",
+    "harvest",
+    "helper_functions",
+    "instrumentation",
+    "objects",
+    "ratelimit",
+    "spatial",
+    "sync",
+    "table",
+    "tiling",
+)
+
+# Public names of the package and the submodule that defines them
+_EXPORTS = {
+    "AsyncBROClient": "aio",
+    "REQUEST_REFERENCE": "api",
+    "CPT_OBJECT_URL": "api",
+    "CPT_CHARACTERISTICS_URL": "api",
+    "BRO_REQUEST_TIMEOUT": "api",
+    "DEFAULT_MAX_WORKERS": "api",
+    "DEFAULT_POOL_SIZE": "api",
+    "DEFAULT_MAX_RETRIES": "api",
+    "DEFAULT_BACKOFF_FACTOR": "api",
+    "DEFAULT_CHUNK_SIZE": "api",
+    "PARSE_QUEUE_PER_WORKER": "api",
+    "RETRY_STATUS_CODES": "api",
+    "CIRCLE_POLYGON_SEGMENTS": "api",
+    "CHARACTERISTICS_HEADERS": "api",
+    "CPT_OBJECT_HEADERS": "api",
+    "BRORejectionError": "api",
+    "CPTDownloadError": "api",
+    "WGS84_EPSG": "api",
+    "RD_EPSG": "api",
+    "wgs84_to_rd": "api",
+    "rd_to_wgs84": "api",
+    "RDPoint": "api",
+    "Point": "api",
+    "Circle": "api",
+    "Envelope": "api",
+    "CPTCharacteristics": "api",
+    "BROClient": "api",
+    "get_default_client": "api",
+    "set_default_client": "api",
+    "get_cpt_characteristics_and_return_cpt_objects": "api",
+    "get_cpt_characteristics": "api",
+    "get_cpt_object": "api",
+    "get_cpt_objects": "api",
+    "iter_cpt_objects": "api",
+    "iter_cpt_characteristics_and_cpt_objects": "api",
+    "CHARACTERISTICS_FILE": "archive",
+    "MEASUREMENTS_FILE": "archive",
+    "DEFAULT_COMPRESSION": "archive",
+    "DEFAULT_ROW_GROUP_CPTS": "archive",
+    "CPT_PARAMETERS": "archive",
+    "CPTArchiveWriter": "archive",
+    "write_archive": "archive",
+    "CPTArchive": "archive",
+    "DEFAULT_CACHE_MAX_SIZE": "cache",
+    "DEFAULT_CHARACTERISTICS_TTL": "cache",
+    "CPTObjectCache": "cache",
+    "CharacteristicsCache": "cache",
+    "MemoryCharacteristicsCache": "cache",
+    "DiskCharacteristicsCache": "cache",
+    "ATMOSPHERIC_PRESSURE": "derived",
+    "NAP": "derived",
+    "friction_ratio": "derived",
+    "corrected_cone_resistance": "derived",
+    "soil_behaviour_type_index": "derived",
+    "nap_level": "derived",
+    "CPTData": "derived",
+    "CPTDataBatch": "derived",
+    "MANIFEST_FILE": "harvest",
+    "ManifestEntry": "harvest",
+    "HarvestResult": "harvest",
+    "Harvester": "harvest",
+    "EARTH_RADIUS": "helper_functions",
+    "GEOJSON_SEQUENCE_FORMATS": "helper_functions",
+    "write_geojson": "helper_functions",
+    "construct_geojson_from_characteristics": "helper_functions",
+    "REQUEST_START": "instrumentation",
+    "REQUEST_END": "instrumentation",
+    "REQUEST_RETRY": "instrumentation",
+    "PARSE_OBJECT": "instrumentation",
+    "PARSE_CHARACTERISTICS": "instrumentation",
+    "CACHE_HIT": "instrumentation",
+    "CACHE_MISS": "instrumentation",
+    "PERCENTILES": "instrumentation",
+    "Event": "instrumentation",
+    "Listener": "instrumentation",
+    "add_listener": "instrumentation",
+    "remove_listener": "instrumentation",
+    "emit": "instrumentation",
+    "timed": "instrumentation",
+    "MetricsAggregator": "instrumentation",
+    "LoggingListener": "instrumentation",
+    "NO_DATA_VALUE": "objects",
+    "DEFAULT_PARSE_CHUNKSIZE": "objects",
+    "PARSE_CHUNKS_PER_WORKER": "objects",
+    "parse_characteristics_response": "objects",
+    "CPTMeasurements": "objects",
+    "CPTProjection": "objects",
+    "decode_measurements": "objects",
+    "IMBROFile": "objects",
+    "iter_parse_imbro_files": "objects",
+    "parse_imbro_files": "objects",
+    "DEFAULT_RATE": "ratelimit",
+    "DEFAULT_INITIAL_CONCURRENCY": "ratelimit",
+    "DEFAULT_MAX_CONCURRENCY": "ratelimit",
+    "DEFAULT_LATENCY_TOLERANCE": "ratelimit",
+    "THROTTLE_STATUS_CODES": "ratelimit",
+    "TokenBucket": "ratelimit",
+    "AdaptiveConcurrencyLimiter": "ratelimit",
+    "POINTS_PER_CELL": "spatial",
+    "CPTSpatialIndex": "spatial",
+    "BRO_CPT_BEGIN_DATE": "sync",
+    "SyncResult": "sync",
+    "CharacteristicsIndex": "sync",
+    "CharacteristicsTable": "table",
+    "DEFAULT_MAX_DEPTH": "tiling",
+    "OBJECT_LIMIT_REJECTION": "tiling",
+    "get_cpt_characteristics_tiled": "tiling",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"bro.{name}")
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'bro' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"bro.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if TYPE_CHECKING:
+    from bro.aio import *
+    from bro.api import *
+    from bro.archive import *
+    from bro.cache import *
+    from bro.derived import *
+    from bro.harvest import *
+    from bro.helper_functions import *
+    from bro.instrumentation import *
+    from bro.objects import *
+    from bro.ratelimit import *
+    from bro.spatial import *
+    from bro.sync import *
+    from bro.table import *
+    from bro.tiling import *
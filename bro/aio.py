@@ -0,0 +1,307 @@
+import itertools
+import time
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .api import BRO_REQUEST_TIMEOUT
+from .api import CHARACTERISTICS_HEADERS
+from .api import CPT_CHARACTERISTICS_URL
+from .api import CPT_OBJECT_HEADERS
+from .api import CPT_OBJECT_URL
+from .api import DEFAULT_BACKOFF_FACTOR
+from .api import DEFAULT_MAX_RETRIES
+from .api import DEFAULT_MAX_WORKERS
+from .api import DEFAULT_POOL_SIZE
+from .api import REQUEST_REFERENCE
+from .api import RETRY_STATUS_CODES
+from .api import BRORejectionError
+from .api import Circle
+from .api import CPTCharacteristics
+from .api import CPTDownloadError
+from .api import Envelope
+from .api import _characteristics_search_json
+from .api import _cpt_documents
+from .api import _get_cached_characteristics
+from .api import _get_cached_object
+from .api import _parse_characteristics_response
+from .api import _parse_cpt_object
+from .api import _retry_delay
+from .api import logger
+from .cache import CharacteristicsCache
+from .cache import CPTObjectCache
+from .instrumentation import PARSE_CHARACTERISTICS
+from .instrumentation import REQUEST_END
+from .instrumentation import REQUEST_RETRY
+from .instrumentation import REQUEST_START
+from .instrumentation import emit
+from .instrumentation import timed
+from .ratelimit import AdaptiveConcurrencyLimiter
+from .ratelimit import TokenBucket
+
+
+def _import_httpx():
+    try:
+        import httpx  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError("The async client requires httpx, install it with `pip install bro[async]`") from error
+    return httpx
+
+
+async def _run_in_executor(function, *args):
+    """Runs a blocking function (parsing, SQLite, file locks) in the default executor, so it does not block the loop."""
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+class AsyncBROClient:
+    """
+    Asyncio counterpart of `BROClient`, built on a pooled `httpx.AsyncClient`. Requests that fail with a 429 or 5xx
+    status code, or with a connection error, are retried with an exponential backoff, honouring the Retry-After header
+    of the response. Parsing and the caches run in the default executor, so they do not block the event loop.
+
+    Use it as an async context manager, so the connections are closed when done:
+
+        async with AsyncBROClient() as client:
+            characteristics = await client.get_cpt_characteristics(begin_date, end_date, area)
+
+    :param pool_size: maximum number of open connections
+    :param max_retries: maximum number of retries of a single request
+    :param backoff_factor: backoff factor in s, the n-th retry waits backoff_factor * 2 ** (n - 1) seconds
+    :param timeout: timeout of a single request in s
+    :param cpt_object_url: url of the CPT object endpoint, the BRO ID is appended to it
+    :param cpt_characteristics_url: url of the CPT characteristics search endpoint
+    :param cache: optional CPTObjectCache, objects in the cache are not requested from the BRO again
+    :param characteristics_cache: optional CharacteristicsCache, serves characteristics searches that are covered by
+        an earlier search with the same registration period
+    :param rate_limiter: optional TokenBucket that every request to the BRO takes a token from
+    :param concurrency_limiter: optional AdaptiveConcurrencyLimiter that bounds the requests in flight and adapts
+        the bound to throttled and slow responses
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        timeout: float = BRO_REQUEST_TIMEOUT,
+        cpt_object_url: str = CPT_OBJECT_URL,
+        cpt_characteristics_url: str = CPT_CHARACTERISTICS_URL,
+        cache: Optional[CPTObjectCache] = None,
+        characteristics_cache: Optional[CharacteristicsCache] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    ):
+        self._httpx = _import_httpx()
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.cache = cache
+        self.characteristics_cache = characteristics_cache
+        self.rate_limiter = rate_limiter
+        self.concurrency_limiter = concurrency_limiter
+        self.cpt_object_url = cpt_object_url
+        self.cpt_characteristics_url = cpt_characteristics_url
+        self.client = self._httpx.AsyncClient(
+            limits=self._httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=timeout,
+        )
+
+    async def close(self):
+        """Closes all connections of the client."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncBROClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _send(self, method: str, url: str, **kwargs):
+        """Sends a single request, after the rate and concurrency limiters allow it."""
+        if self.concurrency_limiter is not None:
+            await self.concurrency_limiter.acquire_async()
+        latency, status_code = None, None
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            emit(REQUEST_START, method=method, url=url)
+            start = time.monotonic()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except self._httpx.HTTPError as error:
+                emit(REQUEST_END, time.monotonic() - start, method=method, url=url, error=repr(error))
+                raise
+            latency, status_code = time.monotonic() - start, response.status_code
+            emit(REQUEST_END, latency, method=method, url=url, status_code=status_code, bytes=len(response.content))
+            return response
+        finally:
+            if self.concurrency_limiter is not None:
+                self.concurrency_limiter.release(latency, status_code)
+
+    async def _request(self, method: str, url: str, **kwargs):
+        """Sends a request and retries it on connection errors and retryable status codes."""
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        for retry in range(self.max_retries + 1):
+            try:
+                response = await self._send(method, url, **kwargs)
+            except self._httpx.TransportError as error:
+                if retry == self.max_retries:
+                    raise
+                emit(REQUEST_RETRY, method=method, url=url, status_code=None, error=repr(error))
+                await asyncio.sleep(self.backoff_factor * 2**retry)
+                continue
+            if response.status_code not in RETRY_STATUS_CODES or retry == self.max_retries:
+                return response
+            emit(REQUEST_RETRY, method=method, url=url, status_code=response.status_code, error=None)
+            await asyncio.sleep(_retry_delay(response.headers.get("Retry-After"), self.backoff_factor * 2**retry))
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def search_dispatch_documents(
+        self, begin_date: str, end_date: str, area: Union[Circle, Envelope]
+    ) -> List[dict]:
+        """See `BROClient.search_dispatch_documents`."""
+        response = await self._request(
+            "POST",
+            self.cpt_characteristics_url,
+            headers=CHARACTERISTICS_HEADERS,
+            json=_characteristics_search_json(begin_date, end_date, area),
+        )
+        if response.status_code == 200:
+            rejection_reason, dispatch_documents = await _run_in_executor(
+                _parse_characteristics_response, response.content
+            )
+            if rejection_reason:
+                raise BRORejectionError(f"{rejection_reason}")
+            return dispatch_documents
+        response.raise_for_status()
+        raise self._httpx.HTTPStatusError(
+            f"Unexpected status code {response.status_code}", request=response.request, response=response
+        )
+
+    async def get_cpt_characteristics(
+        self, begin_date: str, end_date: str, area: Union[Circle, Envelope]
+    ) -> List[CPTCharacteristics]:
+        """See `get_cpt_characteristics`."""
+        cpt_documents = None
+        if self.characteristics_cache is not None:
+            cpt_documents = await _run_in_executor(
+                _get_cached_characteristics, self.characteristics_cache, begin_date, end_date, area
+            )
+        if cpt_documents is None:
+            cpt_documents = _cpt_documents(await self.search_dispatch_documents(begin_date, end_date, area))
+            if self.characteristics_cache is not None:
+                await _run_in_executor(
+                    self.characteristics_cache.set, begin_date, end_date, area.bro_json, cpt_documents
+                )
+        if not cpt_documents:
+            raise ValueError(
+                "No available objects have been found in given date + area range. Retry with different parameters."
+            )
+
+        with timed(PARSE_CHARACTERISTICS, count=len(cpt_documents), stage="characteristics"):
+            return [CPTCharacteristics(document) for document in cpt_documents]
+
+    async def get_cpt_object(self, bro_cpt_id: str, as_dict: bool = False) -> Union[bytes, dict]:
+        """See `get_cpt_object`."""
+        content = await _run_in_executor(_get_cached_object, self.cache, bro_cpt_id) if self.cache is not None else None
+        if content is None:
+            response = await self._request(
+                "GET",
+                f"{self.cpt_object_url}{bro_cpt_id}?requestReference={REQUEST_REFERENCE}",
+                headers=CPT_OBJECT_HEADERS,
+            )
+            response.raise_for_status()
+            content = response.content
+            if self.cache is not None:
+                await _run_in_executor(self.cache.set, bro_cpt_id, content)
+        if as_dict:
+            return await _run_in_executor(_parse_cpt_object, bro_cpt_id, content)
+        return content
+
+    async def get_cpt_objects(
+        self, bro_cpt_ids: List[str], as_dict: bool = False, max_concurrency: int = DEFAULT_MAX_WORKERS
+    ) -> List[Union[bytes, dict]]:
+        """See `get_cpt_objects`, at most max_concurrency objects are requested at the same time."""
+        results: List[Optional[Union[bytes, dict]]] = [None] * len(bro_cpt_ids)
+        errors: Dict[str, Exception] = {}
+        async for index, result in self._iter_downloads(bro_cpt_ids, as_dict, max_concurrency):
+            if isinstance(result, Exception):
+                errors[bro_cpt_ids[index]] = result
+            else:
+                results[index] = result
+
+        if errors:
+            raise CPTDownloadError(errors, results)
+        return results
+
+    async def iter_cpt_objects(
+        self,
+        characteristics: List[CPTCharacteristics],
+        as_dict: bool = False,
+        max_concurrency: int = DEFAULT_MAX_WORKERS,
+    ) -> AsyncIterator[Tuple[CPTCharacteristics, Union[bytes, dict]]]:
+        """See `iter_cpt_objects`, the objects are yielded in order of completion."""
+        errors: Dict[str, Exception] = {}
+        bro_cpt_ids = [characteristic.bro_id for characteristic in characteristics]
+        async for index, result in self._iter_downloads(bro_cpt_ids, as_dict, max_concurrency):
+            if isinstance(result, Exception):
+                errors[bro_cpt_ids[index]] = result
+            else:
+                yield characteristics[index], result
+
+        if errors:
+            raise CPTDownloadError(errors, [])
+
+    async def get_cpt_characteristics_and_return_cpt_objects(
+        self,
+        begin_date: str,
+        end_date: str,
+        area: Union[Circle, Envelope],
+        as_dict: bool = False,
+        max_concurrency: int = DEFAULT_MAX_WORKERS,
+    ) -> List[Union[bytes, dict]]:
+        """See `get_cpt_characteristics_and_return_cpt_objects`."""
+        available_cpts = await self.get_cpt_characteristics(begin_date, end_date, area)
+        logger.info("Retrieving %d CPT objects", len(available_cpts))
+        return await self.get_cpt_objects(
+            [available_cpt.bro_id for available_cpt in available_cpts], as_dict=as_dict, max_concurrency=max_concurrency
+        )
+
+    async def _iter_downloads(
+        self, bro_cpt_ids: List[str], as_dict: bool, max_concurrency: int
+    ) -> AsyncIterator[Tuple[int, Union[bytes, dict, Exception]]]:
+        """Yields (index, object) as soon as each download finishes, or (index, exception) if it failed.
+
+        At most max_concurrency downloads are in flight, and the next download is only started once a finished one has
+        been consumed, so the memory use does not grow with the number of objects.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency should be at least 1, got {max_concurrency}")
+
+        async def download(index: int, bro_cpt_id: str) -> Tuple[int, Union[bytes, dict, Exception]]:
+            try:
+                return index, await self.get_cpt_object(bro_cpt_id, as_dict=as_dict)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                return index, error
+
+        indexed_ids = iter(enumerate(bro_cpt_ids))
+        pending = set()
+        try:
+            for index, bro_cpt_id in itertools.islice(indexed_ids, max_concurrency):
+                pending.add(asyncio.ensure_future(download(index, bro_cpt_id)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+                    for next_index, bro_cpt_id in itertools.islice(indexed_ids, 1):
+                        pending.add(asyncio.ensure_future(download(next_index, bro_cpt_id)))
+        finally:
+            for task in pending:
+                task.cancel()
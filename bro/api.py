@@ -1,34 +1,143 @@
+import email.utils
+import functools
+import itertools
+import logging
+import math
+import threading
+import time
 from dataclasses import dataclass
-from pathlib import Path
+from datetime import datetime
+from datetime import timezone
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import Union
 
-import requests
-import xmltodict
-from pyproj import Transformer
-
+from .__version__ import __version__
+from .helper_functions import EARTH_RADIUS
 from .helper_functions import _str2bool
+from .instrumentation import CACHE_HIT
+from .instrumentation import CACHE_MISS
+from .instrumentation import PARSE_CHARACTERISTICS
+from .instrumentation import PARSE_OBJECT
+from .instrumentation import REQUEST_END
+from .instrumentation import REQUEST_RETRY
+from .instrumentation import REQUEST_START
+from .instrumentation import emit
+from .instrumentation import timed
 from .objects import IMBROFile
+from .objects import _parse_imbro_source
+from .objects import parse_characteristics_response
+from .ratelimit import AdaptiveConcurrencyLimiter
+from .ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    import numpy as np
+    import requests
+    from pyproj import Transformer
+
+    from .cache import CharacteristicsCache
+    from .cache import CPTObjectCache
 
-# pylint: disable=exec-used
-about = {}
-with open(Path(__file__).parent / "__version__.py", "r") as f:
-    exec(f.read(), about)
-# pylint: enable=exec-used
 
+logger = logging.getLogger(__name__)
 
-REQUEST_REFERENCE = f"Requested-with-bro-v{about['__version__']}"
+REQUEST_REFERENCE = f"Requested-with-bro-v{__version__}"
 CPT_OBJECT_URL = "https://publiek.broservices.nl/sr/cpt/v1/objects/"
 CPT_CHARACTERISTICS_URL = (
     f"https://publiek.broservices.nl/sr/cpt/v1/characteristics/searches?requestReference={REQUEST_REFERENCE}"
 )
 BRO_REQUEST_TIMEOUT = 20
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Number of downloaded objects per parse worker that may wait to be parsed
+PARSE_QUEUE_PER_WORKER = 2
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+CIRCLE_POLYGON_SEGMENTS = 64
+CHARACTERISTICS_HEADERS = {
+    "accept": "application/xml",
+    "Content-Type": "application/json",
+}
+CPT_OBJECT_HEADERS = {
+    "accept": "application/xml",
+}
+
+
+class BRORejectionError(ValueError):
+    """Raised when the BRO rejects a request, the message contains the rejection reason given by the BRO."""
+
+
+class CPTDownloadError(Exception):
+    """Raised when one or more CPT objects of a bulk download could not be retrieved.
+
+    :param errors: dict of BRO ID to the exception that was raised while retrieving that object
+    :param results: list of the retrieved objects in the requested order, None for the objects that failed. Empty
+        when the objects were streamed.
+    """
+
+    def __init__(self, errors: Dict[str, Exception], results: List[Optional[Union[bytes, dict]]]):
+        self.errors = errors
+        self.results = results
+        super().__init__(f"Failed to retrieve {len(errors)} CPT objects: {', '.join(errors)}")
+
+
+WGS84_EPSG = 4326
+RD_EPSG = 28992
+
+
+@functools.lru_cache(maxsize=None)
+def _get_transformer(from_epsg: int, to_epsg: int) -> "Transformer":
+    """Building a transformer is far more expensive than a transformation, so the transformers are reused.
+
+    pyproj is imported here instead of at the top of the module, as it is slow to import and not needed to read or
+    export CPTs.
+    """
+    from pyproj import Transformer  # pylint: disable=import-outside-toplevel
+
+    return Transformer.from_crs(from_epsg, to_epsg)
+
+
+def wgs84_to_rd(lat: Sequence[float], lon: Sequence[float]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Converts arrays of lat/lon coordinates (EPSG:4326) in degrees to RD coordinates (EPSG:28992) in one call.
+
+    :param lat: array-like of latitudes in degree (WGS84 / EPSG:4326)
+    :param lon: array-like of longitudes in degree (WGS84 / EPSG:4326)
+    :return: tuple of the arrays of x and y in m (RD New / EPSG:28992)
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    x, y = _get_transformer(WGS84_EPSG, RD_EPSG).transform(
+        np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    )
+    return x, y
+
+
+def rd_to_wgs84(x: Sequence[float], y: Sequence[float]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Converts arrays of RD coordinates (EPSG:28992) in m to lat/lon coordinates (EPSG:4326) in one call.
+
+    :param x: array-like of x in m (RD New / EPSG:28992)
+    :param y: array-like of y in m (RD New / EPSG:28992)
+    :return: tuple of the arrays of latitudes and longitudes in degree (WGS84 / EPSG:4326)
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    lat, lon = _get_transformer(RD_EPSG, WGS84_EPSG).transform(
+        np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    )
+    return lat, lon
 
 
 # pylint: disable=unpacking-non-sequence
 @dataclass
 class RDPoint:
+    __slots__ = ("x", "y")
     x: float
     y: float
 
@@ -41,13 +150,19 @@ class RDPoint:
         :param y: float longitude in degree (RD New / EPSG:28992)
         :return:
         """
-        transformer = Transformer.from_crs(28992, 4326)
-        lat, lon = transformer.transform(self.x, self.y)
+        lat, lon = _get_transformer(RD_EPSG, WGS84_EPSG).transform(self.x, self.y)
         return Point(lat, lon)
 
+    @staticmethod
+    def batch_to_wgs84(points: Sequence["RDPoint"]) -> List["Point"]:
+        """Converts a list of RD points to lat/lon points with a single transformation."""
+        lat, lon = rd_to_wgs84([point.x for point in points], [point.y for point in points])
+        return [Point(*coordinate) for coordinate in zip(lat.tolist(), lon.tolist())]
+
 
 @dataclass
 class Point:
+    __slots__ = ("lat", "lon")
     lat: float
     lon: float
 
@@ -60,10 +175,15 @@ class Point:
         :param lon: float longitude in degree (WGS84 / EPSG:4326)
         :return:
         """
-        transformer = Transformer.from_crs(4326, 28992)
-        rd_y, rd_x = transformer.transform(self.lat, self.lon)
+        rd_y, rd_x = _get_transformer(WGS84_EPSG, RD_EPSG).transform(self.lat, self.lon)
         return RDPoint(rd_y, rd_x)
 
+    @staticmethod
+    def batch_to_rd(points: Sequence["Point"]) -> List["RDPoint"]:
+        """Converts a list of lat/lon points to RD points with a single transformation."""
+        x, y = wgs84_to_rd([point.lat for point in points], [point.lon for point in points])
+        return [RDPoint(*coordinate) for coordinate in zip(x.tolist(), y.tolist())]
+
 
 # pylint: enable=unpacking-non-sequence
 
@@ -97,6 +217,30 @@ class Circle:
             "properties": {"description": "Requested centroid"},
         }
 
+    def to_geojson_polygon_feature(self, segments: int = CIRCLE_POLYGON_SEGMENTS) -> dict:
+        """Returns the circle as a polygon feature, with vertices at radius km from the center along great circles.
+
+        :param segments: number of straight segments of the polygon
+        """
+        lat, lon = math.radians(self.center.lat), math.radians(self.center.lon)
+        angular_radius = self.radius / EARTH_RADIUS
+        ring = []
+        for index in range(segments + 1):
+            bearing = 2 * math.pi * (index % segments) / segments
+            vertex_lat = math.asin(
+                math.sin(lat) * math.cos(angular_radius) + math.cos(lat) * math.sin(angular_radius) * math.cos(bearing)
+            )
+            vertex_lon = lon + math.atan2(
+                math.sin(bearing) * math.sin(angular_radius) * math.cos(lat),
+                math.cos(angular_radius) - math.sin(lat) * math.sin(vertex_lat),
+            )
+            ring.append([math.degrees(vertex_lon), math.degrees(vertex_lat)])
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+            "properties": {"description": "Requested area"},
+        }
+
 
 @dataclass
 class Envelope:
@@ -137,76 +281,128 @@ class Envelope:
             "properties": {"description": "Requested area"},
         }
 
+    def to_geojson_polygon_feature(self) -> dict:
+        """Returns the envelope as a polygon feature, see `Circle.to_geojson_polygon_feature`."""
+        return self.to_geojson_feature
+
+
+_UNDECODED = object()
+
+
+class _DecodedField:
+    """Field of CPTCharacteristics that is decoded from the dispatch document on first access, and then cached in the
+    slot with the same name prefixed by an underscore."""
+
+    def __init__(self, decode):
+        self.decode = decode
+        self.slot = None
+
+    def __set_name__(self, owner, name: str):
+        self.slot = f"_{name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot, _UNDECODED)
+        if value is _UNDECODED:
+            value = self.decode(instance.document)
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
+def _value(key: str, convert=None):
+    """Returns a decoder of the "value" of an optional element, converted with convert."""
+
+    def decode(document: dict):
+        if not document.get(key):
+            return None
+        return convert(document[key]["value"]) if convert is not None else document[key]["value"]
+
+    return decode
+
+
+def _position(document: dict, key: str) -> Tuple[float, ...]:
+    return tuple(float(elem) for elem in document[key]["gml:pos"].split())
+
 
 class CPTCharacteristics:
     """
     Class to save all Characteristics of a CPT object, resulting from a characteristics search on the API
+
+    By default the fields are decoded from the dispatch document on first access, so filtering many characteristics
+    on e.g. their location only decodes the location. Use lazy=False to decode, and validate, all fields up front.
+
+    :param parsed_dispatch_document: the "CPT_C" part of a parsed dispatch document
+    :param lazy: decode the fields on first access instead of all at once
     """
 
-    def __init__(self, parsed_dispatch_document: dict):
-        self.gml_id: str = parsed_dispatch_document["gml:id"]
-        self.bro_id: str = parsed_dispatch_document["brocom:broId"]
-        self.deregistered: bool = _str2bool(parsed_dispatch_document["brocom:deregistered"])
-        self.accountable_party: int = parsed_dispatch_document["brocom:deliveryAccountableParty"]
-        self.quality_regime: str = parsed_dispatch_document["brocom:qualityRegime"]
-        self.object_registration_time: str = parsed_dispatch_document["brocom:objectRegistrationTime"]
-        self.under_review: bool = _str2bool(parsed_dispatch_document["brocom:underReview"])
-        self.standardized_location: Point = Point(
-            *tuple(elem for elem in parsed_dispatch_document["brocom:standardizedLocation"]["gml:pos"].split(" "))
-        )
-        self.delivered_location: RDPoint = RDPoint(
-            *tuple(elem for elem in parsed_dispatch_document["brocom:deliveredLocation"]["gml:pos"].split(" "))
-        )
-        self.local_vertical_reference_point: Optional[str] = (
-            parsed_dispatch_document["localVerticalReferencePoint"]["value"]
-            if parsed_dispatch_document.get("localVerticalReferencePoint")
-            else None
-        )
-        self.vertical_datum: Optional[str] = (
-            parsed_dispatch_document["verticalDatum"]["value"]
-            if parsed_dispatch_document.get("verticalDatum")
-            else None
-        )
-        self.cpt_standard: Optional[str] = (
-            parsed_dispatch_document["cptStandard"]["value"] if parsed_dispatch_document.get("cptStandard") else None
-        )
-        self.offset: Optional[float] = (
-            float(parsed_dispatch_document["offset"]["value"]) if parsed_dispatch_document.get("offset") else None
-        )
-        self.quality_class: Optional[str] = (
-            parsed_dispatch_document["qualityClass"]["value"] if parsed_dispatch_document.get("qualityClass") else None
-        )
-        self.research_report_date: Optional[str] = (
-            parsed_dispatch_document["researchReportDate"].get("brocom:date", "-")
-            if parsed_dispatch_document.get("researchReportDate")
-            else None
-        )
-        self.start_time: Optional[str] = parsed_dispatch_document.get("startTime")
-        self.predrilled_depth: Optional[float] = (
-            float(parsed_dispatch_document["predrilledDepth"]["value"])
-            if parsed_dispatch_document.get("predrilledDepth")
-            else None
-        )
-        self.final_depth: Optional[float] = (
-            float(parsed_dispatch_document["finalDepth"]["value"])
-            if parsed_dispatch_document.get("finalDepth")
-            else None
-        )
-        self.survey_purpose: Optional[str] = (
-            parsed_dispatch_document["surveyPurpose"]["value"]
-            if parsed_dispatch_document.get("surveyPurpose")
-            else None
-        )
-        self.dissipation_test_performed: Optional[bool] = (
-            _str2bool(parsed_dispatch_document["dissipationTestPerformed"])
-            if parsed_dispatch_document.get("dissipationTestPerformed")
-            else None
+    FIELDS = (
+        "gml_id",
+        "bro_id",
+        "deregistered",
+        "accountable_party",
+        "quality_regime",
+        "object_registration_time",
+        "under_review",
+        "standardized_location",
+        "delivered_location",
+        "local_vertical_reference_point",
+        "vertical_datum",
+        "cpt_standard",
+        "offset",
+        "quality_class",
+        "research_report_date",
+        "start_time",
+        "predrilled_depth",
+        "final_depth",
+        "survey_purpose",
+        "dissipation_test_performed",
+        "stop_criterion",
+    )
+    __slots__ = ("document",) + tuple(f"_{name}" for name in FIELDS)
+
+    gml_id: str = _DecodedField(lambda document: document["gml:id"])
+    bro_id: str = _DecodedField(lambda document: document["brocom:broId"])
+    deregistered: bool = _DecodedField(lambda document: _str2bool(document["brocom:deregistered"]))
+    accountable_party: int = _DecodedField(lambda document: document["brocom:deliveryAccountableParty"])
+    quality_regime: str = _DecodedField(lambda document: document["brocom:qualityRegime"])
+    object_registration_time: str = _DecodedField(lambda document: document["brocom:objectRegistrationTime"])
+    under_review: bool = _DecodedField(lambda document: _str2bool(document["brocom:underReview"]))
+    standardized_location: Point = _DecodedField(
+        lambda document: Point(*_position(document, "brocom:standardizedLocation"))
+    )
+    delivered_location: RDPoint = _DecodedField(
+        lambda document: RDPoint(*_position(document, "brocom:deliveredLocation"))
+    )
+    local_vertical_reference_point: Optional[str] = _DecodedField(_value("localVerticalReferencePoint"))
+    vertical_datum: Optional[str] = _DecodedField(_value("verticalDatum"))
+    cpt_standard: Optional[str] = _DecodedField(_value("cptStandard"))
+    offset: Optional[float] = _DecodedField(_value("offset", float))
+    quality_class: Optional[str] = _DecodedField(_value("qualityClass"))
+    research_report_date: Optional[str] = _DecodedField(
+        lambda document: (
+            document["researchReportDate"].get("brocom:date", "-") if document.get("researchReportDate") else None
         )
-        self.stop_criterion: Optional[str] = (
-            parsed_dispatch_document["stopCriterion"]["value"]
-            if parsed_dispatch_document.get("stopCriterion")
-            else None
+    )
+    start_time: Optional[str] = _DecodedField(lambda document: document.get("startTime"))
+    predrilled_depth: Optional[float] = _DecodedField(_value("predrilledDepth", float))
+    final_depth: Optional[float] = _DecodedField(_value("finalDepth", float))
+    survey_purpose: Optional[str] = _DecodedField(_value("surveyPurpose"))
+    dissipation_test_performed: Optional[bool] = _DecodedField(
+        lambda document: (
+            _str2bool(document["dissipationTestPerformed"]) if document.get("dissipationTestPerformed") else None
         )
+    )
+    stop_criterion: Optional[str] = _DecodedField(_value("stopCriterion"))
+
+    def __init__(self, parsed_dispatch_document: dict, lazy: bool = True):
+        self.document = parsed_dispatch_document
+        if not lazy:
+            for name in self.FIELDS:
+                getattr(self, name)
 
     @property
     def to_geojson_feature(self) -> dict:
@@ -234,11 +430,466 @@ class CPTCharacteristics:
         return None
 
 
+def _retry_delay(retry_after: Optional[str], backoff: float) -> float:
+    """Seconds to wait before retrying a request, from the Retry-After header in seconds or as HTTP-date, or the
+    backoff if the response has no (valid) Retry-After header."""
+    retry_after = (retry_after or "").strip()
+    if retry_after.isdigit():
+        return float(retry_after)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return backoff
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _characteristics_search_json(begin_date: str, end_date: str, area: Union[Circle, Envelope]) -> dict:
+    return {
+        "registrationPeriod": {
+            "beginDate": begin_date,
+            "endDate": end_date,
+        },
+        "area": area.bro_json,
+    }
+
+
+def _cpt_documents(dispatch_documents: List[dict]) -> List[dict]:
+    """Returns the CPT characteristics ("CPT_C") of the dispatch documents of a characteristics search."""
+    cpt_documents = []
+    for document in dispatch_documents:
+        # Hard skip, this is likely to happen when it's deregistered. document will have key ["BRO_DO"]["brocom:deregistered"] = "ja"
+        if "CPT_C" not in document.keys():
+            logger.debug("Skipped dispatch document without CPT characteristics: %s", list(document.keys()))
+            continue
+        cpt_documents.append(document["CPT_C"])
+    return cpt_documents
+
+
+def _get_cached_object(cache: Optional["CPTObjectCache"], bro_cpt_id: str) -> Optional[bytes]:
+    """Returns the object from the cache, or None if there is no cache or the object is not in it."""
+    if cache is None:
+        return None
+    content = cache.get(bro_cpt_id)
+    emit(CACHE_HIT if content is not None else CACHE_MISS, cache="objects", bro_id=bro_cpt_id)
+    return content
+
+
+def _get_cached_characteristics(
+    cache: Optional["CharacteristicsCache"], begin_date: str, end_date: str, area: Union[Circle, Envelope]
+) -> Optional[List[dict]]:
+    """Returns the CPT documents from the cache, or None if there is no cache or the search is not covered by it."""
+    if cache is None:
+        return None
+    cpt_documents = cache.get(begin_date, end_date, area.bro_json)
+    emit(CACHE_HIT if cpt_documents is not None else CACHE_MISS, cache="characteristics")
+    return cpt_documents
+
+
+def _parse_characteristics_response(content: bytes) -> Tuple[Optional[str], List[dict]]:
+    with timed(PARSE_CHARACTERISTICS, bytes=len(content), stage="xml") as attributes:
+        rejection_reason, dispatch_documents = parse_characteristics_response(content)
+        attributes["count"] = len(dispatch_documents)
+    return rejection_reason, dispatch_documents
+
+
+def _parse_cpt_object(bro_cpt_id: str, content: bytes) -> dict:
+    with timed(PARSE_OBJECT, bro_id=bro_cpt_id, bytes=len(content)):
+        return IMBROFile(content).parse()
+
+
+class BROClient:
+    """
+    Client to communicate with the BRO REST API. It owns a pooled `requests.Session`, so connections to the BRO are
+    kept alive and reused between requests. Requests that fail with a 429 or 5xx status code are retried with an
+    exponential backoff, honouring the Retry-After header of the response.
+
+    :param pool_size: maximum number of connections that are kept alive, should be >= the amount of worker threads
+    :param max_retries: maximum number of retries of a single request
+    :param backoff_factor: backoff factor in s, the n-th retry waits backoff_factor * 2 ** (n - 1) seconds
+    :param timeout: timeout of a single request in s
+    :param cpt_object_url: url of the CPT object endpoint, the BRO ID is appended to it
+    :param cpt_characteristics_url: url of the CPT characteristics search endpoint
+    :param cache: optional CPTObjectCache, objects in the cache are not requested from the BRO again
+    :param characteristics_cache: optional CharacteristicsCache, serves characteristics searches that are covered by
+        an earlier search with the same registration period
+    :param rate_limiter: optional TokenBucket that every request to the BRO takes a token from
+    :param concurrency_limiter: optional AdaptiveConcurrencyLimiter that bounds the requests in flight and adapts
+        the bound to throttled and slow responses
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        timeout: float = BRO_REQUEST_TIMEOUT,
+        cpt_object_url: str = CPT_OBJECT_URL,
+        cpt_characteristics_url: str = CPT_CHARACTERISTICS_URL,
+        cache: Optional["CPTObjectCache"] = None,
+        characteristics_cache: Optional["CharacteristicsCache"] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.cache = cache
+        self.characteristics_cache = characteristics_cache
+        self.rate_limiter = rate_limiter
+        self.concurrency_limiter = concurrency_limiter
+        self.cpt_object_url = cpt_object_url
+        self.cpt_characteristics_url = cpt_characteristics_url
+
+        # requests is imported on first use, so `import bro` stays fast for code that does not use the BRO API
+        # pylint: disable=import-outside-toplevel
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # Retried by `_request` instead of urllib3, so every attempt passes the rate and concurrency limiters
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        """Closes all connections of the session."""
+        self.session.close()
+
+    def __enter__(self) -> "BROClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _send(self, method: str, url: str, **kwargs) -> "requests.Response":
+        """Sends a single attempt of a request through the session, after the rate and concurrency limiters allow it."""
+        import requests  # pylint: disable=import-outside-toplevel
+
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.acquire()
+        latency, status_code = None, None
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            emit(REQUEST_START, method=method, url=url)
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as error:
+                emit(REQUEST_END, time.monotonic() - start, method=method, url=url, error=repr(error))
+                raise
+            latency, status_code = time.monotonic() - start, response.status_code
+            emit(
+                REQUEST_END,
+                latency,
+                method=method,
+                url=url,
+                status_code=response.status_code,
+                # A streamed body has not been read yet, its size is taken from the header
+                bytes=int(response.headers.get("Content-Length", 0)) if kwargs.get("stream") else len(response.content),
+            )
+            return response
+        finally:
+            if self.concurrency_limiter is not None:
+                self.concurrency_limiter.release(latency, status_code)
+
+    def _request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        """Sends a request and retries it on connection errors and retryable status codes."""
+        import requests  # pylint: disable=import-outside-toplevel
+
+        for retry in range(self.max_retries + 1):
+            try:
+                response = self._send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if retry == self.max_retries:
+                    raise
+                emit(REQUEST_RETRY, method=method, url=url, status_code=None, error=repr(error))
+                time.sleep(self.backoff_factor * 2**retry)
+                continue
+            if response.status_code not in RETRY_STATUS_CODES or retry == self.max_retries:
+                return response
+            emit(REQUEST_RETRY, method=method, url=url, status_code=response.status_code, error=None)
+            response.close()
+            time.sleep(_retry_delay(response.headers.get("Retry-After"), self.backoff_factor * 2**retry))
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def get_cpt_characteristics_and_return_cpt_objects(
+        self,
+        begin_date: str,
+        end_date: str,
+        area: Union[Circle, Envelope],
+        as_dict: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        parse_workers: Optional[int] = None,
+    ) -> List[Union[bytes, dict]]:
+        """See `get_cpt_characteristics_and_return_cpt_objects`."""
+        available_cpts = self.get_cpt_characteristics(begin_date, end_date, area)
+        logger.info("Retrieving %d CPT objects", len(available_cpts))
+        return self.get_cpt_objects(
+            [available_cpt.bro_id for available_cpt in available_cpts],
+            as_dict=as_dict,
+            max_workers=max_workers,
+            parse_workers=parse_workers,
+        )
+
+    def get_cpt_characteristics(self, begin_date: str, end_date: str, area: Union[Circle, Envelope]) -> list:
+        """See `get_cpt_characteristics`."""
+        cpt_documents = _get_cached_characteristics(self.characteristics_cache, begin_date, end_date, area)
+        if cpt_documents is None:
+            cpt_documents = _cpt_documents(self.search_dispatch_documents(begin_date, end_date, area))
+            if self.characteristics_cache is not None:
+                self.characteristics_cache.set(begin_date, end_date, area.bro_json, cpt_documents)
+        # Also when the search only found deregistered objects, so a cached search gives the same result
+        if not cpt_documents:
+            raise ValueError(
+                "No available objects have been found in given date + area range. Retry with different parameters."
+            )
+
+        with timed(PARSE_CHARACTERISTICS, count=len(cpt_documents), stage="characteristics"):
+            return [CPTCharacteristics(document) for document in cpt_documents]
+
+    def search_dispatch_documents(self, begin_date: str, end_date: str, area: Union[Circle, Envelope]) -> List[dict]:
+        """Performs a characteristics search on the BRO API and returns the parsed dispatch documents.
+
+        Next to the CPT characteristics ("CPT_C") the documents may contain deregistered objects ("BRO_DO").
+
+        :param begin_date: str date in format YYYY-mm-dd (.strftime("%Y-%m-%d")) and should be > 2015-01-01
+        :param end_date: str date in format YYYY-mm-dd (.strftime("%Y-%m-%d"))
+        :param area: Union[Circle, Envelope] definition of area in which to look for CPT objects
+        :return: A list of dispatch documents, empty if no documents have been found
+        :raises BRORejectionError: if the BRO rejects the request, e.g. because too many objects are found
+        """
+        response = self._request(
+            "POST",
+            self.cpt_characteristics_url,
+            headers=CHARACTERISTICS_HEADERS,
+            json=_characteristics_search_json(begin_date, end_date, area),
+        )
+
+        # TODO: Check status codes in BRO REST API documentation.
+        if response.status_code == 200:
+            rejection_reason, dispatch_documents = _parse_characteristics_response(response.content)
+            if rejection_reason:
+                raise BRORejectionError(f"{rejection_reason}")
+            return dispatch_documents
+        response.raise_for_status()
+        import requests  # pylint: disable=import-outside-toplevel
+
+        raise requests.HTTPError(f"Unexpected status code {response.status_code}", response=response)
+
+    def get_cpt_object(self, bro_cpt_id: str, as_dict: bool = False) -> Union[bytes, dict]:
+        """See `get_cpt_object`."""
+        content = _get_cached_object(self.cache, bro_cpt_id)
+        if content is None:
+            content = self._request_cpt_object(bro_cpt_id).content
+            if self.cache is not None:
+                self.cache.set(bro_cpt_id, content)
+        if as_dict:
+            return _parse_cpt_object(bro_cpt_id, content)
+        return content
+
+    def _request_cpt_object(self, bro_cpt_id: str, stream: bool = False) -> "requests.Response":
+        response = self._request(
+            "GET",
+            f"{self.cpt_object_url}{bro_cpt_id}?requestReference={REQUEST_REFERENCE}",
+            headers=CPT_OBJECT_HEADERS,
+            stream=stream,
+        )
+        # TODO: Check status codes in BRO REST API documentation.
+        if response.status_code == 200:
+            return response
+        response.close()
+        response.raise_for_status()
+        import requests  # pylint: disable=import-outside-toplevel
+
+        raise requests.HTTPError(f"Unexpected status code {response.status_code} for {bro_cpt_id}", response=response)
+
+    def stream_cpt_object(self, bro_cpt_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yields the raw xml of the CPT object in chunks as it is received, without holding it in memory.
+
+        :param bro_cpt_id: BRO ID of the CPT object
+        :param chunk_size: maximum size in bytes of the yielded chunks
+        :return: An iterator of the chunks of the xml bytes
+        """
+        with self._request_cpt_object(bro_cpt_id, stream=True) as response:
+            yield from response.iter_content(chunk_size)
+
+    def get_cpt_objects(
+        self,
+        bro_cpt_ids: List[str],
+        as_dict: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        parse_workers: Optional[int] = None,
+    ) -> List[Union[bytes, dict]]:
+        """See `get_cpt_objects`."""
+        results: List[Optional[Union[bytes, dict]]] = [None] * len(bro_cpt_ids)
+        errors: Dict[str, Exception] = {}
+        for index, result in self._iter_objects(bro_cpt_ids, as_dict, max_workers, parse_workers):
+            if isinstance(result, Exception):
+                errors[bro_cpt_ids[index]] = result
+            else:
+                results[index] = result
+
+        if errors:
+            raise CPTDownloadError(errors, results)
+        return results
+
+    def iter_cpt_objects(
+        self,
+        characteristics: List[CPTCharacteristics],
+        as_dict: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        parse_workers: Optional[int] = None,
+    ) -> Iterator[Tuple[CPTCharacteristics, Union[bytes, dict]]]:
+        """See `iter_cpt_objects`."""
+        errors: Dict[str, Exception] = {}
+        bro_cpt_ids = [characteristic.bro_id for characteristic in characteristics]
+        for index, result in self._iter_objects(bro_cpt_ids, as_dict, max_workers, parse_workers):
+            if isinstance(result, Exception):
+                errors[bro_cpt_ids[index]] = result
+            else:
+                yield characteristics[index], result
+
+        if errors:
+            raise CPTDownloadError(errors, [])
+
+    def iter_cpt_characteristics_and_cpt_objects(
+        self,
+        begin_date: str,
+        end_date: str,
+        area: Union[Circle, Envelope],
+        as_dict: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        parse_workers: Optional[int] = None,
+    ) -> Iterator[Tuple[CPTCharacteristics, Union[bytes, dict]]]:
+        """See `iter_cpt_characteristics_and_cpt_objects`."""
+        available_cpts = self.get_cpt_characteristics(begin_date, end_date, area)
+        logger.info("Retrieving %d CPT objects", len(available_cpts))
+        yield from self.iter_cpt_objects(
+            available_cpts, as_dict=as_dict, max_workers=max_workers, parse_workers=parse_workers
+        )
+
+    def _iter_objects(
+        self, bro_cpt_ids: List[str], as_dict: bool, max_workers: int, parse_workers: Optional[int]
+    ) -> Iterator[Tuple[int, Union[bytes, dict, Exception]]]:
+        if as_dict and parse_workers is not None:
+            return self._iter_parsed_downloads(bro_cpt_ids, max_workers, parse_workers)
+        return self._iter_downloads(bro_cpt_ids, as_dict, max_workers)
+
+    def _iter_parsed_downloads(
+        self, bro_cpt_ids: List[str], max_workers: int, parse_workers: int
+    ) -> Iterator[Tuple[int, Union[dict, Exception]]]:
+        """Yields (index, parsed object) or (index, exception) like `_iter_downloads`, but parses the objects in a
+        pool of parse_workers processes while the next objects are downloaded. No more downloads are consumed while
+        PARSE_QUEUE_PER_WORKER objects per worker are waiting to be parsed, so the memory use stays bounded when the
+        downloads are faster than the parsing."""
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import FIRST_COMPLETED
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures import wait
+
+        with ProcessPoolExecutor(max_workers=parse_workers) as executor:
+            parsing = {}
+
+            def collect(future) -> Tuple[int, Union[dict, Exception]]:
+                index = parsing.pop(future)
+                try:
+                    return index, future.result()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    return index, error
+
+            for index, result in self._iter_downloads(bro_cpt_ids, False, max_workers):
+                if isinstance(result, Exception):
+                    yield index, result
+                else:
+                    parsing[executor.submit(_parse_imbro_source, result)] = index
+                for future in [future for future in parsing if future.done()]:
+                    yield collect(future)
+                while len(parsing) >= parse_workers * PARSE_QUEUE_PER_WORKER:
+                    done, _ = wait(parsing, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield collect(future)
+            while parsing:
+                done, _ = wait(parsing, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield collect(future)
+
+    def _iter_downloads(
+        self, bro_cpt_ids: List[str], as_dict: bool, max_workers: int
+    ) -> Iterator[Tuple[int, Union[bytes, dict, Exception]]]:
+        """Yields (index, object) as soon as each download finishes, or (index, exception) if it failed.
+
+        At most max_workers downloads are in flight, and the next download is only started once a finished one has
+        been consumed, so the memory use does not grow with the number of objects.
+        """
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import FIRST_COMPLETED
+        from concurrent.futures import ThreadPoolExecutor
+        from concurrent.futures import wait
+
+        if max_workers < 1:
+            raise ValueError(f"max_workers should be at least 1, got {max_workers}")
+
+        if max_workers == 1:
+            for index, bro_cpt_id in enumerate(bro_cpt_ids):
+                try:
+                    result = self.get_cpt_object(bro_cpt_id, as_dict=as_dict)
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    result = error
+                yield index, result
+            return
+
+        indexed_ids = iter(enumerate(bro_cpt_ids))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            try:
+                for index, bro_cpt_id in itertools.islice(indexed_ids, max_workers):
+                    pending[executor.submit(self.get_cpt_object, bro_cpt_id, as_dict=as_dict)] = index
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as error:  # pylint: disable=broad-exception-caught
+                            result = error
+                        yield index, result
+                        for next_index, bro_cpt_id in itertools.islice(indexed_ids, 1):
+                            pending[executor.submit(self.get_cpt_object, bro_cpt_id, as_dict=as_dict)] = next_index
+            finally:
+                for future in pending:
+                    future.cancel()
+
+
+_default_client: Optional[BROClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> BROClient:
+    """Returns the client that is used by the module level functions, it is created on first use."""
+    global _default_client  # pylint: disable=global-statement
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = BROClient()
+        return _default_client
+
+
+def set_default_client(client: BROClient) -> None:
+    """Replaces the client that is used by the module level functions, e.g. to configure the pool size or retries."""
+    global _default_client  # pylint: disable=global-statement
+    with _default_client_lock:
+        _default_client = client
+
+
 def get_cpt_characteristics_and_return_cpt_objects(
     begin_date: str,
     end_date: str,
     area: Union[Circle, Envelope],
     as_dict: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: Optional[int] = None,
 ) -> List[Union[bytes, dict]]:
     """
     Note: It is not allowed to have more than 1000 objects in one request (or more than 500 MB), the request will fail otherwise.
@@ -246,14 +897,15 @@ def get_cpt_characteristics_and_return_cpt_objects(
     :param end_date: date str in format YYYY-mm-dd (.strftime("%Y-%m-%d"))
     :param area: Union[Circle, Envelope] definition of area in which to look for CPT objects
     :param as_dict: bool indicating whether the returned objects should be xml_bytes (as_dict=False) or as dict (bool=True)
-    :return: A list of xml bytes or the parsed xml in dictionary format.
+    :param max_workers: maximum number of objects that are requested from the BRO at the same time
+    :param parse_workers: number of worker processes that parse the objects when as_dict is True, while the next
+        objects are downloaded. None parses in the downloading threads
+    :return: A list of xml bytes or the parsed xml in dictionary format, in the order of the characteristics.
+    :raises CPTDownloadError: if one or more objects could not be retrieved, after all other objects are retrieved
     """
-    available_cpts = get_cpt_characteristics(begin_date, end_date, area)
-    # TODO: Add logging for amount of cpts to be retrieved
-
-    # Retrieve the objects in series
-    bro_cpt_objects = [get_cpt_object(available_cpt.bro_id, as_dict=as_dict) for available_cpt in available_cpts]
-    return bro_cpt_objects
+    return get_default_client().get_cpt_characteristics_and_return_cpt_objects(
+        begin_date, end_date, area, as_dict=as_dict, max_workers=max_workers, parse_workers=parse_workers
+    )
 
 
 def get_cpt_characteristics(begin_date: str, end_date: str, area: Union[Circle, Envelope]) -> list:
@@ -264,63 +916,87 @@ def get_cpt_characteristics(begin_date: str, end_date: str, area: Union[Circle,
     :param area: Union[Circle, Envelope] definition of area in which to look for CPT objects
     :return: A list of objects containing metadata of available CPT objects, WITHOUT actual measurements
     """
+    return get_default_client().get_cpt_characteristics(begin_date, end_date, area)
 
-    headers = {
-        "accept": "application/xml",
-        "Content-Type": "application/json",
-    }
 
-    json = {
-        "registrationPeriod": {
-            "beginDate": begin_date,
-            "endDate": end_date,
-        },
-        "area": area.bro_json,
-    }
+def get_cpt_object(bro_cpt_id: str, as_dict: bool = False) -> Union[bytes, dict]:
+    """Performs GET request on BRO API to retrieve a CPT object.
 
-    response = requests.post(CPT_CHARACTERISTICS_URL, headers=headers, json=json, timeout=BRO_REQUEST_TIMEOUT)
+    :param bro_cpt_id: BRO CPT ID in str format, retrievable from CPTCharacteristics
+    :param as_dict: bool indicating whether the returned xml in bytes format needs to be parsed to dict.
+    :return: XML bytes CPT file directly from BRO REST API or dict of given XML file
+    """
+    return get_default_client().get_cpt_object(bro_cpt_id, as_dict=as_dict)
 
-    available_cpt_objects = []
-    # TODO: Check status codes in BRO REST API documentation.
-    if response.status_code == 200:
-        parsed = xmltodict.parse(response.content, attr_prefix="", cdata_key="value")
-        rejection_reason = parsed["dispatchCharacteristicsResponse"].get("brocom:rejectionReason")
-        if rejection_reason:
-            raise ValueError(f"{rejection_reason}")
 
-        nr_of_documents = parsed["dispatchCharacteristicsResponse"].get("numberOfDocuments")
-        if nr_of_documents is None or nr_of_documents == "0":
-            raise ValueError(
-                "No available objects have been found in given date + area range. Retry with different parameters."
-            )
+def get_cpt_objects(
+    bro_cpt_ids: List[str],
+    as_dict: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: Optional[int] = None,
+) -> List[Union[bytes, dict]]:
+    """Retrieves multiple CPT objects from the BRO, using a bounded pool of worker threads.
 
-        for document in parsed["dispatchCharacteristicsResponse"]["dispatchDocument"]:
-            # TODO: Hard skip, this is likely to happen when it's deregistered. document will have key ["BRO_DO"]["brocom:deregistered"] = "ja"
-            # TODO: Add this information to logger
-            if "CPT_C" not in document.keys():
-                continue
-            available_cpt_objects.append(CPTCharacteristics(document["CPT_C"]))
-        return available_cpt_objects
-    response.raise_for_status()
+    A failing object does not abort the other downloads. All failures are collected per BRO ID and raised together
+    once every object has been tried.
 
+    :param bro_cpt_ids: list of BRO CPT IDs in str format, retrievable from CPTCharacteristics
+    :param as_dict: bool indicating whether the returned xml in bytes format needs to be parsed to dict.
+    :param max_workers: maximum number of objects that are requested from the BRO at the same time, 1 retrieves
+        the objects in series
+    :param parse_workers: number of worker processes that parse the objects when as_dict is True, while the next
+        objects are downloaded. None parses in the downloading threads
+    :return: A list of xml bytes or the parsed xml in dictionary format, in the order of bro_cpt_ids
+    :raises CPTDownloadError: if one or more objects could not be retrieved
+    """
+    return get_default_client().get_cpt_objects(
+        bro_cpt_ids, as_dict=as_dict, max_workers=max_workers, parse_workers=parse_workers
+    )
 
-def get_cpt_object(bro_cpt_id: str, as_dict: bool = False) -> Union[bytes, dict]:
-    """Performs GET request on BRO API to retrieve a CPT object.
 
-    :param bro_cpt_id: BRO CPT ID in str format, retrievable from CPTCharacteristics
+def iter_cpt_objects(
+    characteristics: List[CPTCharacteristics],
+    as_dict: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: Optional[int] = None,
+) -> Iterator[Tuple[CPTCharacteristics, Union[bytes, dict]]]:
+    """Retrieves the CPT objects of the given characteristics and yields each object as soon as it is retrieved.
+
+    Only max_workers objects are retrieved ahead of the consumer, so each object can be processed and released
+    before the next ones arrive. The objects are yielded in order of completion, not in order of characteristics.
+
+    :param characteristics: list of CPTCharacteristics of the objects to retrieve
     :param as_dict: bool indicating whether the returned xml in bytes format needs to be parsed to dict.
-    :return: XML bytes CPT file directly from BRO REST API or dict of given XML file
+    :param max_workers: maximum number of objects that are requested from the BRO at the same time
+    :param parse_workers: number of worker processes that parse the objects when as_dict is True, while the next
+        objects are downloaded. None parses in the downloading threads
+    :return: An iterator of (CPTCharacteristics, xml bytes or the parsed xml in dictionary format) tuples
+    :raises CPTDownloadError: after all other objects are yielded, if one or more objects could not be retrieved
     """
-    headers = {
-        "accept": "application/xml",
-    }
+    return get_default_client().iter_cpt_objects(
+        characteristics, as_dict=as_dict, max_workers=max_workers, parse_workers=parse_workers
+    )
+
+
+def iter_cpt_characteristics_and_cpt_objects(
+    begin_date: str,
+    end_date: str,
+    area: Union[Circle, Envelope],
+    as_dict: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    parse_workers: Optional[int] = None,
+) -> Iterator[Tuple[CPTCharacteristics, Union[bytes, dict]]]:
+    """Streaming variant of `get_cpt_characteristics_and_return_cpt_objects`, see `iter_cpt_objects`.
 
-    response = requests.get(
-        f"{CPT_OBJECT_URL}{bro_cpt_id}?requestReference={REQUEST_REFERENCE}", headers=headers, timeout=BRO_REQUEST_TIMEOUT
+    :param begin_date: date str in format YYYY-mm-dd (.strftime("%Y-%m-%d")) and should be > 2015-01-01
+    :param end_date: date str in format YYYY-mm-dd (.strftime("%Y-%m-%d"))
+    :param area: Union[Circle, Envelope] definition of area in which to look for CPT objects
+    :param as_dict: bool indicating whether the returned objects should be xml_bytes (as_dict=False) or as dict (bool=True)
+    :param max_workers: maximum number of objects that are requested from the BRO at the same time
+    :param parse_workers: number of worker processes that parse the objects when as_dict is True, while the next
+        objects are downloaded. None parses in the downloading threads
+    :return: An iterator of (CPTCharacteristics, xml bytes or the parsed xml in dictionary format) tuples
+    """
+    return get_default_client().iter_cpt_characteristics_and_cpt_objects(
+        begin_date, end_date, area, as_dict=as_dict, max_workers=max_workers, parse_workers=parse_workers
     )
-    # TODO: Check status codes in BRO REST API documentation.
-    if response.status_code == 200:
-        if as_dict:
-            return IMBROFile(response.content).parse()
-        return response.content
-    response.raise_for_status()
@@ -0,0 +1,256 @@
+import json
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+from .api import CPTCharacteristics
+from .objects import CPTMeasurements
+from .table import CharacteristicsTable
+
+CHARACTERISTICS_FILE = "characteristics.parquet"
+MEASUREMENTS_FILE = "measurements.parquet"
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_ROW_GROUP_CPTS = 64
+# Parameters of a CPT measurement table in the order of the IMBRO standard
+CPT_PARAMETERS = (
+    "penetrationLength",
+    "depth",
+    "elapsedTime",
+    "coneResistance",
+    "correctedConeResistance",
+    "netConeResistance",
+    "magneticFieldStrengthX",
+    "magneticFieldStrengthY",
+    "magneticFieldStrengthZ",
+    "magneticFieldStrengthTotal",
+    "electricalConductivity",
+    "inclinationEW",
+    "inclinationNS",
+    "inclinationX",
+    "inclinationY",
+    "inclinationResultant",
+    "magneticInclination",
+    "magneticDeclination",
+    "localFriction",
+    "poreRatio",
+    "temperature",
+    "porePressureU1",
+    "porePressureU2",
+    "porePressureU3",
+    "frictionRatio",
+)
+_INDEX_KEY = b"bro.measurements_index"
+
+
+def _import_pyarrow():
+    try:
+        # pylint: disable=import-outside-toplevel
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("Archives require pyarrow, install it with `pip install bro[archive]`") from error
+    return pyarrow, pyarrow.parquet
+
+
+class CPTArchiveWriter:
+    """
+    Writes CPT characteristics and measurement tables to a columnar archive, a directory with two Parquet files.
+
+    The measurements are stored as one long table with a bro_id column and one float64 column per parameter, in which
+    the parameters that were not measured are null. Every row group holds the measurements of row_group_size CPTs, and
+    an index of BRO ID to row group is stored in the file metadata, so `CPTArchive` can read a single CPT without
+    reading the rest of the file.
+
+    :param path: directory of the archive, created if it does not exist
+    :param compression: Parquet compression codec, e.g. "zstd", "snappy" or "none"
+    :param row_group_size: number of CPTs per row group of the measurements file
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        compression: str = DEFAULT_COMPRESSION,
+        row_group_size: int = DEFAULT_ROW_GROUP_CPTS,
+    ):
+        self._pa, self._pq = _import_pyarrow()
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.row_group_size = row_group_size
+
+        self._schema = self._pa.schema(
+            [("bro_id", self._pa.string())] + [(parameter, self._pa.float64()) for parameter in CPT_PARAMETERS]
+        )
+        self._measurements_writer = self._pq.ParquetWriter(
+            self.path / MEASUREMENTS_FILE, self._schema, compression=compression
+        )
+        self._characteristics_writer = None
+        self._pending: List[Tuple[str, CPTMeasurements]] = []
+        self._index: Dict[str, List[int]] = {}
+        self._bro_ids = set()
+        self._row_groups = 0
+
+    def write_characteristics(self, characteristics: Union[CharacteristicsTable, Iterable[CPTCharacteristics]]):
+        """Appends CPTCharacteristics objects or a CharacteristicsTable to the archive."""
+        if not isinstance(characteristics, CharacteristicsTable):
+            characteristics = CharacteristicsTable.from_characteristics(characteristics)
+        table = self._pa.table({column: characteristics[column] for column in CharacteristicsTable.COLUMNS})
+        if self._characteristics_writer is None:
+            self._characteristics_writer = self._pq.ParquetWriter(
+                self.path / CHARACTERISTICS_FILE, table.schema, compression=self.compression
+            )
+        self._characteristics_writer.write_table(table)
+
+    def write_measurements(self, bro_id: str, measurements: CPTMeasurements) -> None:
+        """Appends the measurement table of a CPT, e.g. the result of `IMBROFile.parse_measurements`."""
+        if bro_id in self._bro_ids:
+            raise ValueError(f"The measurements of {bro_id} are already in the archive")
+        self._bro_ids.add(bro_id)
+        self._pending.append((bro_id, measurements))
+        if len(self._pending) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        bro_ids, columns, offset = [], {parameter: [] for parameter in CPT_PARAMETERS}, 0
+        for bro_id, measurements in self._pending:
+            rows = len(measurements)
+            self._index[bro_id] = [self._row_groups, offset, rows]
+            bro_ids.append(np.full(rows, bro_id, dtype=object))
+            for parameter in CPT_PARAMETERS:
+                columns[parameter].append(
+                    self._pa.array(measurements[parameter], type=self._pa.float64())
+                    if parameter in measurements
+                    else self._pa.nulls(rows, type=self._pa.float64())
+                )
+            offset += rows
+
+        arrays = [self._pa.array(np.concatenate(bro_ids), type=self._pa.string())]
+        arrays += [self._pa.concat_arrays(columns[parameter]) for parameter in CPT_PARAMETERS]
+        self._measurements_writer.write_table(
+            self._pa.Table.from_arrays(arrays, schema=self._schema), row_group_size=max(offset, 1)
+        )
+        self._row_groups += 1
+        self._pending = []
+
+    def close(self) -> None:
+        """Writes the remaining measurements and the index, after which the archive can be read."""
+        self._flush()
+        self._measurements_writer.add_key_value_metadata({_INDEX_KEY: json.dumps(self._index).encode()})
+        self._measurements_writer.close()
+        if self._characteristics_writer is None:
+            self.write_characteristics(CharacteristicsTable.from_characteristics([]))
+        self._characteristics_writer.close()
+
+    def __enter__(self) -> "CPTArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_archive(
+    path: Union[str, Path],
+    characteristics: Union[CharacteristicsTable, Iterable[CPTCharacteristics]] = (),
+    measurements: Union[Dict[str, CPTMeasurements], Iterable[Tuple[str, CPTMeasurements]]] = (),
+    compression: str = DEFAULT_COMPRESSION,
+) -> None:
+    """Writes characteristics and measurement tables to a columnar archive, see `CPTArchiveWriter`.
+
+    :param path: directory of the archive, created if it does not exist
+    :param characteristics: CPTCharacteristics objects or a CharacteristicsTable
+    :param measurements: dict or iterable of (BRO ID, CPTMeasurements) pairs
+    :param compression: Parquet compression codec, e.g. "zstd", "snappy" or "none"
+    """
+    with CPTArchiveWriter(path, compression=compression) as writer:
+        writer.write_characteristics(characteristics)
+        for bro_id, cpt_measurements in measurements.items() if isinstance(measurements, dict) else measurements:
+            writer.write_measurements(bro_id, cpt_measurements)
+
+
+class CPTArchive:
+    """
+    Lazy reader of an archive written by `CPTArchiveWriter`.
+
+    Opening the archive only reads the file metadata. The files are memory-mapped, and only the row groups and columns
+    that are needed for a request are read and decompressed.
+
+    :param path: directory of the archive
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._pa, self._pq = _import_pyarrow()
+        self.path = Path(path)
+        self._measurements_file = self._pq.ParquetFile(self.path / MEASUREMENTS_FILE, memory_map=True)
+        self._index: Dict[str, List[int]] = json.loads(self._measurements_file.metadata.metadata[_INDEX_KEY])
+        self._characteristics: Optional[CharacteristicsTable] = None
+
+    @property
+    def bro_ids(self) -> List[str]:
+        """BRO IDs of the CPTs with measurements, in the order they were written."""
+        return list(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, bro_id: str) -> bool:
+        return bro_id in self._index
+
+    @property
+    def characteristics(self) -> CharacteristicsTable:
+        """The characteristics of the archive, read on first access."""
+        if self._characteristics is None:
+            table = self._pq.read_table(self.path / CHARACTERISTICS_FILE, memory_map=True)
+            empty = CharacteristicsTable.from_characteristics([])
+            self._characteristics = CharacteristicsTable(
+                {
+                    column: np.asarray(
+                        table.column(column).to_pylist(),
+                        dtype=str if empty[column].dtype.kind == "U" else empty[column].dtype,
+                    )
+                    for column in CharacteristicsTable.COLUMNS
+                }
+            )
+        return self._characteristics
+
+    def _to_measurements(self, table, start: int, length: int) -> CPTMeasurements:
+        columns = {}
+        for parameter in table.column_names:
+            column = table.column(parameter).slice(start, length)
+            # Parameters without a single value were not measured, unless the CPT has no rows at all
+            if parameter != "bro_id" and (column.null_count < length or length == 0):
+                columns[parameter] = column.to_numpy()
+        return CPTMeasurements(columns)
+
+    def measurements(self, bro_id: str, parameters: Optional[List[str]] = None) -> CPTMeasurements:
+        """Reads the measurement table of a single CPT.
+
+        :param bro_id: BRO ID of the CPT
+        :param parameters: parameters to read, defaults to all measured parameters
+        :raises KeyError: if the archive has no measurements of the CPT
+        """
+        row_group, start, length = self._index[bro_id]
+        table = self._measurements_file.read_row_group(row_group, columns=list(parameters or CPT_PARAMETERS))
+        return self._to_measurements(table, start, length)
+
+    def iter_measurements(self, parameters: Optional[List[str]] = None) -> Iterator[Tuple[str, CPTMeasurements]]:
+        """Yields (BRO ID, CPTMeasurements) for all CPTs, reading one row group at a time."""
+        per_row_group: Dict[int, List[Tuple[str, int, int]]] = {}
+        for bro_id, (row_group, start, length) in self._index.items():
+            per_row_group.setdefault(row_group, []).append((bro_id, start, length))
+        for row_group, cpts in sorted(per_row_group.items()):
+            table = self._measurements_file.read_row_group(row_group, columns=list(parameters or CPT_PARAMETERS))
+            for bro_id, start, length in cpts:
+                yield bro_id, self._to_measurements(table, start, length)
+
+    def read_measurements(self, parameters: Optional[List[str]] = None):
+        """Reads the long measurement table of all CPTs as a pyarrow Table, e.g. to convert it with `to_pandas()`."""
+        return self._measurements_file.read(columns=["bro_id"] + list(parameters or CPT_PARAMETERS))
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC
+from abc import abstractmethod
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .helper_functions import _circle_bounds
+from .helper_functions import _haversine_distance
+
+DEFAULT_CACHE_MAX_SIZE = 1024**3  # 1 GB
+DEFAULT_CHARACTERISTICS_TTL = 24 * 60 * 60  # 1 day in s
+
+
+class _SQLiteDatabase:
+    """Thread-local connections to the SQLite database at `path`, for caches that are shared between threads."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """SQLite connections can not be shared between threads, so every thread gets its own connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def close(self) -> None:
+        """Closes the connection of the calling thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class CPTObjectCache(_SQLiteDatabase):
+    """
+    Persistent on-disk cache of raw CPT XML, keyed by BRO ID.
+
+    The objects are stored in a SQLite database, which makes the cache safe to share between threads and processes.
+    Every object is stored together with its SHA-256 digest, objects that do not match their digest or can not be
+    decompressed are treated as a cache miss. When the total stored size exceeds max_size, the least recently used
+    objects are evicted.
+
+    :param path: path of the SQLite database file, created if it does not exist
+    :param max_size: maximum total size of the stored (compressed) objects in bytes
+    :param compress: bool indicating whether new objects are stored zlib compressed
+    """
+
+    def __init__(self, path: Union[str, Path], max_size: int = DEFAULT_CACHE_MAX_SIZE, compress: bool = True):
+        super().__init__(path)
+        self.max_size = max_size
+        self.compress = compress
+        with self._connection as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cpt_objects ("
+                "bro_id TEXT PRIMARY KEY, content BLOB NOT NULL, compressed INTEGER NOT NULL, "
+                "sha256 TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS cpt_objects_last_access ON cpt_objects (last_access)")
+
+    def get(self, bro_id: str) -> Optional[bytes]:
+        """Returns the raw XML of the given BRO ID, or None if it is not cached."""
+        with self._connection as connection:
+            row = connection.execute(
+                "SELECT content, compressed, sha256 FROM cpt_objects WHERE bro_id = ?", (bro_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, compressed, sha256 = row
+            if compressed:
+                try:
+                    content = zlib.decompress(content)
+                except zlib.error:
+                    content = None
+            if content is None or hashlib.sha256(content).hexdigest() != sha256:
+                connection.execute("DELETE FROM cpt_objects WHERE bro_id = ?", (bro_id,))
+                return None
+            connection.execute("UPDATE cpt_objects SET last_access = ? WHERE bro_id = ?", (time.time(), bro_id))
+        return bytes(content)
+
+    def set(self, bro_id: str, content: bytes) -> None:
+        """Stores the raw XML of the given BRO ID and evicts the least recently used objects if the cache is full."""
+        stored = zlib.compress(content) if self.compress else content
+        with self._connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cpt_objects (bro_id, content, compressed, sha256, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (bro_id, stored, int(self.compress), hashlib.sha256(content).hexdigest(), len(stored), time.time()),
+            )
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        excess = self._size(connection) - self.max_size
+        if excess <= 0:
+            return
+        evicted_ids = []
+        for bro_id, size in connection.execute("SELECT bro_id, size FROM cpt_objects ORDER BY last_access, rowid"):
+            evicted_ids.append((bro_id,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM cpt_objects WHERE bro_id = ?", evicted_ids)
+
+    @staticmethod
+    def _size(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT COALESCE(SUM(size), 0) FROM cpt_objects").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """Total size of the stored objects in bytes."""
+        return self._size(self._connection)
+
+    def delete(self, bro_id: str) -> None:
+        with self._connection as connection:
+            connection.execute("DELETE FROM cpt_objects WHERE bro_id = ?", (bro_id,))
+
+    def clear(self) -> None:
+        with self._connection as connection:
+            connection.execute("DELETE FROM cpt_objects")
+
+    def __contains__(self, bro_id: str) -> bool:
+        return self._connection.execute("SELECT 1 FROM cpt_objects WHERE bro_id = ?", (bro_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM cpt_objects").fetchone()[0]
+
+
+def _area_key(area_json: dict) -> str:
+    """Normalized representation of the area of a request, equal areas give equal keys."""
+    return json.dumps(area_json, sort_keys=True)
+
+
+def _envelope_bounds(area_json: dict) -> Tuple[float, float, float, float]:
+    """Bounding box of an area as (min_lat, min_lon, max_lat, max_lon)."""
+    if "boundingBox" in area_json:
+        lower, upper = area_json["boundingBox"]["lowerCorner"], area_json["boundingBox"]["upperCorner"]
+        return lower["lat"], lower["lon"], upper["lat"], upper["lon"]
+    circle = area_json["enclosingCircle"]
+    return _circle_bounds(circle["center"]["lat"], circle["center"]["lon"], circle["radius"])
+
+
+def _area_contains(outer: dict, inner: dict) -> bool:
+    """Whether the area inner lies completely inside the area outer, both given as the bro_json of the area."""
+    min_lat, min_lon, max_lat, max_lon = _envelope_bounds(inner)
+    if "boundingBox" in outer:
+        outer_min_lat, outer_min_lon, outer_max_lat, outer_max_lon = _envelope_bounds(outer)
+        return (
+            outer_min_lat <= min_lat
+            and outer_min_lon <= min_lon
+            and max_lat <= outer_max_lat
+            and max_lon <= outer_max_lon
+        )
+
+    center, radius = outer["enclosingCircle"]["center"], outer["enclosingCircle"]["radius"]
+    if "enclosingCircle" in inner:
+        inner_center = inner["enclosingCircle"]["center"]
+        distance = _haversine_distance(center["lat"], center["lon"], inner_center["lat"], inner_center["lon"])
+        return distance + inner["enclosingCircle"]["radius"] <= radius
+    corners = [(min_lat, min_lon), (min_lat, max_lon), (max_lat, min_lon), (max_lat, max_lon)]
+    return all(_haversine_distance(center["lat"], center["lon"], lat, lon) <= radius for lat, lon in corners)
+
+
+def _document_in_area(document: dict, area_json: dict) -> bool:
+    lat, lon = (float(value) for value in document["brocom:standardizedLocation"]["gml:pos"].split())
+    if "boundingBox" in area_json:
+        min_lat, min_lon, max_lat, max_lon = _envelope_bounds(area_json)
+        return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+    center, radius = area_json["enclosingCircle"]["center"], area_json["enclosingCircle"]["radius"]
+    return _haversine_distance(center["lat"], center["lon"], lat, lon) <= radius
+
+
+class CharacteristicsCache(ABC):
+    """
+    Cache of the CPT characteristics documents of characteristics searches, keyed by (begin_date, end_date, area).
+
+    A request for an area that lies inside the area of a cached request with the same registration period is served
+    by filtering the cached documents on their standardized location, instead of requesting the BRO again. Entries
+    expire ttl seconds after they were stored.
+
+    Use `MemoryCharacteristicsCache` or `DiskCharacteristicsCache`.
+
+    :param ttl: time to live of an entry in s, None to never expire
+    """
+
+    def __init__(self, ttl: Optional[float] = DEFAULT_CHARACTERISTICS_TTL):
+        self.ttl = ttl
+
+    def get(self, begin_date: str, end_date: str, area_json: dict) -> Optional[List[dict]]:
+        """Returns the cached documents of the request, or None if the request is not covered by the cache.
+
+        :param begin_date: str date in format YYYY-mm-dd
+        :param end_date: str date in format YYYY-mm-dd
+        :param area_json: bro_json of the requested Circle or Envelope
+        """
+        key = _area_key(area_json)
+        expired_before = time.time() - self.ttl if self.ttl is not None else None
+        area_keys = []
+        for area_key, stored_at in self._entries(begin_date, end_date):
+            if expired_before is not None and stored_at < expired_before:
+                self._delete(begin_date, end_date, area_key)
+            else:
+                area_keys.append(area_key)
+
+        if key in area_keys:
+            return self._documents(begin_date, end_date, key)
+        for area_key in area_keys:
+            if _area_contains(json.loads(area_key), area_json):
+                documents = self._documents(begin_date, end_date, area_key)
+                return [document for document in documents if _document_in_area(document, area_json)]
+        return None
+
+    def set(self, begin_date: str, end_date: str, area_json: dict, documents: List[dict]) -> None:
+        """Stores the CPT characteristics documents ("CPT_C") that were found by the request."""
+        self._store(begin_date, end_date, _area_key(area_json), time.time(), documents)
+
+    @abstractmethod
+    def _entries(self, begin_date: str, end_date: str) -> List[Tuple[str, float]]:
+        """The area keys and storage times of the entries with the given registration period."""
+
+    @abstractmethod
+    def _documents(self, begin_date: str, end_date: str, area_key: str) -> List[dict]:
+        """The documents of the entry."""
+
+    @abstractmethod
+    def _store(self, begin_date: str, end_date: str, area_key: str, stored_at: float, documents: List[dict]) -> None:
+        """Stores the entry, replacing an entry with the same key."""
+
+    @abstractmethod
+    def _delete(self, begin_date: str, end_date: str, area_key: str) -> None:
+        """Removes the entry."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes all entries."""
+
+
+class MemoryCharacteristicsCache(CharacteristicsCache):
+    """In-memory CharacteristicsCache, shared between the threads of a single process."""
+
+    def __init__(self, ttl: Optional[float] = DEFAULT_CHARACTERISTICS_TTL):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, str], Dict[str, Tuple[float, List[dict]]]] = {}
+
+    def _entries(self, begin_date: str, end_date: str) -> List[Tuple[str, float]]:
+        with self._lock:
+            entries = self._cache.get((begin_date, end_date), {})
+            return [(area_key, stored_at) for area_key, (stored_at, _) in entries.items()]
+
+    def _documents(self, begin_date: str, end_date: str, area_key: str) -> List[dict]:
+        with self._lock:
+            return list(self._cache[(begin_date, end_date)][area_key][1])
+
+    def _store(self, begin_date: str, end_date: str, area_key: str, stored_at: float, documents: List[dict]) -> None:
+        with self._lock:
+            self._cache.setdefault((begin_date, end_date), {})[area_key] = (stored_at, list(documents))
+
+    def _delete(self, begin_date: str, end_date: str, area_key: str) -> None:
+        with self._lock:
+            self._cache.get((begin_date, end_date), {}).pop(area_key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._cache.values())
+
+
+class DiskCharacteristicsCache(_SQLiteDatabase, CharacteristicsCache):
+    """
+    On-disk CharacteristicsCache, stored zlib compressed in a SQLite database that can be shared between threads and
+    processes.
+
+    :param path: path of the SQLite database file, created if it does not exist
+    :param ttl: time to live of an entry in s, None to never expire
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: Optional[float] = DEFAULT_CHARACTERISTICS_TTL):
+        _SQLiteDatabase.__init__(self, path)
+        CharacteristicsCache.__init__(self, ttl)
+        with self._connection as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS characteristics ("
+                "begin_date TEXT NOT NULL, end_date TEXT NOT NULL, area TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "documents BLOB NOT NULL, PRIMARY KEY (begin_date, end_date, area))"
+            )
+
+    def _entries(self, begin_date: str, end_date: str) -> List[Tuple[str, float]]:
+        return self._connection.execute(
+            "SELECT area, stored_at FROM characteristics WHERE begin_date = ? AND end_date = ?", (begin_date, end_date)
+        ).fetchall()
+
+    def _documents(self, begin_date: str, end_date: str, area_key: str) -> List[dict]:
+        row = self._connection.execute(
+            "SELECT documents FROM characteristics WHERE begin_date = ? AND end_date = ? AND area = ?",
+            (begin_date, end_date, area_key),
+        ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row is not None else []
+
+    def _store(self, begin_date: str, end_date: str, area_key: str, stored_at: float, documents: List[dict]) -> None:
+        with self._connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO characteristics (begin_date, end_date, area, stored_at, documents) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (begin_date, end_date, area_key, stored_at, zlib.compress(json.dumps(documents).encode())),
+            )
+
+    def _delete(self, begin_date: str, end_date: str, area_key: str) -> None:
+        with self._connection as connection:
+            connection.execute(
+                "DELETE FROM characteristics WHERE begin_date = ? AND end_date = ? AND area = ?",
+                (begin_date, end_date, area_key),
+            )
+
+    def clear(self) -> None:
+        with self._connection as connection:
+            connection.execute("DELETE FROM characteristics")
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM characteristics").fetchone()[0]
@@ -0,0 +1,261 @@
+from dataclasses import dataclass
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+import numpy as np
+
+from .api import CPTCharacteristics
+from .objects import CPTMeasurements
+from .objects import IMBROFile
+from .objects import decode_measurements
+
+ATMOSPHERIC_PRESSURE = 0.1  # MPa
+NAP = "NAP"
+
+
+def friction_ratio(cone_resistance: np.ndarray, local_friction: np.ndarray) -> np.ndarray:
+    """Friction ratio Rf = fs / qc * 100 in %, NaN where qc <= 0.
+
+    :param cone_resistance: cone resistance in MPa
+    :param local_friction: local friction in MPa
+    """
+    cone_resistance = np.asarray(cone_resistance, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(cone_resistance > 0, np.asarray(local_friction) / cone_resistance * 100, np.nan)
+
+
+def corrected_cone_resistance(
+    cone_resistance: np.ndarray, pore_pressure_u2: np.ndarray, cone_surface_quotient: Union[float, np.ndarray]
+) -> np.ndarray:
+    """Cone resistance corrected for the pore pressure behind the cone, qt = qc + u2 * (1 - a) in MPa, equal to qc
+    where u2 or a is NaN.
+
+    :param cone_resistance: cone resistance qc in MPa
+    :param pore_pressure_u2: pore pressure u2 in MPa
+    :param cone_surface_quotient: net area ratio a of the cone
+    """
+    cone_resistance = np.asarray(cone_resistance, dtype=np.float64)
+    correction = np.asarray(pore_pressure_u2) * (1 - np.asarray(cone_surface_quotient, dtype=np.float64))
+    return np.where(np.isnan(correction), cone_resistance, cone_resistance + correction)
+
+
+def soil_behaviour_type_index(qt: np.ndarray, local_friction: np.ndarray) -> np.ndarray:
+    """Non-normalized soil behaviour type index of Robertson (2010),
+    Isbt = sqrt((3.47 - log10(qt / pa)) ** 2 + (log10(Rf) + 1.22) ** 2), NaN where qt or fs <= 0.
+
+    :param qt: corrected cone resistance in MPa, see `corrected_cone_resistance`
+    :param local_friction: local friction fs in MPa
+    """
+    qt = np.asarray(qt, dtype=np.float64)
+    ratio = friction_ratio(qt, local_friction)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        index = np.sqrt((3.47 - np.log10(qt / ATMOSPHERIC_PRESSURE)) ** 2 + (np.log10(ratio) + 1.22) ** 2)
+    return np.where((qt > 0) & (ratio > 0), index, np.nan)
+
+
+def nap_level(depth: np.ndarray, offset: Union[float, np.ndarray]) -> np.ndarray:
+    """Level relative to NAP in m, offset - depth, with offset the level of the local vertical reference point.
+
+    :param depth: depth below the local vertical reference point in m
+    :param offset: level of the local vertical reference point relative to NAP in m
+    """
+    return np.asarray(offset, dtype=np.float64) - np.asarray(depth)
+
+
+def _optional_float(value) -> Optional[float]:
+    return float(value) if value not in (None, "") else None
+
+
+@dataclass
+class CPTData:
+    """
+    Measurements of a single CPT with the metadata that is needed to derive the standard quantities from them.
+
+    :param bro_id: BRO ID of the CPT
+    :param measurements: the measurement table of the CPT
+    :param offset: level of the local vertical reference point relative to the vertical datum in m
+    :param vertical_datum: vertical datum of the offset, e.g. "NAP"
+    :param local_vertical_reference_point: reference point of the depth, e.g. "maaiveld" (ground level)
+    :param cone_surface_quotient: net area ratio a of the cone, used to correct qc for the pore pressure
+    """
+
+    bro_id: Optional[str]
+    measurements: CPTMeasurements
+    offset: Optional[float] = None
+    vertical_datum: Optional[str] = None
+    local_vertical_reference_point: Optional[str] = None
+    cone_surface_quotient: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, parsed_cpt_object: dict, characteristics: Optional[CPTCharacteristics] = None) -> "CPTData":
+        """Instantiates the CPTData from a CPT object parsed to dict, e.g. `get_cpt_object(bro_id, as_dict=True)`.
+
+        :param parsed_cpt_object: the result of `IMBROFile.parse`
+        :param characteristics: optional CPTCharacteristics of the CPT, its offset, vertical datum and local vertical
+            reference point take precedence over the ones in the object if they are known
+        """
+        cpt = parsed_cpt_object["dispatchDocument"]["CPT_O"]
+        survey = cpt["conePenetrometerSurvey"]
+        vertical_position = cpt.get("deliveredVerticalPosition") or {}
+        result = survey["conePenetrationTest"]["cptResult"]
+        measurements = decode_measurements(survey["parameters"], result["values"], result.get("encoding"))
+        data = cls(
+            bro_id=cpt.get("broId"),
+            measurements=measurements,
+            offset=_optional_float(vertical_position.get("offset")),
+            vertical_datum=vertical_position.get("verticalDatum"),
+            local_vertical_reference_point=vertical_position.get("localVerticalReferencePoint"),
+            cone_surface_quotient=_optional_float((survey.get("conePenetrometer") or {}).get("coneSurfaceQuotient")),
+        )
+        if characteristics is not None:
+            for name in ("offset", "vertical_datum", "local_vertical_reference_point"):
+                if getattr(characteristics, name) is not None:
+                    setattr(data, name, getattr(characteristics, name))
+        return data
+
+    @classmethod
+    def from_imbro(
+        cls, imbro_file: Union[IMBROFile, bytes], characteristics: Optional[CPTCharacteristics] = None
+    ) -> "CPTData":
+        """Instantiates the CPTData from IMBRO xml, see `from_dict`."""
+        imbro_file = imbro_file if isinstance(imbro_file, IMBROFile) else IMBROFile(imbro_file)
+        return cls.from_dict(imbro_file.parse(), characteristics)
+
+    def _column(self, parameter: str) -> np.ndarray:
+        if parameter in self.measurements:
+            return self.measurements[parameter]
+        return np.full(len(self.measurements), np.nan)
+
+    @property
+    def depth(self) -> np.ndarray:
+        """Depth below the local vertical reference point in m, the penetration length if the depth was not measured."""
+        if "depth" in self.measurements and not np.isnan(self.measurements.depth).all():
+            return self.measurements.depth
+        return self.measurements.penetration_length
+
+    @property
+    def cone_resistance(self) -> np.ndarray:
+        return self._column("coneResistance")
+
+    @property
+    def local_friction(self) -> np.ndarray:
+        return self._column("localFriction")
+
+    @property
+    def pore_pressure_u2(self) -> np.ndarray:
+        """Pore pressure u2 in MPa, zero if it was not measured."""
+        if "porePressureU2" in self.measurements:
+            return self.measurements.pore_pressure_u2
+        return np.zeros(len(self.measurements))
+
+    @property
+    def friction_ratio(self) -> np.ndarray:
+        """Friction ratio fs / qc * 100 in %, computed from the measurements."""
+        return friction_ratio(self.cone_resistance, self.local_friction)
+
+    @property
+    def corrected_cone_resistance(self) -> np.ndarray:
+        """Corrected cone resistance qt in MPa, equal to qc if u2 or the cone surface quotient is unknown."""
+        cone_surface_quotient = self.cone_surface_quotient if self.cone_surface_quotient is not None else np.nan
+        return corrected_cone_resistance(self.cone_resistance, self.pore_pressure_u2, cone_surface_quotient)
+
+    @property
+    def nap_level(self) -> np.ndarray:
+        """Level relative to NAP in m, NaN if the offset is unknown or not relative to NAP."""
+        if self.offset is None or self.vertical_datum != NAP:
+            return np.full(len(self.measurements), np.nan)
+        return nap_level(self.depth, self.offset)
+
+    @property
+    def soil_behaviour_type_index(self) -> np.ndarray:
+        """Non-normalized soil behaviour type index Isbt, see `soil_behaviour_type_index`."""
+        return soil_behaviour_type_index(self.corrected_cone_resistance, self.local_friction)
+
+
+class CPTDataBatch:
+    """
+    Many CPTs concatenated into flat arrays, so the derived quantities of all CPTs are computed in one vectorized
+    operation. The rows of CPT i are rows[boundaries[i]:boundaries[i + 1]], `split` divides a flat array per CPT.
+
+        batch = CPTDataBatch.from_dicts(get_cpt_objects(bro_ids, as_dict=True))
+        for bro_id, ic in zip(batch.bro_ids, batch.split(batch.soil_behaviour_type_index)):
+            ...
+
+    :param cpts: CPTData of the CPTs
+    """
+
+    def __init__(self, cpts: Sequence[CPTData]):
+        self.cpts = list(cpts)
+        lengths = np.array([len(cpt.measurements) for cpt in self.cpts], dtype=np.int64)
+        self.boundaries = np.concatenate([[0], np.cumsum(lengths)])
+        self.bro_ids: List[Optional[str]] = [cpt.bro_id for cpt in self.cpts]
+        self.depth = self._concatenate(cpt.depth for cpt in self.cpts)
+        self.cone_resistance = self._concatenate(cpt.cone_resistance for cpt in self.cpts)
+        self.local_friction = self._concatenate(cpt.local_friction for cpt in self.cpts)
+        self.pore_pressure_u2 = self._concatenate(cpt.pore_pressure_u2 for cpt in self.cpts)
+        # Per CPT values repeated for every row, NaN if unknown
+        self.offset = np.repeat(
+            [cpt.offset if cpt.offset is not None and cpt.vertical_datum == NAP else np.nan for cpt in self.cpts],
+            lengths,
+        )
+        self.cone_surface_quotient = np.repeat(
+            [cpt.cone_surface_quotient if cpt.cone_surface_quotient is not None else np.nan for cpt in self.cpts],
+            lengths,
+        )
+
+    @classmethod
+    def from_dicts(
+        cls,
+        parsed_cpt_objects: Iterable[dict],
+        characteristics: Optional[Sequence[Optional[CPTCharacteristics]]] = None,
+    ) -> "CPTDataBatch":
+        """Instantiates the batch from CPT objects parsed to dict, see `CPTData.from_dict`.
+
+        :param parsed_cpt_objects: the results of `IMBROFile.parse`, e.g. `get_cpt_objects(bro_ids, as_dict=True)`
+        :param characteristics: optional CPTCharacteristics per object, in the same order
+        """
+        parsed_cpt_objects = list(parsed_cpt_objects)
+        characteristics = characteristics if characteristics is not None else [None] * len(parsed_cpt_objects)
+        return cls(
+            [
+                CPTData.from_dict(parsed_cpt_object, characteristic)
+                for parsed_cpt_object, characteristic in zip(parsed_cpt_objects, characteristics)
+            ]
+        )
+
+    @staticmethod
+    def _concatenate(columns: Iterable[np.ndarray]) -> np.ndarray:
+        columns = list(columns)
+        return np.concatenate(columns) if columns else np.empty(0)
+
+    def __len__(self) -> int:
+        return len(self.cpts)
+
+    @property
+    def cpt_index(self) -> np.ndarray:
+        """Index of the CPT of every row."""
+        return np.repeat(np.arange(len(self.cpts)), np.diff(self.boundaries))
+
+    def split(self, values: np.ndarray) -> List[np.ndarray]:
+        """Divides a flat array with a value per row into one array per CPT."""
+        return np.split(values, self.boundaries[1:-1])
+
+    @property
+    def friction_ratio(self) -> np.ndarray:
+        return friction_ratio(self.cone_resistance, self.local_friction)
+
+    @property
+    def corrected_cone_resistance(self) -> np.ndarray:
+        """Corrected cone resistance qt in MPa, equal to qc where u2 or the cone surface quotient is unknown."""
+        return corrected_cone_resistance(self.cone_resistance, self.pore_pressure_u2, self.cone_surface_quotient)
+
+    @property
+    def nap_level(self) -> np.ndarray:
+        return nap_level(self.depth, self.offset)
+
+    @property
+    def soil_behaviour_type_index(self) -> np.ndarray:
+        return soil_behaviour_type_index(self.corrected_cone_resistance, self.local_friction)
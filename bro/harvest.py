@@ -0,0 +1,248 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import date
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+from .api import DEFAULT_CHUNK_SIZE
+from .api import DEFAULT_MAX_WORKERS
+from .api import BROClient
+from .api import Circle
+from .api import Envelope
+from .api import Point
+from .api import get_default_client
+from .sync import BRO_CPT_BEGIN_DATE
+from .tiling import get_cpt_characteristics_tiled
+
+MANIFEST_FILE = "manifest.jsonl"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ManifestEntry:
+    """A CPT object that has been written completely to the harvest directory."""
+
+    bro_id: str
+    file: str
+    size: int
+    sha256: str
+
+
+@dataclass
+class HarvestResult:
+    """BRO IDs that were downloaded, skipped because they were already complete, or failed during a harvest."""
+
+    downloaded: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: Dict[str, Exception] = field(default_factory=dict)
+
+
+def _file_sha256(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Harvester:
+    """
+    Downloads CPT objects into a directory, one <bro_id>.xml file per object, and can resume after a failure.
+
+    Every object is streamed to a temporary .part file in chunks, so the memory use does not depend on the size or the
+    number of the objects, and renamed when it is complete. The completed objects are appended to a manifest
+    (manifest.jsonl) with their size and sha256 checksum. A next harvest into the same directory skips the objects in
+    the manifest whose file is still complete, so rerunning after a failure only downloads what is missing.
+
+        harvester = Harvester("cpts")
+        result = harvester.harvest_area("2015-01-01", "2023-03-03", area)
+
+    :param directory: directory the objects and the manifest are written to, created if it does not exist
+    :param client: BROClient used for the requests, defaults to the default client
+    :param max_workers: number of objects that are downloaded at the same time
+    :param chunk_size: size in bytes of the chunks that are written to disk
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        client: Optional[BROClient] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if max_workers < 1:
+            raise ValueError(f"max_workers should be at least 1, got {max_workers}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.client = client
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.manifest: Dict[str, ManifestEntry] = self._load_manifest()
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_FILE
+
+    def _load_manifest(self) -> Dict[str, ManifestEntry]:
+        manifest = {}
+        if not self.manifest_path.exists():
+            return manifest
+        with open(self.manifest_path, "r") as f:
+            for line in f:
+                try:
+                    entry = ManifestEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    # The last line is incomplete if the process was killed while writing it
+                    continue
+                manifest[entry.bro_id] = entry
+        return manifest
+
+    def _record(self, entry: ManifestEntry) -> None:
+        with self._lock:
+            with open(self.manifest_path, "a") as f:
+                f.write(json.dumps(asdict(entry)) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.manifest[entry.bro_id] = entry
+
+    def is_complete(self, bro_id: str, verify: bool = False) -> bool:
+        """Returns whether the object is in the manifest and its file has the recorded size (and checksum, if verify).
+
+        :param bro_id: BRO ID of the CPT object
+        :param verify: bool indicating whether the sha256 checksum of the file is recomputed
+        """
+        entry = self.manifest.get(bro_id)
+        if entry is None:
+            return False
+        path = self.directory / entry.file
+        if not path.is_file() or path.stat().st_size != entry.size:
+            return False
+        return not verify or _file_sha256(path, self.chunk_size) == entry.sha256
+
+    def download(self, bro_id: str) -> ManifestEntry:
+        """Streams the object to <bro_id>.xml and records it in the manifest."""
+        client = self.client or get_default_client()
+        path = self.directory / f"{bro_id}.xml"
+        part_path = path.with_name(f"{path.name}.part")
+        digest, size = hashlib.sha256(), 0
+        try:
+            with open(part_path, "wb") as f:
+                for chunk in client.stream_cpt_object(bro_id, self.chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            os.replace(part_path, path)
+        finally:
+            if part_path.exists():
+                part_path.unlink()
+        entry = ManifestEntry(bro_id=bro_id, file=path.name, size=size, sha256=digest.hexdigest())
+        self._record(entry)
+        return entry
+
+    def harvest(self, bro_ids: Iterable[str], verify: bool = False) -> HarvestResult:
+        """Downloads the objects that are not complete in the directory yet.
+
+        At most max_workers downloads are in flight, the next one is started when one finishes. A failed download does
+        not stop the harvest, it is reported in the result and retried by the next harvest.
+
+        :param bro_ids: BRO IDs of the CPT objects
+        :param verify: bool indicating whether the checksums of the completed files are recomputed before skipping them
+        :return: HarvestResult with the downloaded, skipped and failed BRO IDs
+        """
+        result = HarvestResult()
+        missing = []
+        for bro_id in dict.fromkeys(bro_ids):
+            (result.skipped if self.is_complete(bro_id, verify) else missing).append(bro_id)
+        logger.info("Harvesting %d CPT objects, %d are already complete", len(missing), len(result.skipped))
+
+        remaining = iter(missing)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {
+                executor.submit(self.download, bro_id): bro_id
+                for bro_id in itertools.islice(remaining, self.max_workers)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    bro_id = pending.pop(future)
+                    try:
+                        future.result()
+                        result.downloaded.append(bro_id)
+                    except Exception as error:  # pylint: disable=broad-exception-caught
+                        logger.warning("Failed to harvest %s: %r", bro_id, error)
+                        result.failed[bro_id] = error
+                    for next_bro_id in itertools.islice(remaining, 1):
+                        pending[executor.submit(self.download, next_bro_id)] = next_bro_id
+        return result
+
+    def harvest_area(
+        self, begin_date: str, end_date: str, area: Union[Circle, Envelope], verify: bool = False
+    ) -> HarvestResult:
+        """Harvests all CPT objects in the area, see `get_cpt_characteristics_tiled` and `harvest`."""
+        characteristics = get_cpt_characteristics_tiled(begin_date, end_date, area, client=self.client)
+        return self.harvest([characteristic.bro_id for characteristic in characteristics], verify=verify)
+
+
+def _parse_arguments(arguments: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="bro-harvest",
+        description="Downloads CPT objects from the BRO into a directory. Rerun the same command to resume.",
+    )
+    parser.add_argument("directory", type=Path, help="directory the objects and the manifest are written to")
+    area = parser.add_mutually_exclusive_group(required=True)
+    area.add_argument("--bbox", nargs=4, type=float, metavar=("LAT1", "LON1", "LAT2", "LON2"), help="envelope")
+    area.add_argument("--circle", nargs=3, type=float, metavar=("LAT", "LON", "RADIUS_KM"), help="circle")
+    area.add_argument("--ids", type=Path, help="file with one BRO ID per line, instead of an area")
+    parser.add_argument("--begin-date", default=BRO_CPT_BEGIN_DATE, help="YYYY-mm-dd, default %(default)s")
+    parser.add_argument("--end-date", default=date.today().strftime("%Y-%m-%d"), help="YYYY-mm-dd, default today")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="parallel downloads")
+    parser.add_argument("--verify", action="store_true", help="recompute the checksums of the completed files")
+    return parser.parse_args(arguments)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Entry point of the bro-harvest console script, returns 1 if any object failed."""
+    arguments = _parse_arguments(arguments)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with BROClient(pool_size=max(arguments.max_workers, 10)) as client:
+        harvester = Harvester(arguments.directory, client=client, max_workers=arguments.max_workers)
+        if arguments.ids is not None:
+            bro_ids = [line.strip() for line in arguments.ids.read_text().splitlines() if line.strip()]
+            result = harvester.harvest(bro_ids, verify=arguments.verify)
+        else:
+            if arguments.bbox is not None:
+                lat1, lon1, lat2, lon2 = arguments.bbox
+                area = Envelope(Point(min(lat1, lat2), min(lon1, lon2)), Point(max(lat1, lat2), max(lon1, lon2)))
+            else:
+                lat, lon, radius = arguments.circle
+                area = Circle(Point(lat, lon), radius)
+            result = harvester.harvest_area(arguments.begin_date, arguments.end_date, area, verify=arguments.verify)
+    logger.info(
+        "Downloaded %d, skipped %d, failed %d CPT objects",
+        len(result.downloaded),
+        len(result.skipped),
+        len(result.failed),
+    )
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
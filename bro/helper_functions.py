@@ -1,5 +1,16 @@
+import itertools
 import json
+import math
+from pathlib import Path
+from typing import Iterable
 from typing import List
+from typing import Optional
+from typing import TextIO
+from typing import Tuple
+from typing import Union
+
+EARTH_RADIUS = 6371.0  # km
+GEOJSON_SEQUENCE_FORMATS = (None, "ndjson", "rfc7464")
 
 
 def _str2bool(s) -> bool:
@@ -11,6 +22,65 @@ def _str2bool(s) -> bool:
     return str(s).lower() in ("ja", "yes", "true", "t", "1")
 
 
+def _haversine_distance(lat_a: float, lon_a: float, lat_b: float, lon_b: float) -> float:
+    """Great circle distance between two lat/lon points in km."""
+    lat_a, lat_b = math.radians(lat_a), math.radians(lat_b)
+    d_lat = lat_b - lat_a
+    d_lon = math.radians(lon_b - lon_a)
+    a = math.sin(d_lat / 2) ** 2 + math.cos(lat_a) * math.cos(lat_b) * math.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def _circle_bounds(lat: float, lon: float, radius: float) -> Tuple[float, float, float, float]:
+    """Bounding box of a circle with radius in km, as (min_lat, min_lon, max_lat, max_lon)."""
+    d_lat = math.degrees(radius / EARTH_RADIUS)
+    d_lon = d_lat / math.cos(math.radians(lat))
+    return lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon
+
+
+def write_geojson(
+    characteristics: Iterable,
+    destination: Union[str, Path, TextIO],
+    area=None,
+    sequence: Optional[str] = None,
+) -> int:
+    """Writes the characteristics as GeoJSON features to a file, one feature at a time.
+
+    By default a single FeatureCollection is written. With sequence="ndjson" every feature is written on its own
+    line (newline delimited JSON), with sequence="rfc7464" every feature is written as a GeoJSON Text Sequence
+    record (RFC 8142), prefixed by a record separator.
+
+    :param characteristics: iterable of CPTCharacteristics objects, e.g. a generator
+    :param destination: path of the file or a text file-like object
+    :param area: optional Envelope or Circle that was requested, written as the last feature like in
+        `construct_geojson_from_characteristics`. A Circle is written as a polygon
+    :param sequence: None, "ndjson" or "rfc7464"
+    :return: number of written features
+    """
+    if sequence not in GEOJSON_SEQUENCE_FORMATS:
+        raise ValueError(f"sequence should be one of {GEOJSON_SEQUENCE_FORMATS}, got {sequence!r}")
+    if isinstance(destination, (str, Path)):
+        with Path(destination).open("w") as geojson_file:
+            return write_geojson(characteristics, geojson_file, area=area, sequence=sequence)
+
+    features = (characteristic.to_geojson_feature for characteristic in characteristics)
+    if area is not None:
+        features = itertools.chain(features, [area.to_geojson_polygon_feature()])
+
+    count = 0
+    if sequence is None:
+        destination.write('{"type": "FeatureCollection", "features": [')
+        for count, feature in enumerate(features, start=1):
+            destination.write(json.dumps(feature) if count == 1 else f", {json.dumps(feature)}")
+        destination.write("]}")
+        return count
+
+    prefix = "\x1e" if sequence == "rfc7464" else ""
+    for count, feature in enumerate(features, start=1):
+        destination.write(f"{prefix}{json.dumps(feature)}\n")
+    return count
+
+
 def construct_geojson_from_characteristics(
     characteristics: List,
     area=None,
@@ -18,12 +88,12 @@ def construct_geojson_from_characteristics(
     """Generates a str containing a valid geojson structure from separate objects.
 
     :param characteristics: List of CPTCharacteristics objects
-    :param area: Envelope. Circle are not yet supported
+    :param area: optional Envelope or Circle that was requested, a Circle is added as a polygon
     :return: str in geojson format that contains of requested area + available objects in that area
     """
-    # TODO: Add Circle area as polygon, Circle with shapely?
-
+    # The full str is built in memory, use `write_geojson` to write large amounts of objects to a file
     features = [characteristic.to_geojson_feature for characteristic in characteristics]
-    features += [area.to_geojson_feature]
+    if area is not None:
+        features.append(area.to_geojson_polygon_feature())
 
     return json.dumps({"type": "FeatureCollection", "features": features})
@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+logger = logging.getLogger("bro")
+
+# Names of the emitted events
+REQUEST_START = "request_start"
+REQUEST_END = "request_end"
+REQUEST_RETRY = "request_retry"
+PARSE_OBJECT = "parse_object"
+PARSE_CHARACTERISTICS = "parse_characteristics"
+CACHE_HIT = "cache_hit"
+CACHE_MISS = "cache_miss"
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class Event:
+    """
+    Something that happened while communicating with the BRO.
+
+    :param name: name of the event, e.g. REQUEST_END
+    :param timestamp: time of the event in s since the epoch
+    :param duration: duration in s of the measured stage, None for events without a duration
+    :param attributes: details of the event, e.g. the url, status_code, bytes or bro_id
+    """
+
+    name: str
+    timestamp: float
+    duration: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+Listener = Callable[[Event], None]
+_listeners: List[Listener] = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener: Listener) -> None:
+    """Registers a callable that is called with every emitted Event, from the thread that emits it."""
+    global _listeners  # pylint: disable=global-statement
+    with _listeners_lock:
+        _listeners = _listeners + [listener]
+
+
+def remove_listener(listener: Listener) -> None:
+    global _listeners  # pylint: disable=global-statement
+    with _listeners_lock:
+        _listeners = [registered for registered in _listeners if registered != listener]
+
+
+def emit(name: str, duration: Optional[float] = None, **attributes) -> None:
+    """Sends an Event to all listeners, does nothing when no listeners are registered."""
+    listeners = _listeners
+    if not listeners:
+        return
+    event = Event(name, time.time(), duration, attributes)
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Instrumentation listener %r failed on %s", listener, name)
+
+
+@contextmanager
+def timed(name: str, **attributes) -> Iterator[Dict[str, Any]]:
+    """Emits an Event with the duration of the block, attributes can be added to the yielded dict inside the block."""
+    if not _listeners:
+        yield attributes
+        return
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        emit(name, time.perf_counter() - start, **attributes)
+
+
+class MetricsAggregator:
+    """
+    Listener that aggregates the events per name into counts, duration percentiles, bytes and throughput.
+
+    Use it as a context manager to register it for the duration of a block:
+
+        with MetricsAggregator() as metrics:
+            get_cpt_objects(bro_ids, as_dict=True)
+        print(metrics.report())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._start = time.monotonic()
+            self._counts: Dict[str, int] = {}
+            self._durations: Dict[str, List[float]] = {}
+            self._bytes: Dict[str, int] = {}
+
+    def __call__(self, event: Event) -> None:
+        with self._lock:
+            self._counts[event.name] = self._counts.get(event.name, 0) + 1
+            if event.duration is not None:
+                self._durations.setdefault(event.name, []).append(event.duration)
+            if event.attributes.get("bytes") is not None:
+                self._bytes[event.name] = self._bytes.get(event.name, 0) + event.attributes["bytes"]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns per event name the count and rate per s, and if available the duration statistics in s
+        (mean, p50, p90, p99, max) and the bytes and bytes per s."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        with self._lock:
+            elapsed = max(time.monotonic() - self._start, 1e-9)
+            summary = {}
+            for name, count in self._counts.items():
+                metrics = {"count": count, "per_s": count / elapsed}
+                if name in self._durations:
+                    durations = np.asarray(self._durations[name])
+                    metrics["mean"] = float(durations.mean())
+                    for percentile, value in zip(PERCENTILES, np.percentile(durations, PERCENTILES)):
+                        metrics[f"p{percentile}"] = float(value)
+                    metrics["max"] = float(durations.max())
+                if name in self._bytes:
+                    metrics["bytes"] = self._bytes[name]
+                    metrics["bytes_per_s"] = self._bytes[name] / elapsed
+                summary[name] = metrics
+        return summary
+
+    def report(self) -> str:
+        """Returns the summary as a table, with the durations in ms."""
+        lines = [f"{'event':<22} {'count':>7} {'per s':>9} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'MB/s':>8}"]
+        for name, metrics in sorted(self.summary().items()):
+            durations = [
+                f"{metrics[key] * 1000:>9.2f}" if key in metrics else f"{'-':>9}"
+                for key in ("mean", "p50", "p90", "p99")
+            ]
+            throughput = f"{metrics['bytes_per_s'] / 1024 ** 2:>8.2f}" if "bytes_per_s" in metrics else f"{'-':>8}"
+            lines.append(
+                f"{name:<22} {metrics['count']:>7} {metrics['per_s']:>9.1f} {' '.join(durations)} {throughput}"
+            )
+        return "\n".join(lines)
+
+    def __enter__(self) -> "MetricsAggregator":
+        add_listener(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_listener(self)
+
+
+class LoggingListener:
+    """
+    Listener that logs every event as a structured record. The message reads "<name> key=value ...", and the
+    event is attached to the record as the attributes bro_event, bro_duration and bro_attributes, for log handlers
+    that write JSON.
+
+    :param log: logger to write to, defaults to the "bro" logger
+    :param level: log level of the records
+    """
+
+    def __init__(self, log: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = log or logger
+        self.level = level
+
+    def __call__(self, event: Event) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        details = [f"{key}={value}" for key, value in event.attributes.items()]
+        if event.duration is not None:
+            details.append(f"duration={event.duration:.6f}")
+        self.logger.log(
+            self.level,
+            "%s %s",
+            event.name,
+            " ".join(details),
+            extra={"bro_event": event.name, "bro_duration": event.duration, "bro_attributes": event.attributes},
+        )
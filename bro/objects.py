@@ -1,7 +1,247 @@
+import io
+import itertools
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import BinaryIO
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import Union
 
-from lxml import etree
+if TYPE_CHECKING:
+    import numpy as np
+
+NO_DATA_VALUE = -999999
+DEFAULT_PARSE_CHUNKSIZE = 8
+# Number of chunks per worker process that are submitted ahead of the chunk that is yielded
+PARSE_CHUNKS_PER_WORKER = 2
+
+
+class _QualifiedNames(dict):
+    """Maps lxml "{namespace}name" names to "prefix:name", as they are written in the xml document."""
+
+    def __init__(self):
+        super().__init__()
+        self.prefixes: Dict[str, str] = {}
+
+    def __missing__(self, name: str) -> str:
+        qualified_name = name
+        if name.startswith("{"):
+            namespace, local_name = name[1:].split("}", 1)
+            prefix = self.prefixes.get(namespace)
+            qualified_name = f"{prefix}:{local_name}" if prefix else local_name
+        self[name] = qualified_name
+        return qualified_name
+
+
+def _element_to_dict(element, names: _QualifiedNames) -> Union[None, str, dict]:
+    """Converts an element to the structure of xmltodict.parse(attr_prefix="", cdata_key="value")."""
+    text = element.text
+    if text is not None:
+        text = text.strip() or None
+    attributes = element.attrib
+    if not attributes and not len(element):
+        return text
+
+    converted = {names[key]: value for key, value in attributes.items()}
+    for child in element:
+        if not isinstance(child.tag, str):  # comments and processing instructions
+            continue
+        tag = names[child.tag]
+        value = _element_to_dict(child, names)
+        if tag not in converted:
+            converted[tag] = value
+        elif isinstance(converted[tag], list):
+            converted[tag].append(value)
+        else:
+            converted[tag] = [converted[tag], value]
+    if text:
+        converted["value"] = text
+    return converted
+
+
+def parse_characteristics_response(content: bytes) -> Tuple[Optional[str], List[dict]]:
+    """Parses a dispatchCharacteristicsResponse of the BRO.
+
+    The response is read incrementally with lxml, every dispatch document is converted to the structure that
+    xmltodict.parse(attr_prefix="", cdata_key="value") would give and released afterwards.
+
+    :param content: the xml bytes of the response
+    :return: the rejection reason (None if the request was accepted) and the list of dispatch documents
+    """
+    from lxml import etree  # pylint: disable=import-outside-toplevel
+
+    rejection_reason = None
+    documents = []
+    names = _QualifiedNames()
+    for event, element in etree.iterparse(
+        io.BytesIO(content),
+        events=("start-ns", "end"),
+        tag=("{*}dispatchDocument", "{*}rejectionReason"),
+        huge_tree=True,
+    ):
+        if event == "start-ns":
+            prefix, namespace = element
+            names.prefixes.setdefault(namespace, prefix)
+            continue
+        if names[element.tag].endswith("rejectionReason"):
+            rejection_reason = element.text
+            continue
+        documents.append(
+            {names[child.tag]: _element_to_dict(child, names) for child in element if isinstance(child.tag, str)}
+        )
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+    return rejection_reason, documents
+
+
+@dataclass
+class CPTMeasurements:
+    """
+    Measurement table of a CPT, with one contiguous float64 array per measured parameter.
+
+    The arrays are keyed by the parameter names of the IMBRO xml (e.g. "coneResistance"), missing values are NaN.
+    """
+
+    columns: Dict[str, "np.ndarray"]
+
+    def __getitem__(self, parameter: str) -> "np.ndarray":
+        return self.columns[parameter]
+
+    def __contains__(self, parameter: str) -> bool:
+        return parameter in self.columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def parameters(self) -> List[str]:
+        return list(self.columns)
+
+    @property
+    def penetration_length(self) -> "np.ndarray":
+        """Penetration length in m."""
+        return self.columns["penetrationLength"]
+
+    @property
+    def depth(self) -> "np.ndarray":
+        """Depth in m, corrected for the inclination of the cone."""
+        return self.columns["depth"]
+
+    @property
+    def cone_resistance(self) -> "np.ndarray":
+        """Cone resistance qc in MPa."""
+        return self.columns["coneResistance"]
+
+    @property
+    def local_friction(self) -> "np.ndarray":
+        """Local friction fs in MPa."""
+        return self.columns["localFriction"]
+
+    @property
+    def friction_ratio(self) -> "np.ndarray":
+        """Friction ratio Rf in %, as delivered to the BRO."""
+        return self.columns["frictionRatio"]
+
+    @property
+    def pore_pressure_u2(self) -> "np.ndarray":
+        """Pore pressure u2 in MPa, measured directly behind the cone."""
+        return self.columns["porePressureU2"]
+
+
+@dataclass
+class CPTProjection:
+    """
+    Selected part of a CPT object, see `IMBROFile.parse_projection`.
+
+    :param bro_id: BRO ID of the CPT
+    :param sections: the selected sections of the CPT object, converted like `IMBROFile.parse` converts them
+    :param measurements: the selected parameters of the selected rows of the measurement table
+    """
+
+    bro_id: Optional[str]
+    sections: Dict[str, Any]
+    measurements: CPTMeasurements
+
+
+def _token_bounds(data: "np.ndarray", separators: Tuple[str, str, str]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Returns the start and end offsets of every token of the encoded values, row after row."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    token_separator, block_separator, _ = separators
+    ends = np.flatnonzero((data == ord(token_separator)) | (data == ord(block_separator)))
+    if data.size and (not ends.size or ends[-1] != data.size - 1):
+        ends = np.append(ends, data.size)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    return starts, ends
+
+
+def _decode_column(
+    data: "np.ndarray", starts: "np.ndarray", ends: "np.ndarray", separators: Tuple[str, str, str]
+) -> "np.ndarray":
+    """Decodes the tokens between starts and ends (one per row) without decoding the other columns."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    _, _, decimal_separator = separators
+    lengths = ends - starts + 1
+    offsets = np.cumsum(lengths) - lengths
+    # The offsets of the characters of every token followed by one separator character
+    positions = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+    characters = np.append(data, np.uint8(ord(" ")))[positions]
+    separator = np.zeros(len(characters), dtype=bool)
+    separator[np.cumsum(lengths) - 1] = True
+    characters[separator] = ord(" ")
+    if decimal_separator != ".":
+        characters[characters == ord(decimal_separator)] = ord(".")
+    return np.fromstring(characters.tobytes().decode(), sep=" ")  # pylint: disable=no-member
+
+
+def decode_measurements(
+    parameters: List[tuple], values: str, encoding: Optional[Dict[str, Any]] = None
+) -> CPTMeasurements:
+    """Decodes the measurement table of a CPT into one float64 array per measured parameter, e.g. of a parsed object:
+
+        result = survey["conePenetrationTest"]["cptResult"]
+        measurements = decode_measurements(survey["parameters"], result["values"], result["encoding"])
+
+    :param parameters: the (name, is_measured) parameters of the CPT, in the order of the columns
+    :param values: the values text of the cptResult
+    :param encoding: the tokenSeparator, blockSeparator and decimalSeparator of the TextEncoding, or the parsed encoding
+        of the cptResult. The dict of `IMBROFile.parse` does not keep xml attributes, so separators that are not given
+        default to the ones the BRO uses
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    encoding = encoding or {}
+    if "TextEncoding" in encoding:
+        encoding = encoding["TextEncoding"] or {}
+    token_separator = encoding.get("tokenSeparator", ",")
+    block_separator = encoding.get("blockSeparator", ";")
+    decimal_separator = encoding.get("decimalSeparator", ".")
+    values = values or ""
+    if decimal_separator != ".":
+        values = values.replace(decimal_separator, ".")
+    values = values.replace(block_separator, token_separator)
+
+    table = np.fromstring(values, sep=token_separator)  # pylint: disable=no-member
+    if table.size % len(parameters):
+        raise ValueError(f"The values can not be decoded into a table of {len(parameters)} columns")
+    table = table.reshape(-1, len(parameters))
+    table[table == NO_DATA_VALUE] = np.nan
+    return CPTMeasurements(
+        {
+            name: np.ascontiguousarray(table[:, index])
+            for index, (name, is_measured) in enumerate(parameters)
+            if is_measured
+        }
+    )
 
 
 class IMBROFile:
@@ -26,8 +266,202 @@ class IMBROFile:
         xml_dict = self._parse_xml_file(self.file_content)
         return xml_dict
 
+    @classmethod
+    def parse_streaming(cls, source: Union[bytes, str, Path, BinaryIO]) -> dict:
+        """Parses an IMBRO xml file incrementally and returns the same dictionary object as `parse`.
+
+        The xml is read with lxml's iterparse and every element is released as soon as it is converted, so the full
+        xml tree is never held in memory.
+
+        :param source: the xml bytes, a path to the xml file or a binary file-like object
+        """
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        elif isinstance(source, Path):
+            source = str(source)
+
+        # One frame per open element with its converted children, None as long as it has no children
+        frames: List[Union[None, dict, list]] = []
+        tags: List[str] = []
+        for event, element in etree.iterparse(source, events=("start", "end"), huge_tree=True):
+            if event == "start":
+                frames.append(None)
+                tags.append(element.tag.split("}")[-1])
+                continue
+
+            frame, tag = frames.pop(), tags.pop()
+            if not frames:
+                return element.text if frame is None else frame
+
+            if tags[-1] == "parameters":
+                if frames[-1] is None:
+                    frames[-1] = []
+                frames[-1].append((tag, element.text in {"ja", 1}))
+            else:
+                if frames[-1] is None:
+                    frames[-1] = {}
+                if tag == "parameters":
+                    frames[-1][tag] = frame if frame is not None else []
+                else:
+                    frames[-1][tag] = element.text if frame is None else frame
+
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        raise ValueError("The source does not contain an xml document")
+
+    def parse_measurements(self) -> CPTMeasurements:
+        """Decodes the measurement table of the CPT into one float64 array per measured parameter."""
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
+        root = etree.fromstring(self.file_content, parser=etree.XMLParser(huge_tree=True))
+        return decode_measurements(*self._measurement_table(root))
+
+    def parse_projection(
+        self,
+        parameters: Optional[Sequence[str]] = None,
+        depth_range: Optional[Tuple[float, float]] = None,
+        penetration_length_range: Optional[Tuple[float, float]] = None,
+        sections: Sequence[str] = (),
+    ) -> CPTProjection:
+        """Parses only the selected parameters, rows and sections of the CPT, e.g. qc and fs between two depths:
+
+            projection = IMBROFile(content).parse_projection(["coneResistance", "localFriction"], depth_range=(5, 10))
+
+        Only the depth or penetration length column is decoded for all rows, and only the selected columns of the rows
+        in the window. Sections that are not selected are not converted.
+
+        :param parameters: IMBRO names of the parameters, e.g. "coneResistance", defaults to all measured parameters.
+            Parameters that were not measured are left out of the result
+        :param depth_range: optional (top, bottom) depth in m of the rows, inclusive
+        :param penetration_length_range: optional (top, bottom) penetration length in m of the rows, inclusive
+        :param sections: names of the sections of the CPT object to convert, e.g. "conePenetrometerSurvey"
+        :return: CPTProjection with the BRO ID, the sections and the measurements
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
+        if depth_range is not None and penetration_length_range is not None:
+            raise ValueError("Select rows by either depth_range or penetration_length_range, not both")
+        root = etree.fromstring(self.file_content, parser=etree.XMLParser(huge_tree=True))
+        cpt = root.find(".//{*}CPT_O")
+        if cpt is None:
+            cpt = root
+        bro_id = cpt.find("{*}broId")
+        selected_sections = {}
+        for element in cpt:
+            if isinstance(element.tag, str) and etree.QName(element).localname in sections:
+                selected_sections[etree.QName(element).localname] = self._parse_xml_to_dict_recursively(element)
+
+        table_parameters, values, encoding = self._measurement_table(root)
+        names = [name for name, _ in table_parameters]
+        measured = [name for name, is_measured in table_parameters if is_measured]
+        unknown = set(parameters or ()) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        selected = [name for name in measured if parameters is None or name in parameters]
+
+        window_parameter, window = (
+            ("depth", depth_range) if depth_range is not None else ("penetrationLength", penetration_length_range)
+        )
+        if window is not None and window_parameter not in measured:
+            raise ValueError(f"The CPT has no {window_parameter} to select the rows by")
+        table = self._decode_rows(
+            values,
+            encoding,
+            [names.index(name) for name in selected],
+            len(names),
+            window,
+            names.index(window_parameter) if window is not None else None,
+        )
+        table[table == NO_DATA_VALUE] = np.nan
+        return CPTProjection(
+            bro_id=bro_id.text if bro_id is not None else None,
+            sections=selected_sections,
+            measurements=CPTMeasurements(
+                {name: np.ascontiguousarray(table[:, index]) for index, name in enumerate(selected)}
+            ),
+        )
+
+    @staticmethod
+    def _measurement_table(root) -> Tuple[List[tuple], str, Dict[str, str]]:
+        """Returns the (name, is_measured) parameters, the values text and the text encoding of the cptResult."""
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
+        parameters = root.find(".//{*}parameters")
+        values = root.find(".//{*}cptResult/{*}values")
+        if parameters is None or values is None:
+            raise ValueError("The file does not contain a cone penetration test result")
+        encoding = root.find(".//{*}cptResult/{*}encoding/{*}TextEncoding")
+        return (
+            [(etree.QName(parameter).localname, parameter.text == "ja") for parameter in parameters],
+            values.text or "",
+            dict(encoding.attrib) if encoding is not None else {},
+        )
+
+    @staticmethod
+    def _decode_rows(
+        values: str,
+        encoding: Dict[str, str],
+        columns: List[int],
+        column_count: int,
+        window: Optional[Tuple[float, float]] = None,
+        window_column: Optional[int] = None,
+    ) -> "np.ndarray":
+        """Decodes the given columns of the rows in the window (or of all rows) into a (rows, columns) table.
+
+        Only the window column is decoded for all rows, the other columns are decoded from the first to the last row
+        in the window. The window column does not have to increase, every row is checked against the window.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        separators = (
+            encoding.get("tokenSeparator", ","),
+            encoding.get("blockSeparator", ";"),
+            encoding.get("decimalSeparator", "."),
+        )
+        token_separator, block_separator, decimal_separator = separators
+        values = values.strip()
+        in_window = None
+        if window is not None and values:
+            data = np.frombuffer(values.encode(), dtype=np.uint8)
+            starts, ends = _token_bounds(data, separators)
+            if len(starts) % column_count:
+                raise ValueError(f"The values can not be decoded into a table of {column_count} columns")
+            key = _decode_column(
+                data, starts[window_column::column_count], ends[window_column::column_count], separators
+            )
+            key[key == NO_DATA_VALUE] = np.nan
+            in_window = (key >= window[0]) & (key <= window[1])
+            rows = np.flatnonzero(in_window)
+            if not rows.size:
+                return np.empty((0, len(columns)))
+            in_window = in_window[rows[0] : rows[-1] + 1]
+            values = data[starts[rows[0] * column_count] : ends[(rows[-1] + 1) * column_count - 1]].tobytes().decode()
+        if decimal_separator != ".":
+            values = values.replace(decimal_separator, ".")
+        values = values.replace(block_separator, "\n").strip()
+        if not values or not columns:
+            table = np.empty((values.count("\n") + 1 if values else 0, len(columns)))
+        else:
+            table = np.loadtxt(
+                io.StringIO(values),
+                delimiter=token_separator,
+                usecols=columns,
+                ndmin=2,
+                comments=None,
+                dtype=np.float64,
+            )
+        return table[in_window] if in_window is not None else table
+
     def _parse_xml_file(self, file_content: bytes) -> dict:
-        return self._parse_xml_to_dict_recursively(etree.fromstring(file_content))
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
+        return self._parse_xml_to_dict_recursively(
+            etree.fromstring(file_content, parser=etree.XMLParser(huge_tree=True))
+        )
 
     @classmethod
     def _parse_xml_to_dict_recursively(cls, node) -> dict:
@@ -45,3 +479,67 @@ class IMBROFile:
             else:
                 grand_children[tag] = cls._parse_xml_to_dict_recursively(child)
         return grand_children
+
+
+def _parse_imbro_source(source: Union[bytes, str, Path]) -> dict:
+    """Parses the xml bytes or the xml file at the given path, module level so it can be sent to worker processes."""
+    imbro_file = IMBROFile(source) if isinstance(source, (bytes, bytearray)) else IMBROFile.from_file(source)
+    return imbro_file.parse()
+
+
+def _parse_imbro_sources(sources: List[Union[bytes, str, Path]]) -> List[dict]:
+    return [_parse_imbro_source(source) for source in sources]
+
+
+def iter_parse_imbro_files(
+    sources: Iterable[Union[bytes, str, Path]],
+    max_workers: Optional[int] = None,
+    chunksize: int = DEFAULT_PARSE_CHUNKSIZE,
+) -> Iterator[dict]:
+    """Parses IMBRO xml files in a pool of worker processes and yields the dictionary objects in order of sources.
+
+    The sources are sent to the workers in chunks of chunksize files, to limit the communication overhead per file.
+    At most two chunks per worker are taken from sources ahead of the file that is yielded, so a generator of sources
+    is consumed incrementally. Passing file paths instead of bytes avoids sending the xml content to the workers.
+
+    :param sources: xml bytes or paths to xml files
+    :param max_workers: number of worker processes, defaults to the number of CPUs. 1 parses in the calling process
+    :param chunksize: number of files that is sent to a worker at once
+    :return: An iterator of the parsed xml in dictionary format
+    """
+    if max_workers == 1:
+        yield from map(_parse_imbro_source, sources)
+        return
+    # pylint: disable=import-outside-toplevel
+    import os
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    sources = iter(sources)
+    chunks = iter(lambda: list(itertools.islice(sources, chunksize)), [])
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(
+            executor.submit(_parse_imbro_sources, chunk)
+            for chunk in itertools.islice(chunks, (max_workers or os.cpu_count() or 1) * PARSE_CHUNKS_PER_WORKER)
+        )
+        try:
+            while pending:
+                results = pending.popleft().result()
+                for chunk in itertools.islice(chunks, 1):
+                    pending.append(executor.submit(_parse_imbro_sources, chunk))
+                yield from results
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def parse_imbro_files(
+    sources: Iterable[Union[bytes, str, Path]],
+    max_workers: Optional[int] = None,
+    chunksize: int = DEFAULT_PARSE_CHUNKSIZE,
+) -> List[dict]:
+    """Parses IMBRO xml files in a pool of worker processes, see `iter_parse_imbro_files`.
+
+    :return: A list of the parsed xml in dictionary format, in the order of sources
+    """
+    return list(iter_parse_imbro_files(sources, max_workers=max_workers, chunksize=chunksize))
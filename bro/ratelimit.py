@@ -0,0 +1,241 @@
+import os
+import struct
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Deque
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+DEFAULT_RATE = 10.0  # requests per s
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_LATENCY_TOLERANCE = 2.0
+THROTTLE_STATUS_CODES = (429, 503)
+_STATE = struct.Struct("dd")  # tokens, time of the last update
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+def _lock_file(file_descriptor: int) -> None:
+    if os.name == "nt":
+        import msvcrt  # pylint: disable=import-outside-toplevel,import-error
+
+        os.lseek(file_descriptor, 0, os.SEEK_SET)
+        msvcrt.locking(file_descriptor, msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+
+
+def _unlock_file(file_descriptor: int) -> None:
+    if os.name == "nt":
+        import msvcrt  # pylint: disable=import-outside-toplevel,import-error
+
+        os.lseek(file_descriptor, 0, os.SEEK_SET)
+        msvcrt.locking(file_descriptor, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        fcntl.flock(file_descriptor, fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, shared between the threads and asyncio tasks that make requests.
+
+    The bucket holds at most burst tokens and is refilled with rate tokens per second. Every request takes a token,
+    and waits until the token is available when the bucket is empty. When a path is given the state of the bucket is
+    stored in that file and guarded with a file lock, so the rate is shared between all processes that use the file.
+
+    :param rate: sustained number of requests per s
+    :param burst: maximum number of requests that can be made at once after an idle period
+    :param path: optional path of the state file that is shared between processes
+    """
+
+    def __init__(
+        self, rate: float = DEFAULT_RATE, burst: Optional[int] = None, path: Optional[Union[str, Path]] = None
+    ):
+        if rate <= 0:
+            raise ValueError(f"rate should be positive, got {rate}")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.touch(exist_ok=True)
+
+    def _take(self, tokens: float, updated: float) -> Tuple[float, float, float]:
+        """Takes a token from the given state, returns the new state and the time to wait for the token in s."""
+        now = time.time()
+        tokens = min(float(self.burst), tokens + max(0.0, now - updated) * self.rate) - 1
+        # A negative amount of tokens reserves future tokens, the request waits until they are refilled
+        return tokens, now, max(0.0, -tokens / self.rate)
+
+    def reserve(self) -> float:
+        """Takes a token and returns the time in s the caller has to wait before it may make its request."""
+        with self._lock:
+            if self.path is None:
+                self._tokens, self._updated, delay = self._take(self._tokens, self._updated)
+                return delay
+
+            file_descriptor = os.open(self.path, os.O_RDWR)
+            try:
+                _lock_file(file_descriptor)
+                try:
+                    os.lseek(file_descriptor, 0, os.SEEK_SET)
+                    content = os.read(file_descriptor, _STATE.size)
+                    state = _STATE.unpack(content) if len(content) == _STATE.size else (float(self.burst), time.time())
+                    tokens, updated, delay = self._take(*state)
+                    os.lseek(file_descriptor, 0, os.SEEK_SET)
+                    os.write(file_descriptor, _STATE.pack(tokens, updated))
+                finally:
+                    _unlock_file(file_descriptor)
+            finally:
+                os.close(file_descriptor)
+            return delay
+
+    def acquire(self) -> None:
+        """Blocks the calling thread until a request may be made."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Waits without blocking the event loop until a request may be made."""
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        if self.path is None:
+            delay = self.reserve()
+        else:
+            # The state file is locked with a blocking flock, which may wait for other processes
+            delay = await asyncio.get_running_loop().run_in_executor(None, self.reserve)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of requests in flight, and adapts the limit to the observed responses (AIMD).
+
+    Every successful request increases the limit by 1 / limit, so the limit grows by about 1 per round of requests.
+    When a request is throttled (429 or 503), or takes longer than latency_tolerance times the lowest observed
+    latency, the limit is multiplied by decrease_factor. The limit is decreased at most once per lowest observed
+    latency, so a burst of throttled responses of the same round only counts once.
+
+    It can be shared between threads (`acquire`) and asyncio tasks (`acquire_async`), every acquire has to be followed
+    by a `release` with the outcome of the request.
+
+    :param initial_limit: number of requests in flight at the start
+    :param min_limit: lower bound of the limit
+    :param max_limit: upper bound of the limit, the number of worker threads should be at least this large
+    :param latency_tolerance: factor of the lowest observed latency above which a request counts as congested
+    :param decrease_factor: factor by which the limit is multiplied on congestion
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = DEFAULT_INITIAL_CONCURRENCY,
+        min_limit: int = 1,
+        max_limit: int = DEFAULT_MAX_CONCURRENCY,
+        latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+        decrease_factor: float = 0.5,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("The limits should satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._min_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._async_waiters: Deque[Tuple["asyncio.AbstractEventLoop", "asyncio.Future"]] = deque()
+
+    @property
+    def limit(self) -> int:
+        """The current maximum number of requests in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """Blocks the calling thread until a request may be made."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < self.limit and not self._async_waiters)
+            self._in_flight += 1
+
+    async def acquire_async(self) -> None:
+        """Waits without blocking the event loop until a request may be made."""
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        with self._condition:
+            if self._in_flight < self.limit and not self._async_waiters:
+                self._in_flight += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._async_waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._condition:
+                if (loop, waiter) in self._async_waiters:
+                    self._async_waiters.remove((loop, waiter))
+                elif waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just before the cancellation, give it back
+                    self._in_flight -= 1
+                    self._wake()
+            raise
+
+    def release(self, latency: Optional[float] = None, status_code: Optional[int] = None) -> None:
+        """Releases a request slot and adapts the limit to the outcome of the request.
+
+        :param latency: duration of the request in s, None if it failed without response
+        :param status_code: status code of the response, None if it failed without response
+        """
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if latency is not None and status_code not in THROTTLE_STATUS_CODES:
+                self._min_latency = latency if self._min_latency is None else min(self._min_latency, latency)
+            congested = status_code in THROTTLE_STATUS_CODES or (
+                latency is not None and latency > self.latency_tolerance * self._min_latency
+            )
+            if congested:
+                if now - self._last_decrease >= (self._min_latency or 0.0):
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif latency is not None:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            self._wake()
+
+    def _wake(self) -> None:
+        """Hands the free slots to the waiting tasks first, and notifies the waiting threads."""
+        while self._async_waiters and self._in_flight < self.limit:
+            loop, waiter = self._async_waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            loop.call_soon_threadsafe(self._resolve, waiter)
+        self._condition.notify_all()
+
+    def _resolve(self, waiter: "asyncio.Future") -> None:
+        if waiter.cancelled():
+            with self._condition:
+                self._in_flight -= 1
+                self._wake()
+        else:
+            waiter.set_result(None)
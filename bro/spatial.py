@@ -0,0 +1,209 @@
+import math
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+from .api import CPTCharacteristics
+from .api import wgs84_to_rd
+from .table import CharacteristicsTable
+
+POINTS_PER_CELL = 4
+
+
+class CPTSpatialIndex:
+    """
+    In-memory spatial index over the locations of CPTs, in RD coordinates (EPSG:28992) in m.
+
+    The points are bucketed in a uniform grid of square cells, which makes nearest neighbour, radius, envelope and
+    polyline queries local lookups instead of a loop over all CPTs. Queries return indices into `bro_ids`, `x` and `y`.
+
+    :param bro_ids: array-like of BRO IDs
+    :param x: array-like of x coordinates in m (RD New / EPSG:28992)
+    :param y: array-like of y coordinates in m (RD New / EPSG:28992)
+    :param cell_size: size of the grid cells in m, by default chosen for about 4 points per cell
+    """
+
+    def __init__(
+        self, bro_ids: Sequence[str], x: Sequence[float], y: Sequence[float], cell_size: Optional[float] = None
+    ):
+        self.bro_ids = np.asarray(bro_ids, dtype=str)
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        if not len(self.bro_ids) == len(self.x) == len(self.y):
+            raise ValueError("bro_ids, x and y should have the same length")
+        self.cell_size = float(cell_size) if cell_size else self._default_cell_size()
+        self._origin = (float(self.x.min()), float(self.y.min())) if len(self) else (0.0, 0.0)
+
+        # Sort the points by cell, so every cell is a contiguous range of the sorted order
+        cell_x, cell_y = self._cell(self.x, self.y)
+        self._order = np.lexsort((cell_y, cell_x))
+        keys = np.stack((cell_x[self._order], cell_y[self._order]), axis=1)
+        unique_keys, starts, counts = np.unique(keys, axis=0, return_index=True, return_counts=True)
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {
+            (int(key[0]), int(key[1])): (int(start), int(start + count))
+            for key, start, count in zip(unique_keys, starts, counts)
+        }
+        # Occupied cell range as (x_min, x_max, y_min, y_max)
+        self._bounds = (0, 0, 0, 0)
+        if len(self):
+            (x_min, y_min), (x_max, y_max) = unique_keys.min(axis=0), unique_keys.max(axis=0)
+            self._bounds = (int(x_min), int(x_max), int(y_min), int(y_max))
+
+    @classmethod
+    def from_characteristics(
+        cls,
+        characteristics: Union[Iterable[CPTCharacteristics], CharacteristicsTable],
+        cell_size: Optional[float] = None,
+    ) -> "CPTSpatialIndex":
+        """Builds the index from CPTCharacteristics objects or a CharacteristicsTable.
+
+        The standardized (WGS84) locations are converted to RD coordinates, as these are available for every CPT.
+        """
+        table = (
+            characteristics
+            if isinstance(characteristics, CharacteristicsTable)
+            else CharacteristicsTable.from_characteristics(characteristics)
+        )
+        x, y = wgs84_to_rd(table["lat"], table["lon"])
+        return cls(table["bro_id"], x, y, cell_size=cell_size)
+
+    def __len__(self) -> int:
+        return len(self.bro_ids)
+
+    def _default_cell_size(self) -> float:
+        if len(self.x) < 2:
+            return 1.0
+        area = (self.x.max() - self.x.min()) * (self.y.max() - self.y.min())
+        return max(1.0, math.sqrt(area / len(self.x) * POINTS_PER_CELL))
+
+    def _cell(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        return (
+            np.floor((np.asarray(x) - self._origin[0]) / self.cell_size).astype(np.int64),
+            np.floor((np.asarray(y) - self._origin[1]) / self.cell_size).astype(np.int64),
+        )
+
+    def _points_in_cells(self, cells: Iterable[Tuple[int, int]]) -> np.ndarray:
+        ranges = [self._cells[cell] for cell in cells if cell in self._cells]
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._order[start:end] for start, end in ranges])
+
+    def _points_in_cell_range(self, x_min: float, y_min: float, x_max: float, y_max: float) -> np.ndarray:
+        """Indices of the points in all cells that overlap the given bounding box."""
+        (cell_x_min, cell_x_max), (cell_y_min, cell_y_max) = self._cell([x_min, x_max], [y_min, y_max])
+        cell_x_min, cell_y_min = max(cell_x_min, self._bounds[0]), max(cell_y_min, self._bounds[2])
+        cell_x_max, cell_y_max = min(cell_x_max, self._bounds[1]), min(cell_y_max, self._bounds[3])
+        if cell_x_min > cell_x_max or cell_y_min > cell_y_max:
+            return np.empty(0, dtype=np.int64)
+        if (cell_x_max - cell_x_min + 1) * (cell_y_max - cell_y_min + 1) > len(self._cells):
+            return np.arange(len(self))
+        return self._points_in_cells(
+            (cell_x, cell_y)
+            for cell_x in range(cell_x_min, cell_x_max + 1)
+            for cell_y in range(cell_y_min, cell_y_max + 1)
+        )
+
+    def _ring(self, center_x: int, center_y: int, ring: int) -> List[Tuple[int, int]]:
+        if ring == 0:
+            return [(center_x, center_y)]
+        cells = [(center_x + offset, center_y + side) for offset in range(-ring, ring + 1) for side in (-ring, ring)]
+        cells += [(center_x + side, center_y + offset) for offset in range(1 - ring, ring) for side in (-ring, ring)]
+        return cells
+
+    def _nearest_one(self, x: float, y: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        cell_x, cell_y = (int(value) for value in self._cell(x, y))
+        x_min, x_max, y_min, y_max = self._bounds
+        # Rings closer than the grid are empty, rings further than the grid contain nothing new
+        first_ring = max(0, x_min - cell_x, cell_x - x_max, y_min - cell_y, cell_y - y_max)
+        last_ring = max(abs(cell_x - x_min), abs(cell_x - x_max), abs(cell_y - y_min), abs(cell_y - y_max))
+
+        candidates = np.empty(0, dtype=np.int64)
+        for ring in range(first_ring, last_ring + 1):
+            candidates = np.concatenate((candidates, self._points_in_cells(self._ring(cell_x, cell_y, ring))))
+            # Every point in the rings that are not visited yet is at least ring * cell_size away
+            if len(candidates) >= k:
+                distances = np.hypot(self.x[candidates] - x, self.y[candidates] - y)
+                if np.partition(distances, k - 1)[k - 1] <= ring * self.cell_size:
+                    break
+
+        distances = np.hypot(self.x[candidates] - x, self.y[candidates] - y)
+        nearest = np.argsort(distances, kind="stable")[:k]
+        return distances[nearest], candidates[nearest]
+
+    def nearest(
+        self, x: Union[float, Sequence[float]], y: Union[float, Sequence[float]], k: int = 1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the k nearest CPTs of one or more query points.
+
+        :param x: x coordinate in m (RD New / EPSG:28992), or array-like of x coordinates
+        :param y: y coordinate in m (RD New / EPSG:28992), or array-like of y coordinates
+        :param k: number of neighbours, limited to the number of CPTs in the index
+        :return: tuple of distances in m and indices, of shape (k,) for a single point or (n, k) for n points
+        """
+        k = min(k, len(self))
+        if np.ndim(x) == 0:
+            if not k:
+                return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+            return self._nearest_one(float(x), float(y), k)
+        if not k:
+            return np.empty((len(x), 0), dtype=np.float64), np.empty((len(x), 0), dtype=np.int64)
+        results = [self._nearest_one(float(point_x), float(point_y), k) for point_x, point_y in zip(x, y)]
+        distances = np.array([distances for distances, _ in results], dtype=np.float64).reshape(-1, k)
+        indices = np.array([indices for _, indices in results], dtype=np.int64).reshape(-1, k)
+        return distances, indices
+
+    def within_radius(self, x: float, y: float, radius: float) -> np.ndarray:
+        """Returns the indices of the CPTs within radius m of the point, sorted by distance."""
+        candidates = self._points_in_cell_range(x - radius, y - radius, x + radius, y + radius)
+        distances = np.hypot(self.x[candidates] - x, self.y[candidates] - y)
+        inside = distances <= radius
+        return candidates[inside][np.argsort(distances[inside], kind="stable")]
+
+    def within_envelope(self, x_min: float, y_min: float, x_max: float, y_max: float) -> np.ndarray:
+        """Returns the indices of the CPTs inside the rectangle, sorted by index."""
+        candidates = self._points_in_cell_range(x_min, y_min, x_max, y_max)
+        inside = (
+            (self.x[candidates] >= x_min)
+            & (self.x[candidates] <= x_max)
+            & (self.y[candidates] >= y_min)
+            & (self.y[candidates] <= y_max)
+        )
+        return np.sort(candidates[inside])
+
+    def within_distance_of_line(self, line: Sequence[Tuple[float, float]], distance: float) -> np.ndarray:
+        """Returns the indices of the CPTs within distance m of a polyline, e.g. a dike alignment, sorted by index.
+
+        :param line: sequence of (x, y) vertices of the polyline in m (RD New / EPSG:28992)
+        :param distance: maximum distance to the polyline in m
+        """
+        vertices = np.asarray(line, dtype=np.float64).reshape(-1, 2)
+        found = [np.empty(0, dtype=np.int64)]
+        for start, end in zip(vertices[:-1], vertices[1:]) if len(vertices) > 1 else [(vertices[0], vertices[0])]:
+            x_min, y_min = np.minimum(start, end) - distance
+            x_max, y_max = np.maximum(start, end) + distance
+            candidates = self._points_in_cell_range(x_min, y_min, x_max, y_max)
+            points = np.stack((self.x[candidates], self.y[candidates]), axis=1)
+            segment = end - start
+            length_squared = float(segment @ segment)
+            fraction = np.clip((points - start) @ segment / length_squared, 0, 1) if length_squared else 0.0
+            closest = start + np.multiply.outer(fraction, segment) if length_squared else start
+            found.append(candidates[np.hypot(*(points - closest).T) <= distance])
+        return np.unique(np.concatenate(found))
+
+    def save(self, file_path: Union[str, Path]) -> None:
+        """Writes the index to a numpy .npz file."""
+        with Path(file_path).open("wb") as index_file:
+            np.savez(index_file, bro_ids=self.bro_ids, x=self.x, y=self.y, cell_size=self.cell_size)
+
+    @classmethod
+    def load(cls, file_path: Union[str, Path]) -> "CPTSpatialIndex":
+        """Instantiates the index from a file written by `save`."""
+        with np.load(file_path) as content:
+            return cls(content["bro_ids"], content["x"], content["y"], cell_size=float(content["cell_size"]))
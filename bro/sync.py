@@ -0,0 +1,127 @@
+import json
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import date
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+from .api import BROClient
+from .api import Circle
+from .api import CPTCharacteristics
+from .api import Envelope
+from .api import Point
+from .api import get_default_client
+from .helper_functions import _str2bool
+
+BRO_CPT_BEGIN_DATE = "2015-01-01"
+
+
+@dataclass
+class SyncResult:
+    """BRO IDs that were added, updated or removed from a CharacteristicsIndex during a sync."""
+
+    begin_date: str
+    end_date: str
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+
+def _area_from_bro_json(bro_json: dict) -> Union[Circle, Envelope]:
+    if "boundingBox" in bro_json:
+        lower_corner = bro_json["boundingBox"]["lowerCorner"]
+        upper_corner = bro_json["boundingBox"]["upperCorner"]
+        return Envelope(
+            Point(lower_corner["lat"], lower_corner["lon"]), Point(upper_corner["lat"], upper_corner["lon"])
+        )
+    center = bro_json["enclosingCircle"]["center"]
+    return Circle(Point(center["lat"], center["lon"]), bro_json["enclosingCircle"]["radius"])
+
+
+class CharacteristicsIndex:
+    """
+    Local index of the CPT characteristics in one area, which is kept up to date incrementally.
+
+    The first sync retrieves everything that was registered since begin_date. Every next sync only requests the
+    registration period since the previous sync, and merges the new, changed and deregistered documents into the
+    index. The last day of the previous sync is requested again, as objects may have been registered later that day.
+
+    :param area: Union[Circle, Envelope] definition of area that is indexed
+    :param begin_date: str date in format YYYY-mm-dd from which objects are indexed, should be >= 2015-01-01
+    """
+
+    def __init__(self, area: Union[Circle, Envelope], begin_date: str = BRO_CPT_BEGIN_DATE):
+        self.area = area
+        self.begin_date = begin_date
+        self.last_sync: Optional[str] = None
+        self.documents: Dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, bro_id: str) -> bool:
+        return bro_id in self.documents
+
+    @property
+    def characteristics(self) -> List[CPTCharacteristics]:
+        """The CPTCharacteristics of all indexed objects."""
+        return [CPTCharacteristics(document) for document in self.documents.values()]
+
+    def sync(self, end_date: Optional[str] = None, client: Optional[BROClient] = None) -> SyncResult:
+        """Requests the documents registered since the previous sync and merges them into the index.
+
+        :param end_date: str date in format YYYY-mm-dd up to which is synced, defaults to today
+        :param client: BROClient used for the request, defaults to the default client
+        :return: SyncResult with the BRO IDs that were added, updated and removed
+        """
+        client = client or get_default_client()
+        end_date = end_date or date.today().strftime("%Y-%m-%d")
+        begin_date = self.last_sync or self.begin_date
+        result = SyncResult(begin_date, end_date)
+
+        for document in client.search_dispatch_documents(begin_date, end_date, self.area):
+            if "CPT_C" in document:
+                cpt_document = document["CPT_C"]
+                deregistered = _str2bool(cpt_document["brocom:deregistered"])
+            else:
+                # Deregistered objects are dispatched without characteristics, e.g. as "BRO_DO"
+                cpt_document = next(iter(document.values()))
+                deregistered = True
+            bro_id = cpt_document["brocom:broId"]
+
+            if deregistered:
+                if self.documents.pop(bro_id, None) is not None:
+                    result.removed.append(bro_id)
+            elif bro_id not in self.documents:
+                self.documents[bro_id] = cpt_document
+                result.added.append(bro_id)
+            elif self.documents[bro_id] != cpt_document:
+                self.documents[bro_id] = cpt_document
+                result.updated.append(bro_id)
+
+        self.last_sync = end_date
+        return result
+
+    def save(self, file_path: Union[str, Path]) -> None:
+        """Writes the index to a JSON file."""
+        content = {
+            "area": self.area.bro_json,
+            "begin_date": self.begin_date,
+            "last_sync": self.last_sync,
+            "documents": self.documents,
+        }
+        with Path(file_path).open("w") as index_file:
+            json.dump(content, index_file)
+
+    @classmethod
+    def load(cls, file_path: Union[str, Path]) -> "CharacteristicsIndex":
+        """Instantiates the index from a JSON file written by `save`."""
+        with Path(file_path).open("r") as index_file:
+            content = json.load(index_file)
+        index = cls(_area_from_bro_json(content["area"]), begin_date=content["begin_date"])
+        index.last_sync = content["last_sync"]
+        index.documents = content["documents"]
+        return index
@@ -0,0 +1,134 @@
+import csv
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+from .api import CPTCharacteristics
+from .api import rd_to_wgs84
+from .api import wgs84_to_rd
+
+_FLOAT_COLUMNS = ("lat", "lon", "x", "y", "offset", "predrilled_depth", "final_depth")
+_BOOL_COLUMNS = ("deregistered", "under_review")
+_STR_COLUMNS = (
+    "bro_id",
+    "quality_class",
+    "quality_regime",
+    "cpt_standard",
+    "vertical_datum",
+    "local_vertical_reference_point",
+    "object_registration_time",
+)
+
+
+def _to_float(value: Optional[float]) -> float:
+    return np.nan if value is None else value
+
+
+class CharacteristicsTable:
+    """
+    Columnar container of CPT characteristics, with one typed numpy array per column.
+
+    Coordinates and depths are float64 arrays (NaN for missing values), flags are bool arrays and the remaining
+    columns are str arrays (an empty string for missing values). Filtering returns a new table and is vectorized over
+    all rows.
+
+    :param columns: dict of column name to array, all arrays should have the same length
+    """
+
+    COLUMNS = _STR_COLUMNS + _FLOAT_COLUMNS + _BOOL_COLUMNS
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    @classmethod
+    def from_characteristics(cls, characteristics: Iterable[CPTCharacteristics]) -> "CharacteristicsTable":
+        """Instantiates the table from CPTCharacteristics objects, e.g. the result of `get_cpt_characteristics`."""
+        rows = {column: [] for column in cls.COLUMNS}
+        for characteristic in characteristics:
+            rows["lat"].append(characteristic.standardized_location.lat)
+            rows["lon"].append(characteristic.standardized_location.lon)
+            rows["x"].append(characteristic.delivered_location.x)
+            rows["y"].append(characteristic.delivered_location.y)
+            for column in ("offset", "predrilled_depth", "final_depth"):
+                rows[column].append(_to_float(getattr(characteristic, column)))
+            for column in _BOOL_COLUMNS:
+                rows[column].append(getattr(characteristic, column))
+            for column in _STR_COLUMNS:
+                rows[column].append(getattr(characteristic, column) or "")
+
+        dtypes = {**dict.fromkeys(_STR_COLUMNS, str), **dict.fromkeys(_FLOAT_COLUMNS, np.float64)}
+        return cls({column: np.array(rows[column], dtype=dtypes.get(column, bool)) for column in cls.COLUMNS})
+
+    def __len__(self) -> int:
+        return len(self.columns["bro_id"])
+
+    def __getitem__(self, key: Union[str, slice, np.ndarray, List[int]]) -> Union[np.ndarray, "CharacteristicsTable"]:
+        """Returns a column by name, or a new table with the rows selected by a slice, index array or boolean mask."""
+        if isinstance(key, str):
+            return self.columns[key]
+        return CharacteristicsTable({column: values[key] for column, values in self.columns.items()})
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    @property
+    def total_cpt_length(self) -> np.ndarray:
+        return np.round(self.columns["offset"] + self.columns["final_depth"], 2)
+
+    def standardized_location_to_rd(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Converts the standardized (WGS84) locations of all rows to RD coordinates in one call, returns (x, y)."""
+        return wgs84_to_rd(self.columns["lat"], self.columns["lon"])
+
+    def delivered_location_to_wgs84(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Converts the delivered (RD) locations of all rows to WGS84 coordinates in one call, returns (lat, lon)."""
+        return rd_to_wgs84(self.columns["x"], self.columns["y"])
+
+    def filter(
+        self,
+        quality_class: Optional[Union[str, Iterable[str]]] = None,
+        deregistered: Optional[bool] = None,
+        under_review: Optional[bool] = None,
+        min_final_depth: Optional[float] = None,
+        max_final_depth: Optional[float] = None,
+    ) -> "CharacteristicsTable":
+        """Returns a new table with the rows that match all given criteria, criteria that are None are ignored.
+
+        :param quality_class: quality class, or collection of quality classes, e.g. "klasse2"
+        :param deregistered: bool the deregistered flag should be equal to
+        :param under_review: bool the under review flag should be equal to
+        :param min_final_depth: minimum final depth in m
+        :param max_final_depth: maximum final depth in m
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if quality_class is not None:
+            quality_classes = [quality_class] if isinstance(quality_class, str) else list(quality_class)
+            mask &= np.isin(self.columns["quality_class"], quality_classes)
+        if deregistered is not None:
+            mask &= self.columns["deregistered"] == deregistered
+        if under_review is not None:
+            mask &= self.columns["under_review"] == under_review
+        if min_final_depth is not None:
+            mask &= self.columns["final_depth"] >= min_final_depth
+        if max_final_depth is not None:
+            mask &= self.columns["final_depth"] <= max_final_depth
+        return self[mask]
+
+    def to_dict(self) -> Dict[str, list]:
+        """Exports the table as a dict of column name to list of values, e.g. to construct a pandas DataFrame."""
+        return {column: values.tolist() for column, values in self.columns.items()}
+
+    def to_csv(self, file_path: Union[str, Path]) -> None:
+        """Exports the table to a csv file with a header row."""
+        with Path(file_path).open("w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(self.columns)
+            writer.writerows(zip(*(values.tolist() for values in self.columns.values())))
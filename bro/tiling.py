@@ -0,0 +1,170 @@
+import re
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from datetime import date
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+from .api import DEFAULT_MAX_WORKERS
+from .api import BROClient
+from .api import BRORejectionError
+from .api import Circle
+from .api import CPTCharacteristics
+from .api import Envelope
+from .api import Point
+from .api import get_default_client
+from .helper_functions import _circle_bounds
+from .helper_functions import _haversine_distance
+
+DEFAULT_MAX_DEPTH = 8
+# Rejection reason of a characteristics search that finds more objects than the BRO delivers in one response, e.g.
+# "Het aantal gevonden objecten (2345) is groter dan het maximum (2000)". Other rejections are not split
+OBJECT_LIMIT_REJECTION = re.compile(r"aantal gevonden objecten \(\d+\) is groter dan het maximum", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class _Piece:
+    """Part of a tiled request, key is the path of splits that led to this piece."""
+
+    key: tuple
+    begin_date: str
+    end_date: str
+    area: Union[Circle, Envelope]
+    depth: int
+
+
+def _bounding_envelope(circle: Circle) -> Envelope:
+    min_lat, min_lon, max_lat, max_lon = _circle_bounds(circle.center.lat, circle.center.lon, circle.radius)
+    return Envelope(Point(min_lat, min_lon), Point(max_lat, max_lon))
+
+
+def _split_envelope(envelope: Envelope) -> List[Envelope]:
+    """Splits the envelope in four quadrants."""
+    lower, upper = envelope.lower_corner, envelope.upper_corner
+    mid_lat = (lower.lat + upper.lat) / 2
+    mid_lon = (lower.lon + upper.lon) / 2
+    return [
+        Envelope(Point(lower.lat, lower.lon), Point(mid_lat, mid_lon)),
+        Envelope(Point(lower.lat, mid_lon), Point(mid_lat, upper.lon)),
+        Envelope(Point(mid_lat, lower.lon), Point(upper.lat, mid_lon)),
+        Envelope(Point(mid_lat, mid_lon), Point(upper.lat, upper.lon)),
+    ]
+
+
+def _split_period(begin_date: str, end_date: str) -> Optional[List[tuple]]:
+    """Splits the registration period in two halves, or returns None if it spans a single day."""
+    begin, end = date.fromisoformat(begin_date), date.fromisoformat(end_date)
+    if end <= begin:
+        return None
+    middle = begin + (end - begin) // 2
+    return [
+        (begin_date, middle.strftime("%Y-%m-%d")),
+        ((middle + timedelta(days=1)).strftime("%Y-%m-%d"), end_date),
+    ]
+
+
+def _split_piece(piece: _Piece, max_depth: int, split_dates: bool) -> Optional[List[_Piece]]:
+    if piece.depth < max_depth:
+        area = _bounding_envelope(piece.area) if isinstance(piece.area, Circle) else piece.area
+        return [
+            _Piece((*piece.key, index), piece.begin_date, piece.end_date, quadrant, piece.depth + 1)
+            for index, quadrant in enumerate(_split_envelope(area))
+        ]
+    periods = _split_period(piece.begin_date, piece.end_date) if split_dates else None
+    if periods is None:
+        return None
+    return [
+        _Piece((*piece.key, index), begin_date, end_date, piece.area, piece.depth + 1)
+        for index, (begin_date, end_date) in enumerate(periods)
+    ]
+
+
+def _distance(point_a: Point, point_b: Point) -> float:
+    """Great circle distance between two points in km."""
+    return _haversine_distance(point_a.lat, point_a.lon, point_b.lat, point_b.lon)
+
+
+def get_cpt_characteristics_tiled(
+    begin_date: str,
+    end_date: str,
+    area: Union[Circle, Envelope],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    split_dates: bool = True,
+    client: Optional[BROClient] = None,
+) -> List[CPTCharacteristics]:
+    """Retrieves available CPT Objects from the BRO in given date / area range, without the object limit per request.
+
+    When the BRO rejects a request because it contains too many objects, the area is split in four sub-envelopes
+    (a Circle is split through its bounding box) which are requested in parallel. This is repeated until every piece
+    is accepted or max_depth is reached, after which the registration period is split in halves if split_dates is
+    True. The pieces are merged into one result, deduplicated by BRO ID.
+
+    :param begin_date: str date in format YYYY-mm-dd (.strftime("%Y-%m-%d")) and should be > 2015-01-01
+    :param end_date: str date in format YYYY-mm-dd (.strftime("%Y-%m-%d"))
+    :param area: Union[Circle, Envelope] definition of area in which to look for CPT objects
+    :param max_workers: maximum number of requests to the BRO at the same time
+    :param max_depth: maximum number of times the area is split
+    :param split_dates: bool indicating whether the registration period is split when max_depth is reached
+    :param client: BROClient used for the requests, defaults to the default client
+    :return: A list of objects containing metadata of available CPT objects, WITHOUT actual measurements
+    :raises BRORejectionError: if a piece is rejected that can not be split any further
+    """
+    client = client or get_default_client()
+    documents_per_piece: Dict[tuple, List[dict]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit(piece: _Piece):
+            future = executor.submit(client.search_dispatch_documents, piece.begin_date, piece.end_date, piece.area)
+            pending[future] = piece
+
+        pending = {}
+        submit(_Piece((), begin_date, end_date, area, 0))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                piece = pending.pop(future)
+                try:
+                    documents_per_piece[piece.key] = future.result()
+                    continue
+                except BRORejectionError as error:
+                    children = (
+                        _split_piece(piece, max_depth, split_dates)
+                        if OBJECT_LIMIT_REJECTION.search(str(error))
+                        else None
+                    )
+                    if children is None:
+                        for pending_future in pending:
+                            pending_future.cancel()
+                        raise
+                for child in children:
+                    submit(child)
+
+    is_split = list(documents_per_piece) != [()]
+    available_cpt_objects = {}
+    for key in sorted(documents_per_piece):
+        for document in documents_per_piece[key]:
+            if "CPT_C" not in document:
+                continue
+            bro_id = document["CPT_C"]["brocom:broId"]
+            if bro_id not in available_cpt_objects:
+                available_cpt_objects[bro_id] = CPTCharacteristics(document["CPT_C"])
+
+    characteristics = list(available_cpt_objects.values())
+    if is_split and isinstance(area, Circle):
+        # The pieces cover the bounding box of the circle, drop everything outside of the circle itself
+        characteristics = [
+            characteristic
+            for characteristic in characteristics
+            if _distance(area.center, characteristic.wgs84_coordinate) <= area.radius
+        ]
+    if not characteristics:
+        raise ValueError(
+            "No available objects have been found in given date + area range. Retry with different parameters."
+        )
+    return characteristics
@@ -22,11 +22,16 @@ setup(
     license_files=("LICENSE.txt",),
     packages=find_packages(exclude=["tests"]),
     install_requires=[
-        "xmltodict>=0.13.0",
         "requests>=2.31.0",
         "lxml>=5.1.0",
         "pyproj>=3.6.1",
+        "numpy>=1.21.0",
     ],
+    extras_require={
+        "archive": ["pyarrow>=14.0.0"],
+        "async": ["httpx>=0.24.0"],
+    },
+    entry_points={"console_scripts": ["bro-harvest=bro.harvest:main"]},
     classifiers=[
         "Environment :: Web Environment",
         "Intended Audience :: Developers",
@@ -0,0 +1,366 @@
+"""
+Local stand-in for the BRO REST API, used by the offline tests and the benchmarks.
+
+The server serves the CPT characteristics search and the CPT object endpoint on 127.0.0.1. Objects are rendered from
+the fixture XML in this directory, with the BRO ID swapped for the requested one, or with a synthetic measurement
+table of a configurable amount of rows.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Union
+from urllib.parse import urlparse
+
+FIXTURE_BRO_ID = "CPT000000053405"
+FIXTURE_XML = (Path(__file__).parent / f"response_{FIXTURE_BRO_ID}.xml").read_bytes()
+FIXTURE_VALUES_START = FIXTURE_XML.index(b"<cptcommon:values>") + len(b"<cptcommon:values>")
+FIXTURE_VALUES_END = FIXTURE_XML.index(b"</cptcommon:values>")
+MAX_OBJECTS_PER_REQUEST = 1000
+MISSING_VALUE = "-999999"
+
+CHARACTERISTICS_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<dispatchCharacteristicsResponse xmlns="http://www.broservices.nl/xsd/dscpt/1.1" '
+    'xmlns:brocom="http://www.broservices.nl/xsd/brocommon/3.0" xmlns:gml="http://www.opengis.net/gml/3.2">'
+    "<brocom:responseType>dispatch</brocom:responseType>"
+)
+CHARACTERISTICS_FOOTER = "</dispatchCharacteristicsResponse>"
+
+
+@dataclass
+class MockCPT:
+    bro_id: str
+    lat: float
+    lon: float
+    x: float = 150080.0
+    y: float = 449577.0
+    registration_time: str = "2017-01-13T05:54:40+01:00"
+    deregistered: bool = False
+
+    def to_dispatch_document(self, gml_id: int) -> str:
+        if self.deregistered:
+            return (
+                f'<dispatchDocument><BRO_DO gml:id="BRO_{gml_id:04d}"><brocom:broId>{self.bro_id}</brocom:broId>'
+                "<brocom:deregistered>ja</brocom:deregistered></BRO_DO></dispatchDocument>"
+            )
+        return (
+            f'<dispatchDocument><CPT_C gml:id="BRO_{gml_id:04d}">'
+            f"<brocom:broId>{self.bro_id}</brocom:broId>"
+            "<brocom:deregistered>nee</brocom:deregistered>"
+            "<brocom:deliveryAccountableParty>50200097</brocom:deliveryAccountableParty>"
+            "<brocom:qualityRegime>IMBRO/A</brocom:qualityRegime>"
+            f"<brocom:objectRegistrationTime>{self.registration_time}</brocom:objectRegistrationTime>"
+            "<brocom:underReview>nee</brocom:underReview>"
+            '<brocom:standardizedLocation srsName="urn:ogc:def:crs:EPSG::4258">'
+            f"<gml:pos>{self.lat:.9f} {self.lon:.9f}</gml:pos></brocom:standardizedLocation>"
+            '<brocom:deliveredLocation srsName="urn:ogc:def:crs:EPSG::28992">'
+            f"<gml:pos>{self.x:.3f} {self.y:.3f}</gml:pos></brocom:deliveredLocation>"
+            '<localVerticalReferencePoint codeSpace="urn:bro:cpt:LocalVerticalReferencePoint">maaiveld'
+            "</localVerticalReferencePoint>"
+            '<offset uom="m">4.260</offset>'
+            '<verticalDatum codeSpace="urn:bro:cpt:VerticalDatum">NAP</verticalDatum>'
+            '<cptStandard codeSpace="urn:bro:cpt:CPTStandard">NEN5140</cptStandard>'
+            '<qualityClass codeSpace="urn:bro:cpt:QualityClass">klasse2</qualityClass>'
+            "<researchReportDate><brocom:date>2007-10-11</brocom:date></researchReportDate>"
+            "<startTime>2001-11-26T00:00:00+01:00</startTime>"
+            '<predrilledDepth uom="m">2.00</predrilledDepth>'
+            '<finalDepth uom="m">25.020</finalDepth>'
+            '<surveyPurpose codeSpace="urn:bro:cpt:SurveyPurpose">onbekend</surveyPurpose>'
+            "<dissipationTestPerformed>nee</dissipationTestPerformed>"
+            '<stopCriterion codeSpace="urn:bro:cpt:StopCriterion">einddiepte</stopCriterion>'
+            "</CPT_C></dispatchDocument>"
+        )
+
+
+FIXTURE_CPT = MockCPT(bro_id=FIXTURE_BRO_ID, lat=52.034504730, lon=5.315502610)
+
+
+def generate_cpts(amount: int, lat: float = 52.0, lon: float = 5.0, spacing: float = 0.001) -> List[MockCPT]:
+    """Generates CPTs on a square grid starting at (lat, lon), spaced `spacing` degrees apart."""
+    columns = max(1, math.ceil(math.sqrt(amount)))
+    return [
+        MockCPT(
+            bro_id=f"CPT{index:012d}",
+            lat=lat + (index // columns) * spacing,
+            lon=lon + (index % columns) * spacing,
+        )
+        for index in range(amount)
+    ]
+
+
+def build_measurement_values(bro_id: str, rows: int) -> str:
+    """Builds the measurement table of a CPT with `rows` rows of 25 values, seeded with the BRO ID so the same CPT
+    always gets the same values. Cone resistance, local friction, friction ratio and inclination are filled."""
+    rng = random.Random(bro_id)
+    lines = []
+    for row in range(rows):
+        depth = 2.0 + row * 0.02
+        cone_resistance = rng.uniform(0.2, 20.0)
+        local_friction = cone_resistance * rng.uniform(0.005, 0.05)
+        values = [MISSING_VALUE] * 25
+        values[0] = values[1] = f"{depth:.3f}"
+        values[2] = f"{199.0 + row:.1f}"
+        values[3] = f"{cone_resistance:.3f}"
+        values[15] = f"{rng.uniform(0.0, 2.0):.1f}"
+        values[18] = f"{local_friction:.4f}"
+        values[24] = f"{local_friction / cone_resistance * 100:.2f}"
+        lines.append(",".join(values))
+    return ";".join(lines) + ";"
+
+
+def build_cpt_object(bro_id: str, rows: Optional[int] = None) -> bytes:
+    """Builds the IMBRO XML of a CPT object: the fixture with the BRO ID swapped, and with a synthetic measurement
+    table of `rows` rows if given."""
+    content = FIXTURE_XML
+    if rows is not None:
+        content = (
+            content[:FIXTURE_VALUES_START]
+            + build_measurement_values(bro_id, rows).encode()
+            + content[FIXTURE_VALUES_END:]
+        )
+    return content.replace(FIXTURE_BRO_ID.encode(), bro_id.encode())
+
+
+def build_characteristics_response(cpts: List[MockCPT]) -> str:
+    """Builds a dispatchCharacteristicsResponse that contains the given CPTs."""
+    documents = "".join(cpt.to_dispatch_document(index + 1) for index, cpt in enumerate(cpts))
+    return (
+        f"{CHARACTERISTICS_HEADER}<numberOfDocuments>{len(cpts)}</numberOfDocuments>{documents}{CHARACTERISTICS_FOOTER}"
+    )
+
+
+def build_rejection_response(reason: str) -> str:
+    """Builds the dispatchCharacteristicsResponse with which the BRO rejects a characteristics search."""
+    return (
+        CHARACTERISTICS_HEADER.replace(">dispatch<", ">rejection<")
+        + f"<brocom:rejectionReason>{reason}</brocom:rejectionReason>{CHARACTERISTICS_FOOTER}"
+    )
+
+
+def generate_characteristics(cpts: List[MockCPT]) -> list:
+    """Returns the CPTCharacteristics of the given CPTs, as parsed from a characteristics response."""
+    # pylint: disable=import-outside-toplevel
+    from bro import CPTCharacteristics
+    from bro import parse_characteristics_response
+
+    _, documents = parse_characteristics_response(build_characteristics_response(cpts).encode())
+    return [CPTCharacteristics(document["CPT_C"]) for document in documents if "CPT_C" in document]
+
+
+def in_area(cpt: MockCPT, area: dict) -> bool:
+    if "boundingBox" in area:
+        lower, upper = area["boundingBox"]["lowerCorner"], area["boundingBox"]["upperCorner"]
+        return lower["lat"] <= cpt.lat <= upper["lat"] and lower["lon"] <= cpt.lon <= upper["lon"]
+    center, radius = area["enclosingCircle"]["center"], area["enclosingCircle"]["radius"]
+    d_lat = math.radians(cpt.lat - center["lat"])
+    d_lon = math.radians(cpt.lon - center["lon"])
+    a = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(center["lat"])) * math.cos(math.radians(cpt.lat)) * math.sin(d_lon / 2) ** 2
+    )
+    return 6371.0 * 2 * math.asin(math.sqrt(a)) <= radius
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def setup(self):
+        super().setup()
+        self.server.mock.record_connection()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def _send(self, status: int, body: bytes, headers: Optional[dict] = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_queued_error(self) -> bool:
+        error = self.server.mock.pop_queued_error()
+        if error is None:
+            error = self.server.mock.draw_random_error()
+        if error is None:
+            return False
+        status, headers = error
+        self._send(status, b"Service unavailable", headers)
+        return True
+
+    def do_GET(self):
+        mock = self.server.mock
+        mock.record_request()
+        if self._send_queued_error():
+            return
+        path = urlparse(self.path).path
+        bro_id = path.rsplit("/", 1)[-1]
+        if not path.startswith("/sr/cpt/v1/objects/") or bro_id not in mock.cpts_by_id:
+            self._send(404, b"Not found")
+            return
+        self._send(200, mock.cpt_object(bro_id))
+
+    def do_POST(self):
+        mock = self.server.mock
+        mock.record_request()
+        request_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self._send_queued_error():
+            return
+        request = json.loads(request_body)
+        mock.last_search = request
+        self._send(200, mock.characteristics_response(request).encode())
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockBROServer"
+
+
+class MockBROServer:
+    """
+    Threaded HTTP server mimicking the BRO CPT endpoints. Use it as a context manager and point the requests at
+    `object_url` and `characteristics_url`.
+
+    :param cpts: CPTs that are available on the server
+    :param latency: seconds every request is delayed before it is answered
+    :param max_objects: maximum number of objects in a characteristics search, larger searches are rejected
+    :param latency_jitter: seconds of uniformly distributed random delay that is added to the latency
+    :param error_rate: fraction of the requests that is answered with error_status at random
+    :param error_status: status code of the random errors
+    :param rows: amount of synthetic measurement rows of the objects, None serves the measurements of the fixture
+    :param seed: seed of the random latency and errors, so a run can be repeated
+    """
+
+    def __init__(
+        self,
+        cpts: Optional[List[MockCPT]] = None,
+        latency: float = 0.0,
+        max_objects: int = MAX_OBJECTS_PER_REQUEST,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        rows: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.cpts: List[MockCPT] = []
+        self.cpts_by_id = {}
+        self.set_cpts(cpts or [])
+        self.latency = latency
+        self.max_objects = max_objects
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rows = rows
+        self.error_count = 0
+        self._random = random.Random(seed)
+        self._objects = {}
+        self.request_count = 0
+        self.connection_count = 0
+        self.last_search: Optional[dict] = None
+        self._queued_errors: List[tuple] = []
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def object_url(self) -> str:
+        return f"{self.base_url}/sr/cpt/v1/objects/"
+
+    @property
+    def characteristics_url(self) -> str:
+        return f"{self.base_url}/sr/cpt/v1/characteristics/searches?requestReference=mock"
+
+    def record_request(self):
+        with self._lock:
+            self.request_count += 1
+            latency = self.latency + (self._random.uniform(0.0, self.latency_jitter) if self.latency_jitter else 0.0)
+        if latency:
+            time.sleep(latency)
+
+    def draw_random_error(self) -> Optional[tuple]:
+        """Returns the error to answer the current request with at the error rate, or None."""
+        if not self.error_rate:
+            return None
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            self.error_count += 1
+        return self.error_status, {"Retry-After": "0"}
+
+    def cpt_object(self, bro_id: str) -> bytes:
+        """Returns the XML of the object, the synthetic objects are built once and reused."""
+        if self.rows is None:
+            return build_cpt_object(bro_id)
+        content = self._objects.get(bro_id)
+        if content is None:
+            content = self._objects[bro_id] = build_cpt_object(bro_id, self.rows)
+        return content
+
+    def set_cpts(self, cpts: List[MockCPT]):
+        """Replaces the CPTs that are available on the server."""
+        self.cpts = list(cpts)
+        self.cpts_by_id = {cpt.bro_id: cpt for cpt in self.cpts}
+
+    def record_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def queue_errors(self, status: int, count: int = 1, retry_after: Optional[Union[float, str]] = None):
+        """Answers the next `count` requests with the given error status code, optionally with a Retry-After header
+        in seconds or as HTTP-date."""
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        with self._lock:
+            self._queued_errors.extend([(status, headers)] * count)
+
+    def pop_queued_error(self) -> Optional[tuple]:
+        with self._lock:
+            return self._queued_errors.pop(0) if self._queued_errors else None
+
+    def characteristics_response(self, request: dict) -> str:
+        begin_date = request["registrationPeriod"]["beginDate"]
+        end_date = request["registrationPeriod"]["endDate"]
+        found = [
+            cpt
+            for cpt in self.cpts
+            if begin_date <= cpt.registration_time[:10] <= end_date and in_area(cpt, request["area"])
+        ]
+        if len(found) > self.max_objects:
+            return build_rejection_response(
+                f"Het aantal gevonden objecten ({len(found)}) is groter dan het maximum ({self.max_objects})"
+            )
+        return build_characteristics_response(found)
+
+    def start(self) -> "MockBROServer":
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.mock = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "MockBROServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,158 @@
+import asyncio
+import email.utils
+import importlib.util
+import threading
+import unittest
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest import mock
+
+from bro import REQUEST_END
+from bro import REQUEST_RETRY
+from bro import AsyncBROClient
+from bro import CPTDownloadError
+from bro import Envelope
+from bro import MetricsAggregator
+from bro import Point
+from tests.mock_server import MockBROServer
+from tests.mock_server import generate_cpts
+
+
+@unittest.skipIf(importlib.util.find_spec("httpx") is None, "httpx is not installed")
+class TestAsyncBROClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cpts = generate_cpts(8)
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+        self.client = AsyncBROClient(
+            backoff_factor=0.01,
+            cpt_object_url=self.server.object_url,
+            cpt_characteristics_url=self.server.characteristics_url,
+        )
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_get_cpt_characteristics(self):
+        envelope = Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+
+        response = await self.client.get_cpt_characteristics("2015-01-01", "2023-03-03", area=envelope)
+
+        self.assertEqual([characteristic.bro_id for characteristic in response], [cpt.bro_id for cpt in self.cpts])
+        with self.assertRaises(ValueError):
+            await self.client.get_cpt_characteristics("2015-01-01", "2023-03-03", Envelope(Point(50, 4), Point(50, 4)))
+
+    async def test_get_cpt_objects_returns_objects_in_requested_order(self):
+        bro_ids = [cpt.bro_id for cpt in reversed(self.cpts)]
+
+        response = await self.client.get_cpt_objects(bro_ids, max_concurrency=3)
+
+        for bro_id, xml_bytes in zip(bro_ids, response):
+            self.assertIn(f"<brocom:broId>{bro_id}</brocom:broId>".encode(), xml_bytes)
+
+    async def test_get_cpt_objects_limits_concurrency(self):
+        in_flight, max_in_flight = 0, 0
+        get_cpt_object = self.client.get_cpt_object
+
+        async def tracked_get_cpt_object(bro_cpt_id, as_dict=False):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            try:
+                return await get_cpt_object(bro_cpt_id, as_dict=as_dict)
+            finally:
+                in_flight -= 1
+
+        with mock.patch.object(self.client, "get_cpt_object", tracked_get_cpt_object):
+            response = await self.client.get_cpt_objects(
+                [cpt.bro_id for cpt in self.cpts], as_dict=True, max_concurrency=2
+            )
+
+        self.assertEqual(max_in_flight, 2)
+        self.assertEqual(response[0]["dispatchDocument"]["CPT_O"]["broId"], self.cpts[0].bro_id)
+
+    async def test_get_cpt_objects_reports_failures_per_id(self):
+        bro_ids = [self.cpts[0].bro_id, "CPT999999999999"]
+
+        with self.assertRaises(CPTDownloadError) as context:
+            await self.client.get_cpt_objects(bro_ids)
+
+        self.assertEqual(list(context.exception.errors), ["CPT999999999999"])
+        self.assertIsInstance(context.exception.results[0], bytes)
+
+    async def test_get_cpt_object_retries_on_server_error(self):
+        self.server.queue_errors(503, count=2, retry_after=0)
+
+        response = await self.client.get_cpt_object(self.cpts[0].bro_id)
+
+        self.assertIsInstance(response, bytes)
+        self.assertEqual(self.server.request_count, 3)
+
+    async def test_get_cpt_object_honours_retry_after_as_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        self.server.queue_errors(503, retry_after=email.utils.format_datetime(retry_at, usegmt=True))
+
+        with mock.patch("asyncio.sleep", new=mock.AsyncMock()) as sleep:
+            response = await self.client.get_cpt_object(self.cpts[0].bro_id)
+
+        self.assertIsInstance(response, bytes)
+        self.assertEqual(self.server.request_count, 2)
+        self.assertAlmostEqual(sleep.await_args.args[0], 3600, delta=2)
+
+    async def test_get_cpt_object_emits_request_events(self):
+        self.server.queue_errors(503, retry_after=0)
+
+        with MetricsAggregator() as metrics:
+            await self.client.get_cpt_object(self.cpts[0].bro_id)
+
+        summary = metrics.summary()
+        self.assertEqual(summary[REQUEST_END]["count"], 2)
+        self.assertEqual(summary[REQUEST_RETRY]["count"], 1)
+
+    async def test_iter_cpt_objects(self):
+        characteristics = await self.client.get_cpt_characteristics(
+            "2015-01-01", "2023-03-03", Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+        )
+
+        bro_ids = [characteristic.bro_id async for characteristic, _ in self.client.iter_cpt_objects(characteristics)]
+
+        self.assertEqual(sorted(bro_ids), [cpt.bro_id for cpt in self.cpts])
+
+    async def test_iter_cpt_objects_starts_downloads_as_results_are_consumed(self):
+        characteristics = await self.client.get_cpt_characteristics(
+            "2015-01-01", "2023-03-03", Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+        )
+        started = []
+        get_cpt_object = self.client.get_cpt_object
+
+        async def tracked_get_cpt_object(bro_cpt_id, as_dict=False):
+            started.append(bro_cpt_id)
+            return await get_cpt_object(bro_cpt_id, as_dict=as_dict)
+
+        with mock.patch.object(self.client, "get_cpt_object", tracked_get_cpt_object):
+            iterator = self.client.iter_cpt_objects(characteristics, max_concurrency=2)
+            await iterator.__anext__()
+            await asyncio.sleep(0.1)
+            self.assertEqual(len(started), 2)
+            await iterator.__anext__()
+            self.assertEqual(len(started), 3)
+            await iterator.aclose()
+
+    async def test_caches_and_parsing_do_not_run_on_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+        cache = mock.Mock()
+        cache.get.side_effect = lambda *_: threads.append(threading.get_ident())
+        cache.set.side_effect = lambda *_: threads.append(threading.get_ident())
+        self.client.cache = cache
+        self.client.characteristics_cache = cache
+
+        await self.client.get_cpt_characteristics(
+            "2015-01-01", "2023-03-03", Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+        )
+        await self.client.get_cpt_object(self.cpts[0].bro_id)
+
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(loop_thread, threads)
@@ -1,15 +1,41 @@
+import email.utils
 import json
+import os
 import unittest
 from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from pathlib import Path
+from unittest import mock
 
+import numpy as np
+import requests
+
+from bro import OBJECT_LIMIT_REJECTION
+from bro import PARSE_QUEUE_PER_WORKER
+from bro import BROClient
+from bro import BRORejectionError
 from bro import Circle
+from bro import CPTCharacteristics
+from bro import CPTDownloadError
 from bro import Envelope
+from bro import IMBROFile
 from bro import Point
 from bro import RDPoint
 from bro import get_cpt_characteristics
 from bro import get_cpt_characteristics_and_return_cpt_objects
 from bro import get_cpt_object
+from bro import get_cpt_objects
+from bro import get_default_client
+from bro import iter_cpt_characteristics_and_cpt_objects
+from bro import parse_characteristics_response
+from bro import rd_to_wgs84
+from bro import wgs84_to_rd
+from bro.api import _retry_delay
+from tests.mock_server import FIXTURE_CPT
+from tests.mock_server import MockBROServer
+from tests.mock_server import build_characteristics_response
+from tests.mock_server import generate_cpts
 
 
 class TestPoint(unittest.TestCase):
@@ -31,6 +57,26 @@ class TestPoint(unittest.TestCase):
         self.assertAlmostEqual(wgs.lat, expected_wgs.lat)
         self.assertAlmostEqual(wgs.lon, expected_wgs.lon)
 
+    def test_batch_conversions_return_same_result_as_single_conversions(self):
+        wgs_points = [self.wgs, Point(lat=52.034504730, lon=5.315502610)]
+        rd_points = [self.rd, RDPoint(x=150080.0, y=449577.0)]
+
+        for rd, wgs in zip(Point.batch_to_rd(wgs_points), wgs_points):
+            self.assertAlmostEqual(rd.x, wgs.from_wgs84_to_rd().x)
+            self.assertAlmostEqual(rd.y, wgs.from_wgs84_to_rd().y)
+        for wgs, rd in zip(RDPoint.batch_to_wgs84(rd_points), rd_points):
+            self.assertAlmostEqual(wgs.lat, rd.from_rd_to_wgs84().lat)
+            self.assertAlmostEqual(wgs.lon, rd.from_rd_to_wgs84().lon)
+
+    def test_array_conversions_round_trip(self):
+        x, y = wgs84_to_rd(np.array([self.wgs.lat]), np.array([self.wgs.lon]))
+        lat, lon = rd_to_wgs84(x, y)
+
+        self.assertAlmostEqual(x[0], self.rd.x)
+        self.assertAlmostEqual(y[0], self.rd.y)
+        self.assertAlmostEqual(lat[0], self.wgs.lat)
+        self.assertAlmostEqual(lon[0], self.wgs.lon)
+
 
 class TestCircle(unittest.TestCase):
     def setUp(self):
@@ -108,6 +154,37 @@ class TestEnvelope(unittest.TestCase):
         self.assertEqual(actual_geojson_feature, expected_geojson_feature)
 
 
+class TestCPTCharacteristics(unittest.TestCase):
+    def setUp(self):
+        _, documents = parse_characteristics_response(build_characteristics_response(generate_cpts(1)).encode())
+        self.document = documents[0]["CPT_C"]
+
+    def test_lazy_fields_are_decoded_on_first_access_and_cached(self):
+        characteristic = CPTCharacteristics(self.document)
+        self.document["brocom:broId"] = "CPT000000000009"
+
+        self.assertEqual(characteristic.bro_id, "CPT000000000009")
+        self.document["brocom:broId"] = "CPT000000000010"
+        self.assertEqual(characteristic.bro_id, "CPT000000000009")
+
+    def test_lazy_and_eager_fields_are_equal(self):
+        lazy, eager = CPTCharacteristics(self.document), CPTCharacteristics(self.document, lazy=False)
+
+        for field in CPTCharacteristics.FIELDS:
+            self.assertEqual(str(getattr(lazy, field)), str(getattr(eager, field)), field)
+        self.assertEqual(lazy.offset, 4.26)
+        self.assertEqual(lazy.total_cpt_length, 29.28)
+
+    def test_eager_raises_on_missing_field(self):
+        del self.document["brocom:underReview"]
+
+        characteristic = CPTCharacteristics(self.document)
+        self.assertEqual(characteristic.bro_id, "CPT000000000000")
+        with self.assertRaises(KeyError):
+            CPTCharacteristics(self.document, lazy=False)
+
+
+@unittest.skipUnless(os.environ.get("BRO_LIVE_TESTS"), "set BRO_LIVE_TESTS=1 to run the tests against the live BRO")
 class TestAPI(unittest.TestCase):
     def test_get_cpt_object(self):
         bro_cpt_id = "CPT000000053405"
@@ -155,3 +232,231 @@ class TestAPI(unittest.TestCase):
 
         # Assert
         self.assertIsInstance(response[0], dict)
+
+    def test_search_of_too_many_objects_is_rejected_with_the_object_limit_reason(self):
+        # The tiled search only splits on this rejection, so its wording is checked against the live BRO
+        envelope = Envelope(Point(50.7, 3.3), Point(53.6, 7.3))
+
+        with self.assertRaises(BRORejectionError) as context:
+            get_cpt_characteristics("2015-01-01", "2023-03-03", area=envelope)
+
+        self.assertRegex(str(context.exception), OBJECT_LIMIT_REJECTION)
+
+
+class TestRetryDelay(unittest.TestCase):
+    def test_retry_after_in_seconds_or_as_http_date(self):
+        retry_at = email.utils.format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+
+        self.assertEqual(_retry_delay("5", 0.5), 5.0)
+        self.assertAlmostEqual(_retry_delay(retry_at, 0.5), 30.0, delta=1.5)
+        self.assertEqual(_retry_delay("Wed, 21 Oct 2015 07:28:00 GMT", 0.5), 0.0)
+        self.assertEqual(_retry_delay(None, 0.5), 0.5)
+        self.assertEqual(_retry_delay("soon", 0.5), 0.5)
+
+
+class TestAPIOffline(unittest.TestCase):
+    """The tests of TestAPI against the mock server, with the fixture CPT and 5 CPTs in the envelope."""
+
+    def setUp(self):
+        self.cpts = generate_cpts(5, lat=51.9227, lon=4.4696, spacing=0.00005)
+        self.server = MockBROServer([FIXTURE_CPT] + self.cpts).start()
+        self.addCleanup(self.server.stop)
+        client = BROClient(
+            cpt_object_url=self.server.object_url, cpt_characteristics_url=self.server.characteristics_url
+        )
+        self.addCleanup(client.close)
+        patcher = mock.patch("bro.api._default_client", client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.envelope = Envelope(
+            Point(51.92269686635185, 4.469594207611851), Point(51.923034432171065, 4.470094707426648)
+        )
+
+    def test_get_cpt_object(self):
+        response = get_cpt_object(FIXTURE_CPT.bro_id, as_dict=True)
+
+        with open(Path(__file__).parent / "response_CPT000000053405.json", "r") as f:
+            expected_response = json.load(f)
+
+        self.assertEqual(
+            json.dumps(response["dispatchDocument"]),
+            json.dumps(expected_response["dispatchDocument"]),
+        )
+
+    def test_get_cpt_characteristics_returns_correct_amount_of_results(self):
+        response = get_cpt_characteristics("2015-01-01", "2023-03-03", area=self.envelope)
+
+        self.assertEqual(len(response), 5)
+
+    def test_get_cpt_characteristics_and_return_cpt_objects_returns_correct_result_type(self):
+        response = get_cpt_characteristics_and_return_cpt_objects(
+            "2015-01-01", "2023-03-03", area=self.envelope, as_dict=True
+        )
+
+        self.assertIsInstance(response[0], dict)
+
+    def test_get_cpt_objects_with_random_errors_and_synthetic_objects(self):
+        bro_ids = [cpt.bro_id for cpt in self.cpts]
+        with MockBROServer(self.cpts, error_rate=0.3, rows=50, seed=0) as server, BROClient(
+            backoff_factor=0.01, cpt_object_url=server.object_url
+        ) as client:
+            response = client.get_cpt_objects(bro_ids)
+
+        self.assertGreater(server.error_count, 0)
+        for bro_id, xml_bytes in zip(bro_ids, response):
+            self.assertEqual(IMBROFile(xml_bytes).parse()["dispatchDocument"]["CPT_O"]["broId"], bro_id)
+            self.assertEqual(len(IMBROFile(xml_bytes).parse_measurements()), 50)
+
+
+class TestGetCPTObjects(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(12)
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+        client = BROClient(cpt_object_url=self.server.object_url)
+        self.addCleanup(client.close)
+        patcher = mock.patch("bro.api._default_client", client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_cpt_objects_returns_objects_in_requested_order(self):
+        bro_ids = [cpt.bro_id for cpt in reversed(self.cpts)]
+
+        response = get_cpt_objects(bro_ids, max_workers=4)
+
+        self.assertEqual(len(response), len(bro_ids))
+        for bro_id, xml_bytes in zip(bro_ids, response):
+            self.assertIn(f"<brocom:broId>{bro_id}</brocom:broId>".encode(), xml_bytes)
+
+    def test_get_cpt_objects_in_series_returns_dicts(self):
+        response = get_cpt_objects([self.cpts[0].bro_id], as_dict=True, max_workers=1)
+
+        self.assertEqual(response[0]["dispatchDocument"]["CPT_O"]["broId"], self.cpts[0].bro_id)
+
+    def test_get_cpt_objects_parses_in_worker_processes(self):
+        bro_ids = [cpt.bro_id for cpt in self.cpts] + ["CPT999999999999"]
+
+        with self.assertRaises(CPTDownloadError) as context:
+            get_cpt_objects(bro_ids, as_dict=True, max_workers=4, parse_workers=2)
+
+        self.assertEqual(list(context.exception.errors), ["CPT999999999999"])
+        self.assertEqual(context.exception.results[:-1], get_cpt_objects(bro_ids[:-1], as_dict=True))
+
+    def test_parsing_in_worker_processes_bounds_the_objects_waiting_to_be_parsed(self):
+        client = get_default_client()
+        iter_downloads = client._iter_downloads  # pylint: disable=protected-access
+        downloaded = []
+
+        def tracked_iter_downloads(*args):
+            for index, result in iter_downloads(*args):
+                downloaded.append(index)
+                yield index, result
+
+        with mock.patch.object(client, "_iter_downloads", tracked_iter_downloads):
+            results = client._iter_objects(  # pylint: disable=protected-access
+                [cpt.bro_id for cpt in self.cpts], True, 4, 1
+            )
+            next(results)
+            self.assertLessEqual(len(downloaded), PARSE_QUEUE_PER_WORKER)
+            self.assertEqual(len(list(results)), len(self.cpts) - 1)
+
+    def test_get_cpt_objects_reports_failures_per_id(self):
+        bro_ids = [self.cpts[0].bro_id, "CPT999999999999", self.cpts[1].bro_id]
+
+        with self.assertRaises(CPTDownloadError) as context:
+            get_cpt_objects(bro_ids, max_workers=2)
+
+        self.assertEqual(list(context.exception.errors), ["CPT999999999999"])
+        self.assertIsNone(context.exception.results[1])
+        self.assertIsInstance(context.exception.results[0], bytes)
+        self.assertIsInstance(context.exception.results[2], bytes)
+
+
+class TestIterCPTObjects(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(6)
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+        client = BROClient(
+            cpt_object_url=self.server.object_url, cpt_characteristics_url=self.server.characteristics_url
+        )
+        self.addCleanup(client.close)
+        patcher = mock.patch("bro.api._default_client", client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.envelope = Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+
+    def test_iter_yields_characteristics_with_their_object(self):
+        response = list(
+            iter_cpt_characteristics_and_cpt_objects("2015-01-01", "2023-03-03", self.envelope, as_dict=True)
+        )
+
+        self.assertEqual(len(response), len(self.cpts))
+        for characteristic, cpt_object in response:
+            self.assertEqual(cpt_object["dispatchDocument"]["CPT_O"]["broId"], characteristic.bro_id)
+
+    def test_iter_does_not_retrieve_ahead_of_consumer(self):
+        iterator = iter_cpt_characteristics_and_cpt_objects("2015-01-01", "2023-03-03", self.envelope, max_workers=2)
+
+        next(iterator)
+        iterator.close()
+
+        # The characteristics search, the consumed object and at most two objects retrieved ahead
+        self.assertLessEqual(self.server.request_count, 4)
+
+
+class TestBROClient(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(5)
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+        self.client = BROClient(
+            backoff_factor=0.01,
+            cpt_object_url=self.server.object_url,
+            cpt_characteristics_url=self.server.characteristics_url,
+        )
+        self.addCleanup(self.client.close)
+
+    def test_get_cpt_object_reuses_connection(self):
+        for cpt in self.cpts:
+            self.client.get_cpt_object(cpt.bro_id)
+
+        self.assertEqual(self.server.request_count, len(self.cpts))
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_get_cpt_object_retries_on_server_error(self):
+        self.server.queue_errors(503, count=2, retry_after=0)
+
+        response = self.client.get_cpt_object(self.cpts[0].bro_id)
+
+        self.assertIsInstance(response, bytes)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_get_cpt_object_raises_when_retries_are_exhausted(self):
+        client = BROClient(max_retries=1, backoff_factor=0.01, cpt_object_url=self.server.object_url)
+        self.addCleanup(client.close)
+        self.server.queue_errors(500, count=2)
+
+        with self.assertRaises(requests.HTTPError):
+            client.get_cpt_object(self.cpts[0].bro_id)
+
+    def test_get_cpt_characteristics_retries_on_too_many_requests(self):
+        self.server.queue_errors(429, retry_after=0)
+        envelope = Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+
+        response = self.client.get_cpt_characteristics("2015-01-01", "2023-03-03", area=envelope)
+
+        self.assertEqual(len(response), len(self.cpts))
+
+    def test_get_cpt_characteristics_returns_single_document(self):
+        envelope = Envelope(Point(51.9995, 4.9995), Point(52.0005, 5.0005))
+
+        response = self.client.get_cpt_characteristics("2015-01-01", "2023-03-03", area=envelope)
+
+        self.assertEqual([characteristic.bro_id for characteristic in response], [self.cpts[0].bro_id])
+
+    def test_get_cpt_characteristics_raises_without_documents(self):
+        envelope = Envelope(Point(50.0, 4.0), Point(50.1, 4.1))
+
+        with self.assertRaises(ValueError):
+            self.client.get_cpt_characteristics("2015-01-01", "2023-03-03", area=envelope)
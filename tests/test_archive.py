@@ -0,0 +1,86 @@
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from bro import CharacteristicsTable
+from bro import CPTArchive
+from bro import CPTArchiveWriter
+from bro import CPTMeasurements
+from bro import IMBROFile
+from bro import write_archive
+from tests.mock_server import generate_characteristics
+from tests.mock_server import generate_cpts
+
+
+@unittest.skipIf(importlib.util.find_spec("pyarrow") is None, "pyarrow is not installed")
+class TestCPTArchive(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "archive"
+        self.characteristics = generate_characteristics(generate_cpts(5))
+        fixture = IMBROFile.from_file(Path(__file__).parent / "response_CPT000000053405.xml").parse_measurements()
+        self.measurements = {
+            characteristic.bro_id: CPTMeasurements(
+                {parameter: fixture[parameter][: 10 + index] for parameter in fixture.parameters}
+            )
+            for index, characteristic in enumerate(self.characteristics)
+        }
+
+    def test_roundtrip(self):
+        write_archive(self.path, self.characteristics, self.measurements)
+
+        archive = CPTArchive(self.path)
+
+        self.assertEqual(archive.bro_ids, list(self.measurements))
+        expected_table = CharacteristicsTable.from_characteristics(self.characteristics)
+        self.assertEqual(archive.characteristics.to_dict(), expected_table.to_dict())
+        self.assertEqual(archive.characteristics.lat.dtype, np.float64)
+        for bro_id, expected in self.measurements.items():
+            measurements = archive.measurements(bro_id)
+            self.assertEqual(measurements.parameters, expected.parameters)
+            for parameter in expected.parameters:
+                np.testing.assert_array_equal(measurements[parameter], expected[parameter])
+
+    def test_roundtrip_of_a_cpt_without_rows(self):
+        bro_id = self.characteristics[0].bro_id
+        self.measurements[bro_id] = CPTMeasurements(
+            {parameter: np.empty(0) for parameter in self.measurements[bro_id].parameters}
+        )
+        write_archive(self.path, self.characteristics, self.measurements)
+
+        archive = CPTArchive(self.path)
+
+        measurements = archive.measurements(bro_id, parameters=["depth", "coneResistance"])
+        self.assertEqual(measurements.parameters, ["depth", "coneResistance"])
+        self.assertEqual(len(measurements), 0)
+        self.assertEqual(measurements.depth.dtype, np.float64)
+        self.assertLessEqual(set(self.measurements[bro_id].parameters), set(archive.measurements(bro_id).parameters))
+        self.assertEqual(len(dict(archive.iter_measurements())[bro_id]), 0)
+
+    def test_read_spans_row_groups(self):
+        with CPTArchiveWriter(self.path, row_group_size=2) as writer:
+            for bro_id, measurements in self.measurements.items():
+                writer.write_measurements(bro_id, measurements)
+
+        archive = CPTArchive(self.path)
+
+        bro_id = self.characteristics[3].bro_id
+        np.testing.assert_array_equal(
+            archive.measurements(bro_id, parameters=["depth"]).depth, self.measurements[bro_id].depth
+        )
+        self.assertEqual([bro_id for bro_id, _ in archive.iter_measurements()], list(self.measurements))
+        self.assertEqual(len(archive.characteristics), 0)
+        long_table = archive.read_measurements(parameters=["coneResistance"])
+        self.assertEqual(long_table.num_rows, sum(len(measurements) for measurements in self.measurements.values()))
+        self.assertEqual(long_table.column_names, ["bro_id", "coneResistance"])
+
+    def test_duplicate_measurements_are_rejected(self):
+        bro_id, measurements = next(iter(self.measurements.items()))
+        with CPTArchiveWriter(self.path) as writer:
+            writer.write_measurements(bro_id, measurements)
+            with self.assertRaises(ValueError):
+                writer.write_measurements(bro_id, measurements)
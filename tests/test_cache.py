@@ -0,0 +1,188 @@
+import dataclasses
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bro import BROClient
+from bro import CharacteristicsCache
+from bro import Circle
+from bro import CPTObjectCache
+from bro import DiskCharacteristicsCache
+from bro import Envelope
+from bro import MemoryCharacteristicsCache
+from bro import Point
+from bro import parse_characteristics_response
+from tests.mock_server import MockBROServer
+from tests.mock_server import build_characteristics_response
+from tests.mock_server import generate_cpts
+from tests.mock_server import in_area
+
+
+def _fill_cache(path: Path, prefix: str) -> int:
+    cache = CPTObjectCache(path)
+    for index in range(20):
+        cache.set(f"{prefix}{index}", b"<xml>" + prefix.encode() * 100 + b"</xml>")
+    return len(cache)
+
+
+class TestCPTObjectCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "cache.sqlite"
+
+    def test_get_returns_stored_content(self):
+        for compress in (True, False):
+            cache = CPTObjectCache(self.path, compress=compress)
+            cache.set("CPT000000000001", b"<xml>content</xml>")
+
+            self.assertEqual(cache.get("CPT000000000001"), b"<xml>content</xml>")
+            self.assertIsNone(cache.get("CPT000000000002"))
+            cache.close()
+
+    def test_content_persists_between_instances(self):
+        CPTObjectCache(self.path).set("CPT000000000001", b"<xml>content</xml>")
+
+        self.assertIn("CPT000000000001", CPTObjectCache(self.path))
+
+    def test_least_recently_used_objects_are_evicted(self):
+        cache = CPTObjectCache(self.path, max_size=250, compress=False)
+        cache.set("first", b"1" * 100)
+        cache.set("second", b"2" * 100)
+        cache.get("first")
+
+        cache.set("third", b"3" * 100)
+
+        self.assertIn("first", cache)
+        self.assertNotIn("second", cache)
+        self.assertIn("third", cache)
+        self.assertLessEqual(cache.size, 250)
+
+    def test_corrupt_content_is_a_cache_miss(self):
+        cache = CPTObjectCache(self.path, compress=False)
+        cache.set("CPT000000000001", b"<xml>content</xml>")
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("UPDATE cpt_objects SET content = ?", (b"<xml>corrupt</xml>",))
+
+        self.assertIsNone(cache.get("CPT000000000001"))
+        self.assertNotIn("CPT000000000001", cache)
+
+    def test_content_that_can_not_be_decompressed_is_a_cache_miss(self):
+        cache = CPTObjectCache(self.path)
+        cache.set("CPT000000000001", b"<xml>content</xml>")
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("UPDATE cpt_objects SET content = ?", (b"not zlib compressed",))
+
+        self.assertIsNone(cache.get("CPT000000000001"))
+        self.assertNotIn("CPT000000000001", cache)
+
+    def test_cache_can_be_shared_between_processes(self):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            list(executor.map(_fill_cache, [self.path] * 2, ["a", "b"]))
+
+        self.assertEqual(len(CPTObjectCache(self.path)), 40)
+
+
+class TestBROClientWithCache(unittest.TestCase):
+    def test_get_cpt_object_is_served_from_cache(self):
+        cpts = generate_cpts(3)
+        with tempfile.TemporaryDirectory() as directory, MockBROServer(cpts) as server:
+            cache = CPTObjectCache(Path(directory) / "cache.sqlite")
+            with BROClient(cpt_object_url=server.object_url, cache=cache) as client:
+                bro_ids = [cpt.bro_id for cpt in cpts]
+                first = client.get_cpt_objects(bro_ids)
+                second = client.get_cpt_objects(bro_ids, as_dict=True)
+
+            self.assertEqual(server.request_count, len(cpts))
+            self.assertEqual(cache.get(bro_ids[0]), first[0])
+            self.assertEqual(second[0]["dispatchDocument"]["CPT_O"]["broId"], bro_ids[0])
+
+
+class TestCharacteristicsCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.caches = [MemoryCharacteristicsCache(), DiskCharacteristicsCache(Path(directory.name) / "cache.sqlite")]
+        self.cpts = generate_cpts(100)
+        self.area = Envelope(Point(51.99, 4.99), Point(52.02, 5.02))
+        _, documents = parse_characteristics_response(build_characteristics_response(self.cpts).encode())
+        self.documents = [document["CPT_C"] for document in documents]
+
+    def test_get_returns_stored_documents(self):
+        for cache in self.caches:
+            cache.set("2015-01-01", "2022-01-01", self.area.bro_json, self.documents)
+
+            self.assertEqual(cache.get("2015-01-01", "2022-01-01", self.area.bro_json), self.documents)
+            self.assertIsNone(cache.get("2015-01-01", "2022-01-02", self.area.bro_json))
+            self.assertEqual(len(cache), 1)
+
+    def test_contained_areas_are_filtered_locally(self):
+        inner_areas = [
+            Envelope(Point(52.0, 5.0), Point(52.004, 5.006)),
+            Circle(Point(52.004, 5.004), 0.3),
+        ]
+        for cache in self.caches:
+            cache.set("2015-01-01", "2022-01-01", self.area.bro_json, self.documents)
+            for area in inner_areas:
+                documents = cache.get("2015-01-01", "2022-01-01", area.bro_json)
+
+                expected = [cpt.bro_id for cpt in self.cpts if in_area(cpt, area.bro_json)]
+                self.assertTrue(expected)
+                self.assertEqual([document["brocom:broId"] for document in documents], expected)
+
+            overlapping = Envelope(Point(52.0, 5.0), Point(52.03, 5.01))
+            self.assertIsNone(cache.get("2015-01-01", "2022-01-01", overlapping.bro_json))
+
+    def test_areas_inside_circle(self):
+        circle = Circle(Point(52.005, 5.005), 2.0)
+        for cache in self.caches:
+            cache.set("2015-01-01", "2022-01-01", circle.bro_json, self.documents)
+
+            self.assertIsNotNone(cache.get("2015-01-01", "2022-01-01", Circle(Point(52.0, 5.0), 1.0).bro_json))
+            self.assertIsNotNone(cache.get("2015-01-01", "2022-01-01", self.area.bro_json))
+            self.assertIsNone(cache.get("2015-01-01", "2022-01-01", Circle(Point(52.0, 5.0), 1.5).bro_json))
+
+    def test_expired_entries_are_removed(self):
+        for cache in self.caches:
+            cache.ttl = -1
+            cache.set("2015-01-01", "2022-01-01", self.area.bro_json, self.documents)
+
+            self.assertIsNone(cache.get("2015-01-01", "2022-01-01", self.area.bro_json))
+            self.assertEqual(len(cache), 0)
+
+
+class TestBROClientWithCharacteristicsCache(unittest.TestCase):
+    def test_contained_search_is_served_from_cache(self):
+        cpts = generate_cpts(100)
+        with MockBROServer(cpts) as server, BROClient(
+            cpt_characteristics_url=server.characteristics_url, characteristics_cache=MemoryCharacteristicsCache()
+        ) as client:
+            outer = client.get_cpt_characteristics("2015-01-01", "2022-01-01", Circle(Point(52.0, 5.0), 5.0))
+            inner = client.get_cpt_characteristics("2015-01-01", "2022-01-01", Circle(Point(52.0, 5.0), 0.5))
+            with self.assertRaises(ValueError):
+                client.get_cpt_characteristics("2015-01-01", "2022-01-01", Circle(Point(51.99, 4.99), 0.1))
+
+            self.assertEqual(server.request_count, 1)
+            self.assertEqual(len(outer), 100)
+            expected = [cpt.bro_id for cpt in cpts if in_area(cpt, Circle(Point(52.0, 5.0), 0.5).bro_json)]
+            self.assertEqual([characteristic.bro_id for characteristic in inner], expected)
+
+    def test_search_with_only_deregistered_objects_raises_with_and_without_cache(self):
+        cpts = [dataclasses.replace(cpt, deregistered=True) for cpt in generate_cpts(3)]
+        area = Circle(Point(52.0, 5.0), 1.0)
+        with MockBROServer(cpts) as server, BROClient(
+            cpt_characteristics_url=server.characteristics_url, characteristics_cache=MemoryCharacteristicsCache()
+        ) as client:
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    client.get_cpt_characteristics("2015-01-01", "2022-01-01", area)
+
+            self.assertEqual(server.request_count, 1)
+
+
+class TestCharacteristicsCacheBase(unittest.TestCase):
+    def test_characteristics_cache_is_abstract(self):
+        with self.assertRaises(TypeError):
+            CharacteristicsCache()  # pylint: disable=abstract-class-instantiated
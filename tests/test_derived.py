@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from bro import CPTData
+from bro import CPTDataBatch
+from bro import CPTMeasurements
+from bro import IMBROFile
+from bro import corrected_cone_resistance
+from bro import friction_ratio
+from bro import nap_level
+from bro import soil_behaviour_type_index
+from tests.mock_server import FIXTURE_BRO_ID
+from tests.mock_server import build_cpt_object
+
+
+class TestDerivedQuantities(unittest.TestCase):
+    def test_formulas(self):
+        qc, fs, u2 = np.array([2.0, 0.0, 10.0]), np.array([0.04, 0.01, 0.05]), np.array([0.1, 0.0, -0.05])
+
+        np.testing.assert_allclose(friction_ratio(qc, fs), [2.0, np.nan, 0.5])
+        np.testing.assert_allclose(corrected_cone_resistance(qc, u2, 0.8), [2.02, 0.0, 9.99])
+        np.testing.assert_allclose(
+            corrected_cone_resistance(qc, [np.nan, 0.1, 0.1], [0.8, np.nan, 0.8]), [2.0, 0.0, 10.02]
+        )
+        np.testing.assert_allclose(nap_level(np.array([0.0, 1.5]), -2.0), [-2.0, -3.5])
+        # qt = 10 MPa = 100 pa and Rf = 1%: Isbt = sqrt((3.47 - 2) ** 2 + 1.22 ** 2)
+        np.testing.assert_allclose(
+            soil_behaviour_type_index(np.array([10.0, 0.0]), np.array([0.1, 0.1])), [np.hypot(1.47, 1.22), np.nan]
+        )
+
+
+class TestCPTData(unittest.TestCase):
+    def setUp(self):
+        self.content = build_cpt_object(FIXTURE_BRO_ID)
+        self.data = CPTData.from_imbro(self.content)
+
+    def test_metadata_is_read_from_the_object(self):
+        self.assertEqual(self.data.bro_id, FIXTURE_BRO_ID)
+        self.assertEqual(self.data.offset, 4.26)
+        self.assertEqual(self.data.vertical_datum, "NAP")
+        self.assertEqual(self.data.local_vertical_reference_point, "maaiveld")
+        self.assertEqual(self.data.cone_surface_quotient, 0.59)
+
+    def test_derived_quantities(self):
+        measurements = IMBROFile(self.content).parse_measurements()
+
+        np.testing.assert_array_equal(self.data.nap_level, 4.26 - measurements.depth)
+        # Without u2 the corrected cone resistance equals the cone resistance
+        np.testing.assert_array_equal(self.data.corrected_cone_resistance, measurements.cone_resistance)
+        np.testing.assert_allclose(self.data.friction_ratio, measurements.friction_ratio, atol=0.3)
+        index = self.data.soil_behaviour_type_index
+        self.assertEqual(index.shape, (len(measurements),))
+        self.assertTrue(np.all((index[~np.isnan(index)] > 1) & (index[~np.isnan(index)] < 4)))
+
+    def test_characteristics_override_only_known_metadata(self):
+        characteristics = mock.Mock(offset=None, vertical_datum="NAP", local_vertical_reference_point="waterbodem")
+
+        data = CPTData.from_imbro(self.content, characteristics)
+
+        self.assertEqual(data.offset, 4.26)
+        self.assertEqual(data.local_vertical_reference_point, "waterbodem")
+        self.assertFalse(np.isnan(data.nap_level).all())
+
+    def test_missing_columns_and_unknown_datum(self):
+        data = CPTData(
+            "CPT1",
+            CPTMeasurements({"penetrationLength": np.array([1.0, 2.0]), "coneResistance": np.array([1.0, 2.0])}),
+            offset=1.0,
+            vertical_datum="LAT",
+            cone_surface_quotient=0.8,
+        )
+
+        np.testing.assert_array_equal(data.depth, [1.0, 2.0])
+        np.testing.assert_array_equal(data.corrected_cone_resistance, [1.0, 2.0])
+        self.assertTrue(np.isnan(data.nap_level).all())
+        self.assertTrue(np.isnan(data.friction_ratio).all())
+
+
+class TestCPTDataBatch(unittest.TestCase):
+    def test_batch_matches_single_cpts(self):
+        cpts = [
+            CPTData.from_imbro(build_cpt_object(FIXTURE_BRO_ID)),
+            CPTData.from_imbro(build_cpt_object("CPT000000000002", rows=50)),
+            CPTData("CPT3", CPTMeasurements({"penetrationLength": np.array([1.0])})),
+        ]
+        cpts[1].measurements.columns["porePressureU2"] = np.where(np.arange(50) % 2, 0.1, np.nan)
+        cpts.append(
+            CPTData(
+                "CPT4",
+                CPTMeasurements(
+                    {
+                        "penetrationLength": np.array([1.0, 2.0]),
+                        "coneResistance": np.array([1.0, 2.0]),
+                        "porePressureU2": np.array([np.nan, 0.1]),
+                    }
+                ),
+            )
+        )
+        batch = CPTDataBatch(cpts)
+
+        self.assertEqual(len(batch), 4)
+        np.testing.assert_array_equal(batch.split(batch.corrected_cone_resistance)[3], [1.0, 2.0])
+        self.assertEqual(batch.bro_ids, [cpt.bro_id for cpt in cpts])
+        np.testing.assert_array_equal(np.bincount(batch.cpt_index), [len(cpt.measurements) for cpt in cpts])
+        for name in ("friction_ratio", "corrected_cone_resistance", "nap_level", "soil_behaviour_type_index"):
+            for cpt, values in zip(cpts, batch.split(getattr(batch, name))):
+                np.testing.assert_allclose(values, getattr(cpt, name), err_msg=name)
+
+    def test_from_dicts(self):
+        batch = CPTDataBatch.from_dicts([IMBROFile(build_cpt_object(FIXTURE_BRO_ID)).parse()])
+
+        self.assertEqual(batch.bro_ids, [FIXTURE_BRO_ID])
+        self.assertEqual(CPTDataBatch([]).nap_level.shape, (0,))
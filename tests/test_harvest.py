@@ -0,0 +1,97 @@
+import hashlib
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from bro import BROClient
+from bro import Envelope
+from bro import Harvester
+from bro import Point
+from bro.harvest import MANIFEST_FILE
+from bro.harvest import main
+from tests.mock_server import MockBROServer
+from tests.mock_server import build_cpt_object
+from tests.mock_server import generate_cpts
+
+
+class TestHarvester(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(6)
+        self.bro_ids = [cpt.bro_id for cpt in self.cpts]
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+        self.client = BROClient(
+            max_retries=0,
+            cpt_object_url=self.server.object_url,
+            cpt_characteristics_url=self.server.characteristics_url,
+        )
+        self.addCleanup(self.client.close)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_stream_cpt_object_yields_chunks(self):
+        chunks = list(self.client.stream_cpt_object(self.bro_ids[0], chunk_size=1024))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b"".join(chunks), build_cpt_object(self.bro_ids[0]))
+
+    def test_harvest_writes_objects_and_manifest(self):
+        result = Harvester(self.directory, client=self.client, max_workers=3).harvest(self.bro_ids)
+
+        self.assertEqual(sorted(result.downloaded), self.bro_ids)
+        manifest = [json.loads(line) for line in (self.directory / MANIFEST_FILE).read_text().splitlines()]
+        self.assertEqual(sorted(entry["bro_id"] for entry in manifest), self.bro_ids)
+        for entry in manifest:
+            content = (self.directory / entry["file"]).read_bytes()
+            self.assertEqual(content, build_cpt_object(entry["bro_id"]))
+            self.assertEqual(entry["size"], len(content))
+            self.assertEqual(entry["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(list(self.directory.glob("*.part")), [])
+
+    def test_harvest_resumes_without_downloading_completed_objects(self):
+        self.server.queue_errors(500, count=2)
+        first = Harvester(self.directory, client=self.client, max_workers=1).harvest(self.bro_ids)
+        self.assertEqual(list(first.failed), self.bro_ids[:2])
+        self.assertEqual(list(self.directory.glob("*.part")), [])
+
+        with open(self.directory / MANIFEST_FILE, "a") as f:
+            f.write('{"bro_id": "CPT0000')  # killed while writing the manifest
+        self.server.request_count = 0
+        second = Harvester(self.directory, client=self.client).harvest(self.bro_ids)
+
+        self.assertEqual(sorted(second.downloaded), self.bro_ids[:2])
+        self.assertEqual(second.skipped, self.bro_ids[2:])
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_incomplete_or_corrupt_files_are_downloaded_again(self):
+        harvester = Harvester(self.directory, client=self.client)
+        harvester.harvest(self.bro_ids[:2])
+        (self.directory / f"{self.bro_ids[0]}.xml").write_bytes(b"truncated")
+        path = self.directory / f"{self.bro_ids[1]}.xml"
+        path.write_bytes(path.read_bytes().replace(b"<", b">", 1))
+
+        self.assertFalse(harvester.is_complete(self.bro_ids[0]))
+        self.assertTrue(harvester.is_complete(self.bro_ids[1]))
+        self.assertFalse(harvester.is_complete(self.bro_ids[1], verify=True))
+        result = harvester.harvest(self.bro_ids[:2], verify=True)
+        self.assertEqual(sorted(result.downloaded), self.bro_ids[:2])
+
+    def test_harvest_area(self):
+        result = Harvester(self.directory, client=self.client).harvest_area(
+            "2015-01-01", "2023-03-03", Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+        )
+
+        self.assertEqual(sorted(result.downloaded), self.bro_ids)
+
+    def test_console_script_harvests_ids_from_file(self):
+        ids_file = self.directory / "ids.txt"
+        ids_file.write_text("\n".join(self.bro_ids + ["CPT999999999999"]))
+
+        with mock.patch("bro.harvest.BROClient", return_value=self.client):
+            exit_code = main([str(self.directory / "cpts"), "--ids", str(ids_file), "--max-workers", "2"])
+
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(len(list((self.directory / "cpts").glob("CPT*.xml"))), len(self.bro_ids))
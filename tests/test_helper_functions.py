@@ -0,0 +1,67 @@
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from bro import Circle
+from bro import Envelope
+from bro import Point
+from bro import construct_geojson_from_characteristics
+from bro import write_geojson
+from bro.helper_functions import _haversine_distance
+from tests.mock_server import generate_characteristics
+from tests.mock_server import generate_cpts
+
+
+class TestWriteGeojson(unittest.TestCase):
+    def setUp(self):
+        self.characteristics = generate_characteristics(generate_cpts(5))
+        self.circle = Circle(Point(52.0, 5.0), 0.5)
+
+    def test_feature_collection_matches_construct_geojson(self):
+        envelope = Envelope(Point(51.9, 4.9), Point(52.1, 5.1))
+        geojson = io.StringIO()
+
+        count = write_geojson(iter(self.characteristics), geojson)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(geojson.getvalue(), construct_geojson_from_characteristics(self.characteristics))
+        features = json.loads(construct_geojson_from_characteristics(self.characteristics, envelope))["features"]
+        self.assertEqual(features[-1], envelope.to_geojson_feature)
+
+    def test_area_is_written_as_polygon(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "cpts.geojson"
+            write_geojson(self.characteristics, path, area=self.circle)
+            features = json.loads(path.read_text())["features"]
+
+        self.assertEqual(len(features), 6)
+        self.assertEqual(features[0]["properties"]["bro_id"], self.characteristics[0].bro_id)
+        self.assertEqual(features[-1]["geometry"]["type"], "Polygon")
+        self.assertEqual(
+            features, json.loads(construct_geojson_from_characteristics(self.characteristics, self.circle))["features"]
+        )
+
+    def test_sequences(self):
+        ndjson, text_sequence = io.StringIO(), io.StringIO()
+
+        write_geojson(self.characteristics, ndjson, sequence="ndjson")
+        write_geojson(self.characteristics, text_sequence, area=self.circle, sequence="rfc7464")
+
+        lines = ndjson.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [cpt.to_geojson_feature for cpt in self.characteristics])
+        records = text_sequence.getvalue().split("\x1e")
+        self.assertEqual(records[0], "")
+        self.assertEqual(len(records), 7)
+        self.assertTrue(all(record.endswith("\n") for record in records[1:]))
+        with self.assertRaises(ValueError):
+            write_geojson(self.characteristics, io.StringIO(), sequence="csv")
+
+    def test_circle_polygon_vertices_lie_on_the_circle(self):
+        ring = self.circle.to_geojson_polygon_feature(segments=16)["geometry"]["coordinates"][0]
+
+        self.assertEqual(len(ring), 17)
+        self.assertEqual(ring[0], ring[-1])
+        for lon, lat in ring:
+            self.assertAlmostEqual(_haversine_distance(52.0, 5.0, lat, lon), 0.5, places=6)
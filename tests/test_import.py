@@ -0,0 +1,121 @@
+import ast
+import statistics
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from typing import Dict
+from typing import List
+
+import bro
+
+DEFERRED_MODULES = (
+    "numpy",
+    "sqlite3",
+    "concurrent.futures",
+    "requests",
+    "urllib3",
+    "pyproj",
+    "lxml",
+    "asyncio",
+    "multiprocessing",
+    "httpx",
+    "pyarrow",
+)
+# Budget of the median `import bro` time in us, the package itself imports nothing but importlib and typing
+IMPORT_BUDGET = 20_000
+
+
+def import_times(statement: str = "import bro") -> Dict[str, int]:
+    """Runs the statement in a fresh interpreter with `python -X importtime`, and returns the cumulative import time
+    in us of every module that it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def loaded_modules(statement: str) -> List[str]:
+    """Runs the statement in a fresh interpreter and returns the names of the modules it loaded. Unlike
+    `import_times` this includes the submodules that are imported with importlib on first access."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys; {statement}; print(' '.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_does_not_load_heavy_dependencies(self):
+        times = import_times()
+
+        self.assertIn("bro", times)
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_import_time_is_within_budget(self):
+        self.assertLess(statistics.median(import_times()["bro"] for _ in range(5)), IMPORT_BUDGET)
+
+    def test_api_functions_do_not_load_numpy_or_sqlite(self):
+        modules = loaded_modules("from bro import get_cpt_object, IMBROFile")
+
+        self.assertIn("bro.api", modules)
+        for module in ("numpy", "sqlite3", "concurrent.futures", "lxml", "requests"):
+            self.assertNotIn(module, modules)
+
+    def test_dependencies_are_loaded_on_first_use(self):
+        times = import_times("import bro; bro.wgs84_to_rd([52.0], [5.0]); bro.IMBROFile(b'<a>b</a>').parse()")
+
+        self.assertIn("pyproj", times)
+        self.assertIn("lxml", times)
+        self.assertNotIn("requests", times)
+
+
+class TestExports(unittest.TestCase):
+    # The command line entry point and the module logger stay in their submodules
+    NOT_EXPORTED = {"main", "logger"}
+
+    def test_exports_are_the_public_names_of_the_submodules(self):
+        # Like `from bro.<submodule> import *` in order, a later submodule overrides a name of an earlier one
+        expected = {}
+        for submodule in bro._SUBMODULES:  # pylint: disable=protected-access
+            tree = ast.parse((Path(bro.__file__).parent / f"{submodule}.py").read_text())
+            for node in tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    names = [node.name]
+                elif isinstance(node, ast.Assign):
+                    names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+                elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+                    names = [node.target.id]
+                else:
+                    names = []
+                for name in names:
+                    if not name.startswith("_") and name not in self.NOT_EXPORTED:
+                        expected.pop(name, None)
+                        expected[name] = submodule
+
+        self.assertEqual(bro._EXPORTS, expected)  # pylint: disable=protected-access
+
+    def test_submodule_only_names(self):
+        self.assertNotIn("main", bro.__all__)
+        self.assertNotIn("logger", bro.__all__)
+        self.assertTrue(callable(bro.harvest.main))
+        self.assertEqual(bro.instrumentation.logger.name, "bro")
+
+    def test_names_resolve_to_their_submodule(self):
+        namespace = {}
+        exec("from bro import *", namespace)  # pylint: disable=exec-used
+
+        self.assertIs(bro.BROClient, sys.modules["bro.api"].BROClient)
+        self.assertIs(namespace["CPTData"], sys.modules["bro.derived"].CPTData)
+        self.assertEqual(set(namespace) - {"__builtins__"}, set(bro.__all__))
+        with self.assertRaises(AttributeError):
+            bro.does_not_exist  # pylint: disable=pointless-statement
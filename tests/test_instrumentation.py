@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from bro import CACHE_HIT
+from bro import CACHE_MISS
+from bro import PARSE_CHARACTERISTICS
+from bro import PARSE_OBJECT
+from bro import REQUEST_END
+from bro import REQUEST_RETRY
+from bro import REQUEST_START
+from bro import BROClient
+from bro import CPTObjectCache
+from bro import Envelope
+from bro import Event
+from bro import LoggingListener
+from bro import MetricsAggregator
+from bro import Point
+from bro import add_listener
+from bro import emit
+from bro import remove_listener
+from tests.mock_server import MockBROServer
+from tests.mock_server import generate_cpts
+
+
+class TestListeners(unittest.TestCase):
+    def test_emit_calls_registered_listeners(self):
+        events = []
+        add_listener(events.append)
+        emit(REQUEST_END, 0.5, status_code=200)
+        remove_listener(events.append)
+        emit(REQUEST_END, 0.5, status_code=200)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(
+            (events[0].name, events[0].duration, events[0].attributes), (REQUEST_END, 0.5, {"status_code": 200})
+        )
+
+    def test_failing_listener_does_not_break_emit(self):
+        def failing_listener(_):
+            raise RuntimeError("listener failed")
+
+        add_listener(failing_listener)
+        self.addCleanup(remove_listener, failing_listener)
+
+        with self.assertLogs("bro", level="ERROR"):
+            emit(REQUEST_START)
+
+
+class TestMetricsAggregator(unittest.TestCase):
+    def test_summary_reports_percentiles_and_bytes(self):
+        metrics = MetricsAggregator()
+        for duration in range(1, 101):
+            metrics(Event(REQUEST_END, 0.0, duration / 1000, {"bytes": 1000}))
+        metrics(Event(CACHE_HIT, 0.0))
+
+        summary = metrics.summary()
+
+        self.assertEqual(summary[REQUEST_END]["count"], 100)
+        self.assertAlmostEqual(summary[REQUEST_END]["p50"], 0.0505)
+        self.assertAlmostEqual(summary[REQUEST_END]["p99"], 0.09901)
+        self.assertEqual(summary[REQUEST_END]["bytes"], 100000)
+        self.assertEqual(summary[CACHE_HIT], {"count": 1, "per_s": summary[CACHE_HIT]["per_s"]})
+        self.assertIn(REQUEST_END, metrics.report())
+
+
+class TestLoggingListener(unittest.TestCase):
+    def test_event_is_logged_with_structured_fields(self):
+        with self.assertLogs("bro", level="DEBUG") as logs:
+            LoggingListener()(Event(PARSE_OBJECT, 0.0, 0.25, {"bro_id": "CPT000000000001"}))
+
+        self.assertEqual(logs.records[0].getMessage(), "parse_object bro_id=CPT000000000001 duration=0.250000")
+        self.assertEqual(logs.records[0].bro_attributes, {"bro_id": "CPT000000000001"})
+
+
+class TestBROClientInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(3)
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+
+    def test_client_emits_request_parse_and_cache_events(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = CPTObjectCache(Path(directory.name) / "cache.sqlite")
+        with BROClient(
+            backoff_factor=0.01,
+            cpt_object_url=self.server.object_url,
+            cpt_characteristics_url=self.server.characteristics_url,
+            cache=cache,
+        ) as client, MetricsAggregator() as metrics:
+            self.server.queue_errors(503, retry_after=0)
+            client.get_cpt_characteristics_and_return_cpt_objects(
+                "2015-01-01", "2023-03-03", Envelope(Point(51.9, 4.9), Point(52.1, 5.1)), as_dict=True
+            )
+            client.get_cpt_object(self.cpts[0].bro_id)
+
+        summary = metrics.summary()
+        # Every attempt is a request, the retried search included
+        self.assertEqual(summary[REQUEST_START]["count"], 5)
+        self.assertEqual(summary[REQUEST_END]["count"], 5)
+        self.assertEqual(summary[REQUEST_RETRY]["count"], 1)
+        self.assertEqual(summary[PARSE_OBJECT]["count"], 3)
+        self.assertEqual(summary[PARSE_CHARACTERISTICS]["count"], 2)
+        self.assertEqual(summary[CACHE_MISS]["count"], 3)
+        self.assertEqual(summary[CACHE_HIT]["count"], 1)
+        self.assertGreater(summary[REQUEST_END]["bytes"], 0)
@@ -1,7 +1,15 @@
 import unittest
 from pathlib import Path
 
+import numpy as np
+
+from bro import PARSE_CHUNKS_PER_WORKER
 from bro import IMBROFile
+from bro import decode_measurements
+from bro import iter_parse_imbro_files
+from bro import parse_characteristics_response
+from bro import parse_imbro_files
+from tests.mock_server import build_cpt_object
 
 
 class TestIMBROFile(unittest.TestCase):
@@ -14,3 +22,249 @@ class TestIMBROFile(unittest.TestCase):
 
         # Assert
         self.assertIsInstance(imbro_file, IMBROFile)
+
+    def test_parse_measurements_returns_arrays_per_measured_parameter(self):
+        # Arrange
+        xml_file = Path(__file__).parent / "response_CPT000000053405.xml"
+        parsed = IMBROFile.from_file(xml_file).parse()
+        values = parsed["dispatchDocument"]["CPT_O"]["conePenetrometerSurvey"]["conePenetrationTest"]["cptResult"]
+        first_row = [float(value) for value in values["values"].split(";")[0].split(",")]
+
+        # Act
+        measurements = IMBROFile.from_file(xml_file).parse_measurements()
+
+        # Assert
+        self.assertEqual(
+            measurements.parameters,
+            [
+                "penetrationLength",
+                "depth",
+                "elapsedTime",
+                "coneResistance",
+                "inclinationResultant",
+                "localFriction",
+                "frictionRatio",
+            ],
+        )
+        self.assertEqual(len(measurements), 1152)
+        self.assertEqual(measurements.penetration_length.dtype, np.float64)
+        self.assertTrue(measurements.cone_resistance.flags["C_CONTIGUOUS"])
+        self.assertEqual(measurements.penetration_length[0], first_row[0])
+        self.assertEqual(measurements.cone_resistance[0], first_row[3])
+        self.assertTrue(np.isnan(measurements.local_friction[0]))
+        self.assertEqual(measurements.local_friction[7], 0.015)
+
+    def test_decode_measurements_of_a_parsed_object(self):
+        # Arrange
+        xml_file = Path(__file__).parent / "response_CPT000000053405.xml"
+        survey = IMBROFile.from_file(xml_file).parse()["dispatchDocument"]["CPT_O"]["conePenetrometerSurvey"]
+        result = survey["conePenetrationTest"]["cptResult"]
+
+        # Act
+        measurements = decode_measurements(survey["parameters"], result["values"], result["encoding"])
+
+        # Assert
+        expected = IMBROFile.from_file(xml_file).parse_measurements()
+        self.assertEqual(measurements.parameters, expected.parameters)
+        for parameter in expected.parameters:
+            np.testing.assert_array_equal(measurements[parameter], expected[parameter])
+
+    def test_decode_measurements_with_other_separators(self):
+        # Arrange
+        parameters = [("penetrationLength", True), ("elapsedTime", False), ("coneResistance", True)]
+        encoding = {"tokenSeparator": " ", "blockSeparator": "|", "decimalSeparator": ","}
+
+        # Act
+        measurements = decode_measurements(parameters, "1,0 5 2,5|1,5 6 -999999", encoding)
+
+        # Assert
+        self.assertEqual(measurements.parameters, ["penetrationLength", "coneResistance"])
+        np.testing.assert_array_equal(measurements.penetration_length, [1.0, 1.5])
+        np.testing.assert_array_equal(measurements.cone_resistance, [2.5, np.nan])
+
+    def test_parse_streaming_returns_same_result_as_parse(self):
+        # Arrange
+        xml_file = Path(__file__).parent / "response_CPT000000053405.xml"
+        expected = IMBROFile.from_file(xml_file).parse()
+
+        # Act
+        from_path = IMBROFile.parse_streaming(xml_file)
+        from_bytes = IMBROFile.parse_streaming(xml_file.read_bytes())
+        with xml_file.open("rb") as file_object:
+            from_file_object = IMBROFile.parse_streaming(file_object)
+
+        # Assert
+        self.assertEqual(from_path, expected)
+        self.assertEqual(from_bytes, expected)
+        self.assertEqual(from_file_object, expected)
+
+
+class TestParseProjection(unittest.TestCase):
+    def setUp(self):
+        self.imbro_file = IMBROFile.from_file(Path(__file__).parent / "response_CPT000000053405.xml")
+        self.measurements = self.imbro_file.parse_measurements()
+
+    def test_projection_returns_selected_columns_in_depth_window(self):
+        # Act
+        projection = self.imbro_file.parse_projection(["coneResistance", "localFriction"], depth_range=(5.0, 10.0))
+
+        # Assert
+        in_window = (self.measurements.depth >= 5.0) & (self.measurements.depth <= 10.0)
+        self.assertEqual(projection.bro_id, "CPT000000053405")
+        self.assertEqual(projection.sections, {})
+        self.assertEqual(projection.measurements.parameters, ["coneResistance", "localFriction"])
+        self.assertEqual(len(projection.measurements), in_window.sum())
+        np.testing.assert_array_equal(
+            projection.measurements.cone_resistance, self.measurements.cone_resistance[in_window]
+        )
+        np.testing.assert_array_equal(
+            projection.measurements.local_friction, self.measurements.local_friction[in_window]
+        )
+
+    def test_projection_without_selection_equals_parse_measurements(self):
+        # Act
+        projection = self.imbro_file.parse_projection()
+
+        # Assert
+        self.assertEqual(projection.measurements.parameters, self.measurements.parameters)
+        for parameter in self.measurements.parameters:
+            np.testing.assert_array_equal(projection.measurements[parameter], self.measurements[parameter])
+
+    def test_projection_by_penetration_length_and_sections(self):
+        # Arrange
+        expected = self.imbro_file.parse()["dispatchDocument"]["CPT_O"]
+
+        # Act
+        projection = self.imbro_file.parse_projection(
+            ["depth"], penetration_length_range=(2.0, 2.1), sections=["standardizedLocation", "cptStandard"]
+        )
+        outside = self.imbro_file.parse_projection(["depth"], penetration_length_range=(100.0, 200.0))
+
+        # Assert
+        self.assertEqual(projection.measurements.depth.tolist(), [2.0, 2.02, 2.04, 2.06, 2.08, 2.1])
+        self.assertEqual(projection.sections["standardizedLocation"], expected["standardizedLocation"])
+        self.assertEqual(projection.sections["cptStandard"], expected["cptStandard"])
+        self.assertEqual(len(outside.measurements), 0)
+        self.assertEqual(outside.measurements.parameters, ["depth"])
+
+    def test_projection_window_crossing_a_depth_decrease(self):
+        # Arrange
+        decrease = np.flatnonzero(np.diff(self.measurements.depth) < 0)[0]
+        top = self.measurements.depth[decrease + 1]
+        bottom = self.measurements.depth[decrease + 200]
+
+        # Act
+        projection = self.imbro_file.parse_projection(["coneResistance"], depth_range=(top, bottom))
+
+        # Assert
+        in_window = (self.measurements.depth >= top) & (self.measurements.depth <= bottom)
+        np.testing.assert_array_equal(
+            projection.measurements.cone_resistance, self.measurements.cone_resistance[in_window]
+        )
+
+    def test_projection_of_a_single_row(self):
+        # Arrange
+        imbro_file = IMBROFile(build_cpt_object("CPT000000000001", rows=1))
+
+        # Act
+        inside = imbro_file.parse_projection(["coneResistance"], depth_range=(0, 3))
+        outside = imbro_file.parse_projection(["coneResistance"], depth_range=(3, 4))
+
+        # Assert
+        self.assertEqual(len(inside.measurements), 1)
+        self.assertEqual(len(outside.measurements), 0)
+
+    def test_projection_rejects_unknown_parameters(self):
+        with self.assertRaises(ValueError):
+            self.imbro_file.parse_projection(["qc"])
+        with self.assertRaises(ValueError):
+            self.imbro_file.parse_projection(depth_range=(1, 2), penetration_length_range=(1, 2))
+
+
+class TestParseIMBROFiles(unittest.TestCase):
+    def test_parse_imbro_files_returns_results_in_order(self):
+        # Arrange
+        xml_file = Path(__file__).parent / "response_CPT000000053405.xml"
+        content = xml_file.read_bytes()
+        other_content = content.replace(b"CPT000000053405", b"CPT000000000001")
+        sources = [content, xml_file, other_content, str(xml_file), other_content]
+
+        # Act
+        in_pool = parse_imbro_files(sources, max_workers=2, chunksize=2)
+        in_process = parse_imbro_files(sources, max_workers=1)
+
+        # Assert
+        expected = [IMBROFile(content).parse(), IMBROFile(other_content).parse()]
+        self.assertEqual(in_pool, [expected[0], expected[0], expected[1], expected[0], expected[1]])
+        self.assertEqual(in_process, in_pool)
+
+    def test_iter_parse_imbro_files_consumes_sources_incrementally(self):
+        # Arrange
+        content = (Path(__file__).parent / "response_CPT000000053405.xml").read_bytes()
+        taken = []
+
+        def sources():
+            for index in range(20):
+                taken.append(index)
+                yield content
+
+        # Act
+        results = iter_parse_imbro_files(sources(), max_workers=2, chunksize=1)
+        first = next(results)
+
+        # Assert
+        self.assertEqual(first["dispatchDocument"]["CPT_O"]["broId"], "CPT000000053405")
+        self.assertLessEqual(len(taken), 2 * PARSE_CHUNKS_PER_WORKER + 1)
+        self.assertEqual(len(list(results)), 19)
+
+
+class TestParseCharacteristicsResponse(unittest.TestCase):
+    def test_parse_characteristics_response_returns_dispatch_documents(self):
+        # Arrange
+        content = (
+            b'<dispatchCharacteristicsResponse xmlns="http://www.broservices.nl/xsd/dscpt/1.1" '
+            b'xmlns:brocom="http://www.broservices.nl/xsd/brocommon/3.0" xmlns:gml="http://www.opengis.net/gml/3.2">'
+            b"<numberOfDocuments>1</numberOfDocuments>"
+            b'<dispatchDocument><CPT_C gml:id="BRO_0001"><brocom:broId>CPT000000053405</brocom:broId>'
+            b'<brocom:standardizedLocation srsName="urn:ogc:def:crs:EPSG::4258"><gml:pos>52.0 5.0</gml:pos>'
+            b'</brocom:standardizedLocation><offset uom="m">4.260</offset><startTime>2001-11-26</startTime>'
+            b"</CPT_C></dispatchDocument></dispatchCharacteristicsResponse>"
+        )
+
+        # Act
+        rejection_reason, documents = parse_characteristics_response(content)
+
+        # Assert
+        self.assertIsNone(rejection_reason)
+        self.assertEqual(
+            documents,
+            [
+                {
+                    "CPT_C": {
+                        "gml:id": "BRO_0001",
+                        "brocom:broId": "CPT000000053405",
+                        "brocom:standardizedLocation": {
+                            "srsName": "urn:ogc:def:crs:EPSG::4258",
+                            "gml:pos": "52.0 5.0",
+                        },
+                        "offset": {"uom": "m", "value": "4.260"},
+                        "startTime": "2001-11-26",
+                    }
+                }
+            ],
+        )
+
+    def test_parse_characteristics_response_returns_rejection_reason(self):
+        # Arrange
+        content = (
+            b'<dispatchCharacteristicsResponse xmlns="http://www.broservices.nl/xsd/dscpt/1.1" '
+            b'xmlns:brocom="http://www.broservices.nl/xsd/brocommon/3.0">'
+            b"<brocom:rejectionReason>Te veel objecten</brocom:rejectionReason></dispatchCharacteristicsResponse>"
+        )
+
+        # Act
+        rejection_reason, documents = parse_characteristics_response(content)
+
+        # Assert
+        self.assertEqual(rejection_reason, "Te veel objecten")
+        self.assertEqual(documents, [])
@@ -0,0 +1,164 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from bro import AdaptiveConcurrencyLimiter
+from bro import BROClient
+from bro import TokenBucket
+from tests.mock_server import MockBROServer
+from tests.mock_server import generate_cpts
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reserve_allows_burst_then_spaces_requests(self):
+        bucket = TokenBucket(rate=10, burst=3)
+
+        delays = [bucket.reserve() for _ in range(5)]
+
+        self.assertEqual(delays[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(delays[3], 0.1, delta=0.01)
+        self.assertAlmostEqual(delays[4], 0.2, delta=0.01)
+
+    def test_acquire_limits_rate(self):
+        bucket = TokenBucket(rate=50, burst=1)
+
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_buckets_share_state_through_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "bucket"
+            first, second = TokenBucket(rate=10, burst=2, path=path), TokenBucket(rate=10, burst=2, path=path)
+
+            delays = [first.reserve(), second.reserve(), first.reserve(), second.reserve()]
+
+        self.assertEqual(delays[:2], [0.0, 0.0])
+        self.assertAlmostEqual(delays[2], 0.1, delta=0.01)
+        self.assertAlmostEqual(delays[3], 0.2, delta=0.01)
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    def _request(self, limiter: AdaptiveConcurrencyLimiter, latency: float = 0.1, status_code: int = 200):
+        limiter.acquire()
+        limiter.release(latency, status_code)
+
+    def test_limit_increases_additively_on_success(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=6)
+
+        for _ in range(5):
+            self._request(limiter)
+        self.assertEqual(limiter.limit, 5)
+        for _ in range(100):
+            self._request(limiter)
+        self.assertEqual(limiter.limit, 6)
+
+    def test_limit_decreases_multiplicatively_on_throttling_and_latency(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16, min_limit=2)
+        self._request(limiter, latency=0.0)
+
+        self._request(limiter, status_code=429)
+        self.assertEqual(limiter.limit, 8)
+        self._request(limiter, latency=1.0)
+        self.assertEqual(limiter.limit, 4)
+        self._request(limiter, status_code=503)
+        self._request(limiter, status_code=503)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_throttled_burst_decreases_once(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+        self._request(limiter, latency=10.0)
+
+        for _ in range(3):
+            self._request(limiter, latency=10.0, status_code=429)
+
+        self.assertEqual(limiter.limit, 8)
+
+    def test_threads_are_limited(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        lock, in_flight, max_in_flight = threading.Lock(), [0], [0]
+
+        def request(_):
+            limiter.acquire()
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            limiter.release(0.01, 200)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(request, range(12)))
+
+        self.assertEqual(max_in_flight[0], 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_tasks_are_limited(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        order = []
+
+        async def request(name: str):
+            await limiter.acquire_async()
+            order.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            order.append(f"end {name}")
+            limiter.release(0.01, 200)
+
+        async def main():
+            await asyncio.gather(request("a"), request("b"))
+
+        asyncio.run(main())
+
+        self.assertEqual(order, ["start a", "end a", "start b", "end b"])
+
+
+class TestBROClientWithLimiters(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(4)
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+
+    def test_throttled_responses_decrease_concurrency(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        with BROClient(
+            backoff_factor=0.01, cpt_object_url=self.server.object_url, concurrency_limiter=limiter
+        ) as client:
+            self.server.queue_errors(429, retry_after=0)
+            client.get_cpt_object(self.cpts[0].bro_id)
+
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_requests_take_tokens(self):
+        bucket = TokenBucket(rate=20, burst=1)
+        with BROClient(cpt_object_url=self.server.object_url, rate_limiter=bucket) as client:
+            start = time.monotonic()
+            client.get_cpt_objects([cpt.bro_id for cpt in self.cpts], max_workers=4)
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.14)
+
+    def test_every_attempt_takes_a_token_and_is_released_with_its_own_status(self):
+        bucket = TokenBucket(rate=1000, burst=10)
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        with BROClient(
+            backoff_factor=0.01,
+            cpt_object_url=self.server.object_url,
+            rate_limiter=bucket,
+            concurrency_limiter=limiter,
+        ) as client, mock.patch.object(bucket, "acquire", wraps=bucket.acquire) as acquire, mock.patch.object(
+            limiter, "release", wraps=limiter.release
+        ) as release:
+            self.server.queue_errors(503, count=2, retry_after=0)
+            client.get_cpt_object(self.cpts[0].bro_id)
+
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(acquire.call_count, 3)
+        self.assertEqual([call.args[1] for call in release.call_args_list], [503, 503, 200])
@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from bro import CharacteristicsTable
+from bro import CPTSpatialIndex
+from tests.mock_server import generate_characteristics
+from tests.mock_server import generate_cpts
+
+
+class TestCPTSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        random = np.random.default_rng(0)
+        self.x = random.uniform(100000, 110000, 2000)
+        self.y = random.uniform(400000, 405000, 2000)
+        self.bro_ids = [f"CPT{index:012d}" for index in range(2000)]
+        self.index = CPTSpatialIndex(self.bro_ids, self.x, self.y)
+
+    def _distances(self, x, y):
+        return np.hypot(self.x - x, self.y - y)
+
+    def test_nearest_matches_brute_force(self):
+        for x, y in [(105000, 402500), (100000, 400000), (90000, 390000), (150000, 402000)]:
+            distances, indices = self.index.nearest(x, y, k=5)
+
+            expected = np.argsort(self._distances(x, y), kind="stable")[:5]
+            np.testing.assert_array_equal(indices, expected)
+            np.testing.assert_allclose(distances, self._distances(x, y)[expected])
+
+    def test_nearest_for_many_points(self):
+        distances, indices = self.index.nearest([101000, 109000, 50000], [401000, 404000, 400000], k=2)
+
+        self.assertEqual(indices.shape, (3, 2))
+        self.assertEqual(indices[1, 0], np.argmin(self._distances(109000, 404000)))
+        self.assertEqual(indices[2, 0], np.argmin(self._distances(50000, 400000)))
+
+    def test_nearest_is_limited_to_size_of_index(self):
+        index = CPTSpatialIndex(["CPT000000000001", "CPT000000000002"], [0.0, 10.0], [0.0, 0.0])
+
+        distances, indices = index.nearest(1.0, 0.0, k=5)
+
+        self.assertEqual(indices.tolist(), [0, 1])
+        self.assertEqual(distances.tolist(), [1.0, 9.0])
+
+    def test_nearest_in_empty_index(self):
+        index = CPTSpatialIndex([], [], [])
+
+        distances, indices = index.nearest(1.0, 0.0, k=3)
+        many_distances, many_indices = index.nearest([1.0, 2.0], [0.0, 0.0], k=3)
+
+        self.assertEqual((distances.shape, indices.shape), ((0,), (0,)))
+        self.assertEqual((many_distances.shape, many_indices.shape), ((2, 0), (2, 0)))
+        self.assertEqual(len(index.within_radius(0.0, 0.0, 10.0)), 0)
+
+    def test_within_radius_sorted_by_distance(self):
+        indices = self.index.within_radius(104000, 402000, 300)
+
+        distances = self._distances(104000, 402000)
+        self.assertEqual(set(indices.tolist()), set(np.flatnonzero(distances <= 300).tolist()))
+        self.assertTrue(np.all(np.diff(distances[indices]) >= 0))
+        self.assertEqual(len(self.index.within_radius(0, 0, 1000)), 0)
+        self.assertEqual(len(self.index.within_radius(105000, 402500, 1e6)), 2000)
+
+    def test_within_envelope(self):
+        indices = self.index.within_envelope(102000, 401000, 103500, 401800)
+
+        inside = (self.x >= 102000) & (self.x <= 103500) & (self.y >= 401000) & (self.y <= 401800)
+        np.testing.assert_array_equal(indices, np.flatnonzero(inside))
+
+    def test_within_distance_of_line(self):
+        indices = self.index.within_distance_of_line([(100000, 401000), (105000, 401000), (105000, 404000)], 100)
+
+        near_first = (np.abs(self.y - 401000) <= 100) & (self.x >= 100000) & (self.x <= 105000)
+        near_second = (np.abs(self.x - 105000) <= 100) & (self.y >= 401000) & (self.y <= 404000)
+        near_corner = self._distances(105000, 401000) <= 100
+        np.testing.assert_array_equal(indices, np.flatnonzero(near_first | near_second | near_corner))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "index.npz"
+            self.index.save(path)
+            loaded = CPTSpatialIndex.load(path)
+
+        self.assertEqual(loaded.cell_size, self.index.cell_size)
+        self.assertEqual(loaded.bro_ids.tolist(), self.bro_ids)
+        np.testing.assert_array_equal(
+            loaded.nearest(104000, 402000, k=3)[1], self.index.nearest(104000, 402000, k=3)[1]
+        )
+
+    def test_from_characteristics(self):
+        characteristics = generate_characteristics(generate_cpts(10))
+        table = CharacteristicsTable.from_characteristics(characteristics)
+
+        index = CPTSpatialIndex.from_characteristics(characteristics)
+        location = characteristics[3].standardized_location.from_wgs84_to_rd()
+
+        self.assertEqual(index.bro_ids[index.nearest(location.x, location.y)[1][0]], characteristics[3].bro_id)
+        np.testing.assert_allclose(CPTSpatialIndex.from_characteristics(table).x, index.x)
@@ -0,0 +1,65 @@
+import dataclasses
+import tempfile
+import unittest
+from pathlib import Path
+
+from bro import BROClient
+from bro import CharacteristicsIndex
+from bro import Envelope
+from bro import Point
+from tests.mock_server import MockBROServer
+from tests.mock_server import generate_cpts
+
+
+class TestCharacteristicsIndex(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(4)
+        self.server = MockBROServer(self.cpts).start()
+        self.addCleanup(self.server.stop)
+        self.client = BROClient(cpt_characteristics_url=self.server.characteristics_url)
+        self.addCleanup(self.client.close)
+        self.index = CharacteristicsIndex(Envelope(Point(51.9, 4.9), Point(52.1, 5.1)))
+
+    def test_first_sync_adds_all_documents(self):
+        result = self.index.sync(end_date="2023-03-03", client=self.client)
+
+        self.assertEqual(result.added, [cpt.bro_id for cpt in self.cpts])
+        self.assertEqual(self.server.last_search["registrationPeriod"]["beginDate"], "2015-01-01")
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.characteristics[0].bro_id, self.cpts[0].bro_id)
+
+    def test_next_sync_only_requests_delta_and_merges_it(self):
+        self.index.sync(end_date="2023-03-03", client=self.client)
+        new_cpt = dataclasses.replace(generate_cpts(5)[4], registration_time="2023-06-01T10:00:00+01:00")
+        deregistered_cpt = dataclasses.replace(
+            self.cpts[0], registration_time="2023-06-02T10:00:00+01:00", deregistered=True
+        )
+        self.server.set_cpts([deregistered_cpt] + self.cpts[1:] + [new_cpt])
+
+        result = self.index.sync(end_date="2023-07-01", client=self.client)
+
+        self.assertEqual(self.server.last_search["registrationPeriod"]["beginDate"], "2023-03-03")
+        self.assertEqual(result.added, [new_cpt.bro_id])
+        self.assertEqual(result.removed, [self.cpts[0].bro_id])
+        self.assertNotIn(self.cpts[0].bro_id, self.index)
+        self.assertEqual(len(self.index), 4)
+
+    def test_sync_without_new_documents_leaves_index_unchanged(self):
+        self.index.sync(end_date="2023-03-03", client=self.client)
+
+        result = self.index.sync(end_date="2023-07-01", client=self.client)
+
+        self.assertEqual((result.added, result.updated, result.removed), ([], [], []))
+        self.assertEqual(len(self.index), 4)
+
+    def test_index_can_be_saved_and_loaded(self):
+        self.index.sync(end_date="2023-03-03", client=self.client)
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory) / "index.json"
+            self.index.save(file_path)
+            loaded = CharacteristicsIndex.load(file_path)
+
+        self.assertEqual(loaded.area, self.index.area)
+        self.assertEqual(loaded.last_sync, "2023-03-03")
+        self.assertEqual(loaded.documents, self.index.documents)
@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from bro import CharacteristicsTable
+from tests.mock_server import generate_characteristics
+from tests.mock_server import generate_cpts
+
+
+class TestCharacteristicsTable(unittest.TestCase):
+    def setUp(self):
+        self.characteristics = generate_characteristics(generate_cpts(4))
+        self.characteristics[1].quality_class = "klasse1"
+        self.characteristics[2].final_depth = 10.0
+        self.characteristics[3].offset = None
+        self.table = CharacteristicsTable.from_characteristics(self.characteristics)
+
+    def test_characteristics_have_no_instance_dict(self):
+        self.assertFalse(hasattr(self.characteristics[0], "__dict__"))
+        self.assertIsInstance(self.characteristics[0].standardized_location.lat, float)
+        self.assertIsInstance(self.characteristics[0].delivered_location.x, float)
+
+    def test_from_characteristics_stores_typed_columns(self):
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(self.table.lat.dtype, np.float64)
+        self.assertEqual(self.table["deregistered"].dtype, bool)
+        self.assertEqual(self.table.bro_id.tolist(), [characteristic.bro_id for characteristic in self.characteristics])
+        self.assertEqual(self.table.x[0], self.characteristics[0].delivered_location.x)
+        self.assertTrue(np.isnan(self.table.offset[3]))
+        self.assertEqual(self.table.total_cpt_length[0], self.characteristics[0].total_cpt_length)
+
+    def test_filter_combines_criteria(self):
+        filtered = self.table.filter(quality_class="klasse2", deregistered=False, min_final_depth=20.0)
+
+        self.assertEqual(filtered.bro_id.tolist(), [self.characteristics[0].bro_id, self.characteristics[3].bro_id])
+
+    def test_filter_on_depth_range(self):
+        filtered = self.table.filter(min_final_depth=5.0, max_final_depth=15.0)
+
+        self.assertEqual(filtered.bro_id.tolist(), [self.characteristics[2].bro_id])
+
+    def test_export(self):
+        self.assertEqual(self.table.to_dict()["quality_class"], ["klasse2", "klasse1", "klasse2", "klasse2"])
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory) / "characteristics.csv"
+            self.table.to_csv(file_path)
+            lines = file_path.read_text().splitlines()
+
+        self.assertEqual(lines[0].split(",")[0], "bro_id")
+        self.assertEqual(len(lines), 5)
+
+    def test_bulk_coordinate_conversions(self):
+        x, y = self.table.standardized_location_to_rd()
+        lat, lon = self.table.delivered_location_to_wgs84()
+
+        expected_rd = self.characteristics[0].standardized_location.from_wgs84_to_rd()
+        expected_wgs = self.characteristics[0].delivered_location.from_rd_to_wgs84()
+        self.assertAlmostEqual(x[0], expected_rd.x)
+        self.assertAlmostEqual(y[0], expected_rd.y)
+        self.assertAlmostEqual(lat[0], expected_wgs.lat)
+        self.assertAlmostEqual(lon[0], expected_wgs.lon)
+
+    def test_empty_table(self):
+        table = CharacteristicsTable.from_characteristics([])
+
+        self.assertEqual(len(table.filter(deregistered=False)), 0)
@@ -0,0 +1,78 @@
+import dataclasses
+import unittest
+from unittest import mock
+
+from bro import OBJECT_LIMIT_REJECTION
+from bro import BROClient
+from bro import BRORejectionError
+from bro import Circle
+from bro import Envelope
+from bro import Point
+from bro import get_cpt_characteristics_tiled
+from bro import parse_characteristics_response
+from tests.mock_server import MockBROServer
+from tests.mock_server import build_rejection_response
+from tests.mock_server import generate_cpts
+from tests.mock_server import in_area
+
+
+class TestGetCPTCharacteristicsTiled(unittest.TestCase):
+    def setUp(self):
+        self.cpts = generate_cpts(100, spacing=0.01)
+        self.server = MockBROServer(self.cpts, max_objects=10).start()
+        self.addCleanup(self.server.stop)
+        self.client = BROClient(cpt_characteristics_url=self.server.characteristics_url)
+        self.addCleanup(self.client.close)
+
+    def test_envelope_is_split_until_every_piece_is_accepted(self):
+        envelope = Envelope(Point(51.99, 4.99), Point(52.1, 5.1))
+
+        response = get_cpt_characteristics_tiled("2015-01-01", "2023-03-03", envelope, client=self.client)
+
+        self.assertEqual(sorted(cpt.bro_id for cpt in response), [cpt.bro_id for cpt in self.cpts])
+        self.assertGreater(self.server.request_count, 1)
+
+    def test_circle_is_split_and_filtered_on_radius(self):
+        circle = Circle(Point(52.0, 5.0), radius=3.0)
+        expected = [cpt.bro_id for cpt in self.cpts if in_area(cpt, circle.bro_json)]
+
+        response = get_cpt_characteristics_tiled("2015-01-01", "2023-03-03", circle, client=self.client)
+
+        self.assertEqual(sorted(cpt.bro_id for cpt in response), expected)
+        self.assertLess(len(response), len(self.cpts))
+
+    def test_registration_period_is_split_when_area_can_not_be_split_further(self):
+        cpts = [
+            dataclasses.replace(cpt, lat=52.0, lon=5.0, registration_time=f"2016-01-{index + 1:02d}T10:00:00+01:00")
+            for index, cpt in enumerate(self.cpts[:25])
+        ]
+        self.server.set_cpts(cpts)
+        envelope = Envelope(Point(51.99, 4.99), Point(52.01, 5.01))
+
+        response = get_cpt_characteristics_tiled("2015-01-01", "2023-03-03", envelope, max_depth=1, client=self.client)
+
+        self.assertEqual(len(response), 25)
+
+    def test_raises_when_pieces_can_not_be_split_further(self):
+        envelope = Envelope(Point(51.99, 4.99), Point(52.1, 5.1))
+
+        with self.assertRaises(BRORejectionError):
+            get_cpt_characteristics_tiled(
+                "2015-01-01", "2023-03-03", envelope, max_depth=1, split_dates=False, client=self.client
+            )
+
+    def test_only_the_object_limit_rejection_is_split(self):
+        reason, documents = parse_characteristics_response(
+            build_rejection_response("Het aantal gevonden objecten (2345) is groter dan het maximum (2000)").encode()
+        )
+        envelope = Envelope(Point(51.99, 4.99), Point(52.1, 5.1))
+
+        self.assertEqual(documents, [])
+        self.assertRegex(reason, OBJECT_LIMIT_REJECTION)
+        self.assertNotRegex("De registratieperiode heeft een ongeldig maximum", OBJECT_LIMIT_REJECTION)
+        with mock.patch.object(
+            self.client, "search_dispatch_documents", side_effect=BRORejectionError("Ongeldige zoekvraag")
+        ) as search:
+            with self.assertRaises(BRORejectionError):
+                get_cpt_characteristics_tiled("2015-01-01", "2023-03-03", envelope, client=self.client)
+        self.assertEqual(search.call_count, 1)